@@ -2,3 +2,6 @@ from .actor import ActorAgent
 from .guider import GuideAgent
 from .critic import CriticAgent
 from .curriculum import CurriculumAgent
+from .verifier import TaskVerifier
+from .recipes import RecipeGraph
+from .batcher import LlamaBatcher
@@ -2,12 +2,12 @@ from __future__ import annotations
 
 import json
 import regex
-import inflect
-import requests
 from langchain.chat_models import ChatOpenAI
 from langchain.schema import HumanMessage, SystemMessage
 
+from .backend import get_chat_response, get_llama_response
 from llm4mc.prompts import load_prompt
+from llm4mc.utils import Observation, canonical_item_name, norm_name, singular_underscore, resolve_item_name
 
 
 class ActorAgent:
@@ -17,7 +17,9 @@ class ActorAgent:
             baseline_model_name="gpt-4",
             temperature=0,
             request_timeout=120,
-            request_llama_timeout=2400
+            request_llama_timeout=2400,
+            response_cache=None,
+            llama_batcher=None
     ):
         self.server = llama_server
         self.actor_llm = ChatOpenAI(
@@ -26,6 +28,8 @@ class ActorAgent:
             request_timeout=request_timeout,
         )
         self.llama_timeout = request_llama_timeout
+        self.response_cache = response_cache
+        self.llama_batcher = llama_batcher
 
     @classmethod
     def render_system_message(cls):
@@ -38,7 +42,7 @@ class ActorAgent:
         inventory_used, inventory = self.render_inventory(events=events)
 
         final_info = final_task.strip(' .\n').split(' ')
-        final_task_name = ActorAgent.norm_name(ActorAgent.singular_underscore('_'.join(final_info[2:])))
+        final_task_name = canonical_item_name('_'.join(final_info[2:]))
         final_task_nums = final_info[1]
 
         final_task = f"Final Task: Get {final_task_nums} {final_task_name}."
@@ -58,40 +62,24 @@ class ActorAgent:
 
     @classmethod
     def singular_underscore(cls, key):
-        p = inflect.engine()
-
-        key = key.strip(' .\n').lower().replace(" ", "_")
-
-        singular_key = p.singular_noun(key)
-
-        return singular_key if singular_key else key
+        return singular_underscore(key)
 
     @classmethod
     def norm_name(cls, item_name):
-        if item_name.endswith('plank'):
-            item_name += 's'
-
-        return item_name
+        return norm_name(item_name)
 
     @classmethod
     def process_dict_info(cls, inventory):
-        new_inventory = {ActorAgent.norm_name(ActorAgent.singular_underscore(k)): v
+        new_inventory = {canonical_item_name(k): v
                          for k, v in inventory.items()}
 
         return new_inventory
 
     @classmethod
     def render_inventory(cls, *, events):
-        assert events[-1][0] == "observe", "Last event must be observe"
+        observation = Observation.of(events)
 
-        event = events[-1][1]
-
-        inventory = event["inventory"]
-        inventory_used = event["status"]["inventoryUsed"]
-
-        inventory = ActorAgent.process_dict_info(inventory=inventory)
-
-        return inventory_used, inventory
+        return observation.inventory_used, dict(observation.inventory)
 
     def get_gpt4_response(self, events, final_task):
         content = self.render_human_message(events=events, final_task=final_task)
@@ -99,7 +87,7 @@ class ActorAgent:
             self.render_system_message(),
             HumanMessage(content=content)
         ]
-        response = self.actor_llm(messages).content
+        response = get_chat_response(self.actor_llm, messages, cache=self.response_cache, agent_name="actor")
 
         msg = ('=' * 10 + ' Baseline GPT4-Actor Agent Answer ' + '=' * 10).center(100, '=')
         print(f"\033[31m{msg}\n{response}\033[0m")
@@ -108,17 +96,15 @@ class ActorAgent:
 
     def get_llama_sft_response(self, events, final_task):
         input_txt = self.render_human_message(events=events, final_task=final_task)
-        request_data = {"input_txt": input_txt, "mode": "4"}
-        res = requests.post(
-            f"{self.server}/minecraftapi",
-            json=request_data,
-            timeout=self.llama_timeout
+        llama_response = get_llama_response(
+            server=self.server,
+            input_txt=input_txt,
+            mode="4",
+            timeout=self.llama_timeout,
+            agent_name="actor",
+            cache=self.response_cache,
+            batcher=self.llama_batcher
         )
-        if res.status_code != 200:
-            raise RuntimeError("Failed to step AutoDL actor server.")
-        returned_data = res.json()
-
-        llama_response = returned_data["response_sft"]
 
         msg = ('=' * 10 + ' Finetune LlaMA-Actor Agent Answer ' + '=' * 10).center(100, '=')
         print(f"\033[31m{msg}\n{llama_response}\033[0m")
@@ -136,16 +122,16 @@ class ActorAgent:
         task_category = response_dict["Task category"]
 
         if task_category == "Mining":
-            mining_block = ActorAgent.norm_name(ActorAgent.singular_underscore(response_dict["Mining block"]))
+            mining_block = resolve_item_name(response_dict["Mining block"])
             crafting_tool = "None"
             furn = "None"
         else:
             mining_block = "None"
-            crafting_tool = ActorAgent.norm_name(ActorAgent.singular_underscore(response_dict["Crafting tool"]))
+            crafting_tool = resolve_item_name(response_dict["Crafting tool"])
 
             furn = response_dict["Furnace info"]
             if furn != "None":
-                furn["raw materials"] = ActorAgent.norm_name(ActorAgent.singular_underscore(furn["raw materials"]))
+                furn["raw materials"] = resolve_item_name(furn["raw materials"])
                 furn["need coal"] = True if furn["need coal"] == "true" else False
 
         return task_name, task_category, mining_block, crafting_tool, furn
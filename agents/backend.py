@@ -0,0 +1,80 @@
+""" shared LLM invocation for all agents """
+
+from __future__ import annotations
+
+import requests
+
+from llm4mc.utils import ResponseCache, span, call_recorded
+
+
+def get_chat_response(llm, messages, cache=None, agent_name=None):
+    with span("llm.chat", agent=agent_name, backend="openai", model=llm.model_name) as s:
+        s.set(prompt_chars=sum(len(message.content) for message in messages))
+
+        # 记录 / 回放时按 agent 与消息内容匹配
+        request = {"model": llm.model_name, "temperature": llm.temperature,
+                   "messages": [message.content for message in messages]}
+        response = call_recorded("llm", agent_name, request, lambda: _chat(llm, messages, cache, s))
+
+        s.set(response_chars=len(response))
+        return response
+
+
+def _chat(llm, messages, cache, s):
+    if cache is None:
+        return llm(messages).content
+
+    key = ResponseCache.make_key(llm.model_name, llm.temperature, messages[0].content, messages[-1].content)
+
+    response = cache.get(key)
+    s.set(cached=response is not None)
+    if response is None:
+        response = llm(messages).content
+        cache.put(key, response)
+
+    return response
+
+
+def get_llama_response(server, input_txt, mode, timeout, agent_name, cache=None, batcher=None):
+    with span("llm.llama", agent=agent_name, backend="llama_sft", mode=mode, batched=batcher is not None) as s:
+        s.set(prompt_chars=len(input_txt))
+
+        request = {"mode": mode, "input_txt": input_txt}
+        response = call_recorded(
+            "llm", agent_name, request,
+            lambda: _llama(server, input_txt, mode, timeout, agent_name, cache, batcher, s)
+        )
+
+        s.set(response_chars=len(response))
+        return response
+
+
+def _llama(server, input_txt, mode, timeout, agent_name, cache, batcher, s):
+    key = None
+    if cache is not None:
+        key = ResponseCache.make_key(f"llama_sft@{server}", None, f"mode {mode}", input_txt)
+
+        response = cache.get(key)
+        s.set(cached=response is not None)
+        if response is not None:
+            return response
+
+    if batcher is not None:   # 与其它线程的并发请求合并成一批发送
+        response = batcher.submit(input_txt, mode)
+    else:
+        request_data = {"input_txt": input_txt, "mode": mode}
+        res = requests.post(
+            f"{server}/minecraftapi",
+            json=request_data,
+            timeout=timeout
+        )
+        if res.status_code != 200:
+            raise RuntimeError(f"Failed to step AutoDL {agent_name} server.")
+        returned_data = res.json()
+
+        response = returned_data["response_sft"]
+
+    if cache is not None:
+        cache.put(key, response)
+
+    return response
@@ -0,0 +1,114 @@
+""" client-side micro-batcher for the llama SFT server """
+
+from __future__ import annotations
+
+import time
+import queue
+import threading
+from concurrent.futures import Future
+
+import requests
+
+
+class LlamaBatcher:
+    def __init__(self, server, max_batch_size=8, max_wait=0.05, timeout=2400):
+        """ 收集一个时间窗口内并发的 /minecraftapi 请求, 合并成一次 /minecraftapi/batch 请求
+
+        只能合并同一进程中的请求: 多个 bot 要共用一个 batcher, 需要在同一进程的多个线程中运行 (WorkerPool(threads=True))
+
+        :param server: llama 服务地址
+        :param max_batch_size: 每批最多请求数
+        :param max_wait: 有并发请求时, 第一个请求到达后最多等待多少秒再发送; 队列中只有一个请求时立即发送
+        :param timeout: 批量请求超时
+        """
+        self.server = server
+        self.max_batch_size = max_batch_size
+        self.max_wait = max_wait
+        self.timeout = timeout
+
+        self.pending = queue.Queue()
+        self.session = requests.Session()
+
+        self.batches = 0
+        self.requests = 0
+
+        self.closed = False
+        self.thread = threading.Thread(target=self._run, name="llama-batcher", daemon=True)
+        self.thread.start()
+
+    def submit(self, input_txt, mode):
+        """ 阻塞直到所在批次返回
+
+        :return: 该请求的 response_sft
+        """
+        if self.closed:
+            raise RuntimeError("LlamaBatcher has been closed.")
+
+        future = Future()
+        self.pending.put((input_txt, mode, future))
+
+        return future.result()
+
+    def _collect(self):
+        first = self.pending.get()
+        if first is None:
+            return None
+
+        batch = [first]
+        deadline = time.monotonic() + self.max_wait
+
+        while len(batch) < self.max_batch_size:
+            # 只有一个请求时立即发送; 已有其他请求排队说明有并发的调用方, 才在 max_wait 内继续等待
+            remaining = deadline - time.monotonic() if len(batch) > 1 else 0
+            try:
+                item = self.pending.get(timeout=remaining) if remaining > 0 else self.pending.get_nowait()
+            except queue.Empty:
+                break
+
+            if item is None:   # close() 发出的结束标记, 发送完这一批后退出
+                self.pending.put(None)
+                break
+            batch.append(item)
+
+        return batch
+
+    def _run(self):
+        while True:
+            batch = self._collect()
+            if batch is None:
+                return
+
+            request_data = {"requests": [{"input_txt": input_txt, "mode": mode} for input_txt, mode, _ in batch]}
+
+            try:
+                res = self.session.post(f"{self.server}/minecraftapi/batch", json=request_data, timeout=self.timeout)
+                if res.status_code != 200:
+                    raise RuntimeError(f"Failed to step AutoDL batch server with code {res.status_code}.")
+
+                responses = res.json()["responses_sft"]
+                if len(responses) != len(batch):
+                    raise RuntimeError(f"Batch server returned {len(responses)} responses for {len(batch)} requests.")
+            except Exception as e:
+                for _, _, future in batch:
+                    future.set_exception(e)
+                continue
+
+            self.batches += 1
+            self.requests += len(batch)
+
+            for (_, _, future), response in zip(batch, responses):
+                future.set_result(response)
+
+    def stats(self):
+        return {
+            "batches": self.batches,
+            "requests": self.requests,
+            "mean_batch_size": self.requests / self.batches if self.batches else 0.0,
+        }
+
+    def close(self):
+        if not self.closed:
+            self.closed = True
+            self.pending.put(None)
+            self.thread.join()
+            self.session.close()
@@ -5,12 +5,13 @@ from __future__ import annotations
 import re
 import json
 import regex
-import inflect
-import requests
 from langchain.chat_models import ChatOpenAI
 from langchain.schema import HumanMessage, SystemMessage
 
+from .verifier import TaskVerifier
+from .backend import get_chat_response, get_llama_response
 from llm4mc.prompts import load_prompt
+from llm4mc.utils import Observation, canonical_item_name, norm_name, singular_underscore
 
 
 class CriticAgent:
@@ -20,7 +21,9 @@ class CriticAgent:
             baseline_model_name="gpt-4",
             temperature=0,
             request_timeout=120,
-            request_llama_timeout=2400
+            request_llama_timeout=2400,
+            response_cache=None,
+            llama_batcher=None
     ):
         self.server = llama_server
         self.critic_llm = ChatOpenAI(
@@ -29,6 +32,9 @@ class CriticAgent:
             request_timeout=request_timeout,
         )
         self.llama_timeout = request_llama_timeout
+        self.response_cache = response_cache
+        self.llama_batcher = llama_batcher
+        self.verifier = TaskVerifier()
 
     @classmethod
     def render_system_message(cls):
@@ -42,7 +48,7 @@ class CriticAgent:
 
         final_task = final_task.strip(' .\n').lower()
 
-        final_task_name = CriticAgent.norm_name(CriticAgent.singular_underscore('_'.join(final_task.split(' ')[2:])))
+        final_task_name = canonical_item_name('_'.join(final_task.split(' ')[2:]))
         new_task = "Get " + final_task.split(' ')[1] + ' ' + final_task_name + '.'
 
         inventory_info = observation_info["inventory"].strip()
@@ -56,51 +62,52 @@ class CriticAgent:
 
     @classmethod
     def singular_underscore(cls, key):
-        p = inflect.engine()
-
-        key = key.strip(' .\n').lower().replace(" ", "_")
-
-        singular_key = p.singular_noun(key)
-
-        return singular_key if singular_key else key
+        return singular_underscore(key)
 
     @classmethod
     def norm_name(cls, item_name):
-        if item_name.endswith('plank'):
-            item_name += 's'
-
-        return item_name
+        return norm_name(item_name)
 
     @classmethod
     def process_dict_info(cls, inventory):
-        new_inventory = {CriticAgent.norm_name(CriticAgent.singular_underscore(k)): v for k, v in inventory.items()}
+        new_inventory = {canonical_item_name(k): v for k, v in inventory.items()}
 
         return new_inventory
 
     @classmethod
     def render_inventory(cls, *, events):
-        assert events[-1][0] == "observe", "Last event must be observe"
-
-        event = events[-1][1]
-
-        inventory = event["inventory"]
-        inventory_used = event["status"]["inventoryUsed"]
-
-        inventory = CriticAgent.process_dict_info(inventory=inventory)
+        parsed = Observation.of(events)   # 同一次 step 的结果只解析一次
+        inventory = dict(parsed.inventory)
 
         observation = {
-            "inventory": f"Inventory ({inventory_used}/36): {inventory}\n"
+            "inventory": f"Inventory ({parsed.inventory_used}/36): {inventory}\n"
         }
 
         return observation, inventory
 
+    def verify_locally(self, events, final_task):
+        _, inventory = self.render_inventory(events=events)
+
+        task_name, task_nums = TaskVerifier.parse_task(
+            final_task,
+            normalize=canonical_item_name
+        )
+        finished = self.verifier.verify(task_name, task_nums, inventory)
+
+        if finished is not None:
+            msg = ('=' * 10 + ' Local Critic Verifier Answer ' + '=' * 10).center(100, '=')
+            print(f"\033[32m\n{msg}\nGet {task_nums} {task_name}: {inventory.get(task_name, 0)} in inventory, "
+                  f"finished: {finished}\033[0m")
+
+        return finished
+
     def get_gpt4_response(self, events, final_task):
         content = self.render_human_message(events=events, final_task=final_task)
         messages = [
             self.render_system_message(),
             HumanMessage(content=content)
         ]
-        response = self.critic_llm(messages).content
+        response = get_chat_response(self.critic_llm, messages, cache=self.response_cache, agent_name="critic")
 
         msg = ('=' * 10 + ' Baseline GPT4-Critic Agent Answer ' + '=' * 10).center(100, '=')
         print(f"\033[32m{msg}\n{response}\033[0m")
@@ -109,17 +116,15 @@ class CriticAgent:
 
     def get_llama_sft_response(self, events, final_task):
         input_txt = self.render_human_message(events=events, final_task=final_task)
-        request_data = {"input_txt": input_txt, "mode": "5"}
-        res = requests.post(
-            f"{self.server}/minecraftapi",
-            json=request_data,
-            timeout=self.llama_timeout
+        llama_response = get_llama_response(
+            server=self.server,
+            input_txt=input_txt,
+            mode="5",
+            timeout=self.llama_timeout,
+            agent_name="critic",
+            cache=self.response_cache,
+            batcher=self.llama_batcher
         )
-        if res.status_code != 200:
-            raise RuntimeError("Failed to step AutoDL critic server.")
-        returned_data = res.json()
-
-        llama_response = returned_data["response_sft"]
 
         msg = ('=' * 10 + ' Finetune LlaMA-Critic Agent Answer ' + '=' * 10).center(100, '=')
         print(f"\033[32m{msg}\n{llama_response}\033[0m")
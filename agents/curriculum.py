@@ -4,13 +4,14 @@ from __future__ import annotations
 
 import json
 import regex
-import inflect
-import requests
 from langchain.chat_models import ChatOpenAI
 from langchain.schema import HumanMessage, SystemMessage
 
 from .judger import JudgeAgent
+from .recipes import RecipeGraph
+from .backend import get_chat_response, get_llama_response
 from llm4mc.prompts import load_prompt
+from llm4mc.utils import Observation, canonical_item_name, norm_name, singular_underscore, resolve_item_name
 
 
 class CurriculumAgent:
@@ -23,7 +24,10 @@ class CurriculumAgent:
             request_timeout=120,
             judge_model_name="gpt-4",
             judge_model_temperature=0,
-            request_llama_timeout=2400
+            request_llama_timeout=2400,
+            response_cache=None,
+            judge_response_cache=None,
+            llama_batcher=None
     ):
         self.server = llama_server
         self.baseline_model = True if model_type.lower() == "baseline" else False
@@ -37,11 +41,16 @@ class CurriculumAgent:
             llama_server=self.server,
             baseline_model_name=judge_model_name,
             temperature=judge_model_temperature,
-            request_timeout=request_timeout
+            request_timeout=request_timeout,
+            response_cache=judge_response_cache,
+            llama_batcher=llama_batcher
         )
         self.llama_timeout = request_llama_timeout
+        self.response_cache = response_cache
+        self.llama_batcher = llama_batcher
 
         self.task_history = []
+        self.recipe_graph = RecipeGraph()
 
     @classmethod
     def render_system_message(cls):
@@ -53,6 +62,20 @@ class CurriculumAgent:
     def render_human_message(self, events, final_task):
         observation_info, inventory = self.render_inventory(events=events)
 
+        new_task = self.render_current_task(final_task=final_task, inventory=inventory)
+
+        final_task = f"Final Task: {new_task}"
+        inventory_info = observation_info["inventory"].strip()
+
+        content = final_task + "\n" + inventory_info
+
+        msg = ('=' * 10 + ' Curriculum Agent Message ' + '=' * 10).center(100, '=')
+        print(f"\033[33m\n{msg}\n{content}\033[0m")
+
+        return content
+
+    def render_current_task(self, final_task, inventory, commit=True):
+        # commit=False 时只查看当前任务, 不推进任务历史
         if self.task_history:
             last_element = self.task_history[-1]
 
@@ -68,62 +91,41 @@ class CurriculumAgent:
                 item_num = int(new_task.split(' ')[1]) + inventory.get(item_name, 0)
                 new_task = f"Get {item_num} {item_name}."
 
-                last_element["index"] += 1
+                if commit:
+                    last_element["index"] += 1
             else:
                 new_task = first_key
-                self.task_history.pop()
+                if commit:
+                    self.task_history.pop()
         else:
             final_info = final_task.split(' ')
-            final_task_name = CurriculumAgent.norm_name(CurriculumAgent.singular_underscore('_'.join(final_info[2:])))
+            final_task_name = canonical_item_name('_'.join(final_info[2:]))
             new_task = "Get " + final_task.split(' ')[1] + ' ' + final_task_name + '.'
 
-        final_task = f"Final Task: {new_task}"
-        inventory_info = observation_info["inventory"].strip()
-
-        content = final_task + "\n" + inventory_info
-
-        msg = ('=' * 10 + ' Curriculum Agent Message ' + '=' * 10).center(100, '=')
-        print(f"\033[33m\n{msg}\n{content}\033[0m")
-
-        return content
+        return new_task
 
     @classmethod
     def singular_underscore(cls, key):
-        p = inflect.engine()
-
-        key = key.strip(' .\n').lower().replace(" ", "_")
-
-        singular_key = p.singular_noun(key)
-
-        return singular_key if singular_key else key
+        return singular_underscore(key)
 
     @classmethod
     def norm_name(cls, item_name):
-        if item_name.endswith('plank'):
-            item_name += 's'
-
-        return item_name
+        return norm_name(item_name)
 
     @classmethod
     def process_dict_info(cls, inventory):
-        new_inventory = {CurriculumAgent.norm_name(CurriculumAgent.singular_underscore(k)): v
+        new_inventory = {resolve_item_name(k): v
                          for k, v in inventory.items() if v}
 
         return new_inventory
 
     @classmethod
     def render_inventory(cls, *, events):
-        assert events[-1][0] == "observe", "Last event must be observe"
-
-        event = events[-1][1]
-
-        inventory = event["inventory"]
-        inventory_used = event["status"]["inventoryUsed"]
-
-        inventory = CurriculumAgent.process_dict_info(inventory=inventory)
+        parsed = Observation.of(events)   # 同一次 step 的结果只解析一次
+        inventory = dict(parsed.inventory)
 
         observation = {
-            "inventory": f"Inventory ({inventory_used}/36): {inventory}\n"
+            "inventory": f"Inventory ({parsed.inventory_used}/36): {inventory}\n"
         }
 
         return observation, inventory
@@ -134,7 +136,7 @@ class CurriculumAgent:
             self.render_system_message(),
             HumanMessage(content=content)
         ]
-        response = self.curriculum_llm(messages).content
+        response = get_chat_response(self.curriculum_llm, messages, cache=self.response_cache, agent_name="curriculum")
 
         msg = ('=' * 10 + ' Baseline GPT4-Curriculum Agent Answer ' + '=' * 10).center(100, '=')
         print(f"\033[33m{msg}\n{response}\033[0m")
@@ -143,17 +145,15 @@ class CurriculumAgent:
 
     def get_llama_sft_response(self, events, final_task):
         input_txt = self.render_human_message(events=events, final_task=final_task)
-        request_data = {"input_txt": input_txt, "mode": "1"}
-        res = requests.post(
-            f"{self.server}/minecraftapi",
-            json=request_data,
-            timeout=self.llama_timeout
+        llama_response = get_llama_response(
+            server=self.server,
+            input_txt=input_txt,
+            mode="1",
+            timeout=self.llama_timeout,
+            agent_name="curriculum",
+            cache=self.response_cache,
+            batcher=self.llama_batcher
         )
-        if res.status_code != 200:
-            raise RuntimeError("Failed to step AutoDL curriculum server.")
-        returned_data = res.json()
-
-        llama_response = returned_data["response_sft"]
 
         msg = ('=' * 10 + ' Finetune LlaMA-Curriculum Agent Answer ' + '=' * 10).center(100, '=')
         print(f"\033[33m{msg}\n{llama_response}\033[0m")
@@ -167,14 +167,14 @@ class CurriculumAgent:
         response_dict = json.loads(response)
 
         final_task_name, final_task_nums = list(response_dict["Original final task"].items())[0]
-        final_task_name = CurriculumAgent.norm_name(CurriculumAgent.singular_underscore(final_task_name))
+        final_task_name = canonical_item_name(final_task_name)
         final_task = f"Get {final_task_nums} {final_task_name}."
 
         updated_task = response_dict["Updated final task"]
 
         if updated_task:
             updated_task_name, updated_task_nums = list(updated_task.items())[0]
-            updated_task_name = CurriculumAgent.norm_name(CurriculumAgent.singular_underscore(updated_task_name))
+            updated_task_name = canonical_item_name(updated_task_name)
 
             updated_task = f"Get {updated_task_nums} {updated_task_name}." if updated_task_nums else ""
         else:
@@ -184,13 +184,58 @@ class CurriculumAgent:
 
         missing_dict = self.process_dict_info(response_dict["Items Missing"])
 
+        return self.finish_plan(final_task, updated_task, needed_dict, missing_dict)
+
+    def peek_local_plan(self, events, final_task):
+        """ 不推进任务历史, 查看当前任务能否离线规划
+
+        :return: (背包, 当前任务, 物品名, 还需数量, Items Needed), 不在配方图中时 Items Needed 为 None
+        """
+        _, inventory = self.render_inventory(events=events)
+
+        new_task = self.render_current_task(final_task=final_task, inventory=inventory, commit=False)
+
+        task_info = new_task.strip(' .\n').split(' ')
+        task_name, task_nums = task_info[2], int(task_info[1])
+        updated_nums = task_nums - inventory.get(task_name, 0)
+
+        needed_dict = self.recipe_graph.needed(task_name, updated_nums, inventory)
+
+        return inventory, new_task, task_name, updated_nums, needed_dict
+
+    def can_plan_locally(self, events, final_task):
+        return self.peek_local_plan(events=events, final_task=final_task)[-1] is not None
+
+    def plan_locally(self, events, final_task):
+        """ 用离线配方图代替 LLM 规划, 结果与 process_ai_answer 相同; 任务不在配方图中时返回 None """
+        inventory, new_task, task_name, updated_nums, needed_dict = self.peek_local_plan(
+            events=events,
+            final_task=final_task
+        )
+        if needed_dict is None:
+            return None
+
+        self.render_current_task(final_task=final_task, inventory=inventory, commit=True)
+
+        updated_task = f"Get {updated_nums} {task_name}." if updated_nums > 0 else ""
+        missing_dict = self.recipe_graph.missing(needed_dict, inventory)
+
+        msg = ('=' * 10 + ' Local Curriculum Planner Answer ' + '=' * 10).center(100, '=')
+        print(f"\033[33m\n{msg}\nFinal Task: {new_task}\nUpdated final task: {updated_task}\n"
+              f"Items Needed: {needed_dict}\nItems Missing: {missing_dict}\033[0m")
+
+        return self.finish_plan(new_task, updated_task, needed_dict, missing_dict)
+
+    def finish_plan(self, final_task, updated_task, needed_dict, missing_dict):
         if missing_dict:
-            if self.baseline_model:
+            if all(item_name in self.recipe_graph for item_name in missing_dict):
+                task_label = all(self.recipe_graph.is_collectable(item_name) for item_name in missing_dict)
+            elif self.baseline_model:
                 judge_response = self.judger.get_gpt4_response(missing_list=list(missing_dict.keys()))
+                task_label = self.judger.process_ai_answer(judge_response)
             else:
                 judge_response = self.judger.get_llama_sft_response(missing_list=list(missing_dict.keys()))
-
-            task_label = self.judger.process_ai_answer(judge_response)
+                task_label = self.judger.process_ai_answer(judge_response)
         else:
             task_label = True
 
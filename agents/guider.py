@@ -5,12 +5,12 @@ from __future__ import annotations
 import json
 import regex
 import random
-import inflect
-import requests
 from langchain.chat_models import ChatOpenAI
 from langchain.schema import HumanMessage, SystemMessage
 
+from .backend import get_chat_response, get_llama_response
 from llm4mc.prompts import load_prompt
+from llm4mc.utils import Observation, canonical_item_name, norm_name, singular_underscore
 
 
 class GuideAgent:
@@ -20,7 +20,9 @@ class GuideAgent:
             baseline_model_name="gpt-4",
             temperature=0,
             request_timeout=120,
-            request_llama_timeout=2400
+            request_llama_timeout=2400,
+            response_cache=None,
+            llama_batcher=None
     ):
         self.server = llama_server
         self.guide_llm = ChatOpenAI(
@@ -29,6 +31,8 @@ class GuideAgent:
             request_timeout=request_timeout,
         )
         self.llama_timeout = request_llama_timeout
+        self.response_cache = response_cache
+        self.llama_batcher = llama_batcher
 
     @classmethod
     def render_system_message(cls):
@@ -38,7 +42,7 @@ class GuideAgent:
         return system_message
 
     def render_human_message(self, events, goals):
-        goals = GuideAgent.norm_name(GuideAgent.singular_underscore(goals))
+        goals = canonical_item_name(goals)
 
         observation_info = self.render_observation(events=events)
 
@@ -55,36 +59,22 @@ class GuideAgent:
 
     @classmethod
     def singular_underscore(cls, key):
-        p = inflect.engine()
-
-        key = key.strip(' .\n').lower().replace(" ", "_")
-
-        singular_key = p.singular_noun(key)
-
-        return singular_key if singular_key else key
+        return singular_underscore(key)
 
     @classmethod
     def norm_name(cls, item_name):
-        if item_name.endswith('plank'):
-            item_name += 's'
-
-        return item_name
+        return norm_name(item_name)
 
     @classmethod
     def render_observation(cls, *, events):
-        assert events[-1][0] == "observe", "Last event must be observe"
-
-        event = events[-1][1]
+        parsed = Observation.of(events)
 
-        voxels = event["voxels"]
-        biome = event["status"]["biome"]
-        entities = event["status"]["entities"]
-        position = event["status"]["position"]
+        position = parsed.position
 
-        nearby_item = voxels + list(entities.keys())
+        nearby_item = parsed.voxels + list(parsed.entities.keys())
 
         observation = {
-            "biome": f"Biome: {biome}\n",
+            "biome": f"Biome: {parsed.biome}\n",
             "environment": f"Environment: {nearby_item}\n",
             "position": f"Position: {(position['x'], position['y'], position['z'])}"
         }
@@ -97,7 +87,7 @@ class GuideAgent:
             self.render_system_message(),
             HumanMessage(content=content)
         ]
-        response = self.guide_llm(messages).content
+        response = get_chat_response(self.guide_llm, messages, cache=self.response_cache, agent_name="guide")
 
         msg = ('=' * 10 + ' Baseline GPT4-Guide Agent Answer ' + '=' * 10).center(100, '=')
         print(f"\033[34m\n{msg}\n{response}\033[0m")
@@ -106,17 +96,15 @@ class GuideAgent:
 
     def get_llama_sft_response(self, events, goals):
         input_txt = self.render_human_message(events=events, goals=goals)
-        request_data = {"input_txt": input_txt, "mode": "3"}
-        res = requests.post(
-            f"{self.server}/minecraftapi",
-            json=request_data,
-            timeout=self.llama_timeout
+        llama_response = get_llama_response(
+            server=self.server,
+            input_txt=input_txt,
+            mode="3",
+            timeout=self.llama_timeout,
+            agent_name="guide",
+            cache=self.response_cache,
+            batcher=self.llama_batcher
         )
-        if res.status_code != 200:
-            raise RuntimeError("Failed to step AutoDL curriculum server.")
-        returned_data = res.json()
-
-        llama_response = returned_data["response_sft"]
 
         msg = ('=' * 10 + ' Finetune LlaMA-Guide Agent Answer ' + '=' * 10).center(100, '=')
         print(f"\033[34m\n{msg}\n{llama_response}\033[0m")
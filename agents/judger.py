@@ -4,12 +4,12 @@ from __future__ import annotations
 
 import json
 import regex
-import inflect
-import requests
 from langchain.chat_models import ChatOpenAI
 from langchain.schema import HumanMessage, SystemMessage
 
+from .backend import get_chat_response, get_llama_response
 from llm4mc.prompts import load_prompt
+from llm4mc.utils import canonical_item_name, norm_name, singular_underscore
 
 
 class JudgeAgent:
@@ -19,7 +19,9 @@ class JudgeAgent:
             baseline_model_name="gpt-4",
             temperature=0,
             request_timeout=120,
-            request_llama_timeout=2400
+            request_llama_timeout=2400,
+            response_cache=None,
+            llama_batcher=None
     ):
         self.server = llama_server
         self.judge_llm = ChatOpenAI(
@@ -28,6 +30,8 @@ class JudgeAgent:
             request_timeout=request_timeout,
         )
         self.llama_timeout = request_llama_timeout
+        self.response_cache = response_cache
+        self.llama_batcher = llama_batcher
 
     @classmethod
     def render_system_message(cls):
@@ -39,7 +43,7 @@ class JudgeAgent:
     @classmethod
     def render_human_message(cls, missing_list):
         missing_list = [
-            JudgeAgent.norm_name(JudgeAgent.singular_underscore(missing_item)) for missing_item in missing_list
+            canonical_item_name(missing_item) for missing_item in missing_list
         ]
 
         content = f"Item List: {missing_list}"
@@ -51,20 +55,11 @@ class JudgeAgent:
 
     @classmethod
     def singular_underscore(cls, key):
-        p = inflect.engine()
-
-        key = key.strip(' .\n').lower().replace(" ", "_")
-
-        singular_key = p.singular_noun(key)
-
-        return singular_key if singular_key else key
+        return singular_underscore(key)
 
     @classmethod
     def norm_name(cls, item_name):
-        if item_name.endswith('plank'):
-            item_name += 's'
-
-        return item_name
+        return norm_name(item_name)
 
     def get_gpt4_response(self, missing_list):
         content = self.render_human_message(missing_list=missing_list)
@@ -72,7 +67,7 @@ class JudgeAgent:
             self.render_system_message(),
             HumanMessage(content=content)
         ]
-        response = self.judge_llm(messages).content
+        response = get_chat_response(self.judge_llm, messages, cache=self.response_cache, agent_name="judge")
 
         msg = ('=' * 10 + ' Baseline GPT4-Judge Agent Answer ' + '=' * 10).center(100, '=')
         print(f"\033[36m\n{msg}\n{response}\033[0m")
@@ -81,17 +76,15 @@ class JudgeAgent:
 
     def get_llama_sft_response(self, missing_list):
         input_txt = self.render_human_message(missing_list=missing_list)
-        request_data = {"input_txt": input_txt, "mode": "2"}
-        res = requests.post(
-            f"{self.server}/minecraftapi",
-            json=request_data,
-            timeout=self.llama_timeout
+        llama_response = get_llama_response(
+            server=self.server,
+            input_txt=input_txt,
+            mode="2",
+            timeout=self.llama_timeout,
+            agent_name="judge",
+            cache=self.response_cache,
+            batcher=self.llama_batcher
         )
-        if res.status_code != 200:
-            raise RuntimeError("Failed to step AutoDL curriculum server.")
-        returned_data = res.json()
-
-        llama_response = returned_data["response_sft"]
 
         msg = ('=' * 10 + ' Finetune LlaMA-Judge Agent Answer ' + '=' * 10).center(100, '=')
         print(f"\033[36m\n{msg}\n{llama_response}\033[0m")
@@ -0,0 +1,285 @@
+""" offline recipe / prerequisite graph """
+
+from __future__ import annotations
+
+import math
+
+from llm4mc.utils import register_names, block_variants
+
+WOOD_TYPES = ["oak", "spruce", "birch", "jungle", "acacia", "dark_oak", "mangrove", "cherry"]
+
+# 可以用任意一种木板 / 原木代替的配方原料
+ITEM_GROUPS = {
+    "planks": [f"{wood}_planks" for wood in WOOD_TYPES],
+    "log": [f"{wood}_log" for wood in WOOD_TYPES],
+}
+
+# 非标准名称 -> Minecraft 中的物品名
+ITEM_ALIASES = {
+    "bed": "white_bed",
+    "boat": "oak_boat",
+    "gold_pickaxe": "golden_pickaxe",
+    "gold_axe": "golden_axe",
+    "gold_shovel": "golden_shovel",
+    "gold_sword": "golden_sword",
+    "gold_hoe": "golden_hoe",
+}
+
+# 同类工具的等级, 高等级工具可以代替低等级工具
+TOOL_TIERS = {"wooden": 0, "golden": 0, "stone": 1, "iron": 2, "diamond": 3, "netherite": 4}
+
+COLLECT, MINE, SMELT, CRAFT = "collect", "mine", "smelt", "craft"
+NO_TOOL, CRAFTING_TABLE, FURNACE = "no_tool", "crafting_table", "furnace"
+
+
+def _build_recipes():
+    """ 每个条目: item -> (获取方式, 方块 / 工作台, 原料或工具 {name: num}, 每次产出数量) """
+    recipes = {
+        # 徒手即可从环境中获得
+        "dirt": (COLLECT, "dirt", {}, 1),
+        "sand": (COLLECT, "sand", {}, 1),
+        "gravel": (COLLECT, "gravel", {}, 1),
+        "flint": (COLLECT, "gravel", {}, 1),
+        "sugar_cane": (COLLECT, "sugar_cane", {}, 1),
+        "leather": (COLLECT, "cow", {}, 1),
+        "string": (COLLECT, "spider", {}, 1),
+        "feather": (COLLECT, "chicken", {}, 1),
+        "white_wool": (COLLECT, "sheep", {}, 1),
+
+        # 需要工具才能挖掘
+        "cobblestone": (MINE, "stone", {"wooden_pickaxe": 1}, 1),
+        "coal": (MINE, "coal_ore", {"wooden_pickaxe": 1}, 1),
+        "raw_iron": (MINE, "iron_ore", {"stone_pickaxe": 1}, 1),
+        "raw_copper": (MINE, "copper_ore", {"stone_pickaxe": 1}, 1),
+        "lapis_lazuli": (MINE, "lapis_ore", {"stone_pickaxe": 1}, 1),
+        "raw_gold": (MINE, "gold_ore", {"iron_pickaxe": 1}, 1),
+        "redstone": (MINE, "redstone_ore", {"iron_pickaxe": 1}, 1),
+        "diamond": (MINE, "diamond_ore", {"iron_pickaxe": 1}, 1),
+
+        # 熔炉, 约定每个产物消耗一个煤炭
+        "iron_ingot": (SMELT, FURNACE, {"raw_iron": 1, "coal": 1}, 1),
+        "gold_ingot": (SMELT, FURNACE, {"raw_gold": 1, "coal": 1}, 1),
+        "copper_ingot": (SMELT, FURNACE, {"raw_copper": 1, "coal": 1}, 1),
+
+        # 背包 2x2 合成
+        "stick": (CRAFT, NO_TOOL, {"planks": 2}, 4),
+        "crafting_table": (CRAFT, NO_TOOL, {"planks": 4}, 1),
+        "torch": (CRAFT, NO_TOOL, {"stick": 1, "coal": 1}, 4),
+        "paper": (CRAFT, CRAFTING_TABLE, {"sugar_cane": 3}, 3),
+        "book": (CRAFT, NO_TOOL, {"paper": 3, "leather": 1}, 1),
+
+        # 工作台合成
+        "furnace": (CRAFT, CRAFTING_TABLE, {"cobblestone": 8}, 1),
+        "chest": (CRAFT, CRAFTING_TABLE, {"planks": 8}, 1),
+        "white_bed": (CRAFT, CRAFTING_TABLE, {"planks": 3, "white_wool": 3}, 1),
+        "ladder": (CRAFT, CRAFTING_TABLE, {"stick": 7}, 3),
+        "oak_boat": (CRAFT, CRAFTING_TABLE, {"oak_planks": 5}, 1),
+        "bow": (CRAFT, CRAFTING_TABLE, {"stick": 3, "string": 3}, 1),
+        "arrow": (CRAFT, CRAFTING_TABLE, {"flint": 1, "stick": 1, "feather": 1}, 4),
+        "bucket": (CRAFT, CRAFTING_TABLE, {"iron_ingot": 3}, 1),
+        "shears": (CRAFT, NO_TOOL, {"iron_ingot": 2}, 1),
+        "item_frame": (CRAFT, CRAFTING_TABLE, {"stick": 8, "leather": 1}, 1),
+        "tripwire_hook": (CRAFT, CRAFTING_TABLE, {"iron_ingot": 1, "stick": 1, "planks": 1}, 2),
+        "crossbow": (CRAFT, CRAFTING_TABLE, {"stick": 3, "string": 2, "iron_ingot": 1, "tripwire_hook": 1}, 1),
+        "bookshelf": (CRAFT, CRAFTING_TABLE, {"planks": 6, "book": 3}, 1),
+        "jukebox": (CRAFT, CRAFTING_TABLE, {"planks": 8, "diamond": 1}, 1),
+        "iron_door": (CRAFT, CRAFTING_TABLE, {"iron_ingot": 6}, 3),
+        "copper_door": (CRAFT, CRAFTING_TABLE, {"copper_ingot": 6}, 3),
+        "leather_chestplate": (CRAFT, CRAFTING_TABLE, {"leather": 8}, 1),
+    }
+
+    for wood in WOOD_TYPES:
+        recipes[f"{wood}_log"] = (COLLECT, f"{wood}_log", {}, 1)
+        recipes[f"{wood}_planks"] = (CRAFT, NO_TOOL, {f"{wood}_log": 1}, 4)
+        recipes[f"{wood}_door"] = (CRAFT, CRAFTING_TABLE, {f"{wood}_planks": 6}, 3)
+        recipes[f"{wood}_fence"] = (CRAFT, CRAFTING_TABLE, {f"{wood}_planks": 4, "stick": 2}, 3)
+        recipes[f"{wood}_fence_gate"] = (CRAFT, CRAFTING_TABLE, {f"{wood}_planks": 2, "stick": 4}, 1)
+
+    tool_shapes = {"pickaxe": (3, 2), "axe": (3, 2), "shovel": (1, 2), "sword": (2, 1), "hoe": (2, 2)}
+    tool_materials = {"wooden": "planks", "stone": "cobblestone", "iron": "iron_ingot",
+                      "golden": "gold_ingot", "diamond": "diamond"}
+    for tier, material in tool_materials.items():
+        for shape, (head, handle) in tool_shapes.items():
+            recipes[f"{tier}_{shape}"] = (CRAFT, CRAFTING_TABLE, {material: head, "stick": handle}, 1)
+
+    armor_shapes = {"helmet": 5, "chestplate": 8, "leggings": 7, "boots": 4}
+    for tier, material in {"iron": "iron_ingot", "golden": "gold_ingot", "diamond": "diamond"}.items():
+        for shape, num in armor_shapes.items():
+            recipes[f"{tier}_{shape}"] = (CRAFT, CRAFTING_TABLE, {material: num}, 1)
+
+    return recipes
+
+
+RECIPES = _build_recipes()
+register_names(list(RECIPES) + list(ITEM_GROUPS))
+
+
+class RecipeGraph:
+    def __init__(self, recipes=None):
+        self.recipes = RECIPES if recipes is None else recipes
+        self.closure = {}
+
+        for item in self.recipes:
+            self._closure(item)
+
+    def canonical(self, item):
+        return ITEM_ALIASES.get(item, item)
+
+    def __contains__(self, item):
+        item = self.canonical(item)
+        return item in self.recipes or item in ITEM_GROUPS
+
+    def _closure(self, item, visiting=()):
+        """ 递归计算并记录 item 的所有直接 / 间接前置物品 (原料, 工具, 工作台) """
+        if item in self.closure:
+            return self.closure[item]
+
+        prerequisites = set()
+        for name in self._direct_requirements(item):
+            if name in visiting:
+                continue
+
+            prerequisites.add(name)
+            prerequisites.update(self._closure(name, visiting + (item,)))
+
+        self.closure[item] = frozenset(prerequisites)
+
+        return self.closure[item]
+
+    def _direct_requirements(self, item):
+        if item in ITEM_GROUPS:
+            return ITEM_GROUPS[item]
+
+        if item not in self.recipes:
+            return []
+
+        method, station, requirements, _ = self.recipes[item]
+        names = list(requirements)
+        if method in (CRAFT, SMELT) and station != NO_TOOL:
+            names.append(station)
+
+        return names
+
+    def prerequisites(self, item):
+        return self.closure.get(self.canonical(item), frozenset())
+
+    def is_collectable(self, item):
+        """ 对应 judge agent 的 "collected items": 不需要合成, 也不需要任何工具就能从环境中获得 """
+        item = self.canonical(item)
+
+        if item in ITEM_GROUPS:
+            return all(self.is_collectable(name) for name in ITEM_GROUPS[item])
+
+        return item in self.recipes and self.recipes[item][0] == COLLECT
+
+    def resolve_group(self, group, inventory):
+        """ 为 "任意木板" 一类原料选择一个具体物品: 背包中最多的变体, 其次是背包中有对应原木的变体, 最后是橡木 """
+        variants = ITEM_GROUPS[group]
+
+        held = [name for name in variants if inventory.get(name, 0) > 0]
+        if held:
+            return max(held, key=lambda name: inventory[name])
+
+        if group == "planks":
+            for name in variants:
+                if inventory.get(name.replace("_planks", "_log"), 0) > 0:
+                    return name
+
+        return variants[0]
+
+    def resolve_tool(self, tool, inventory):
+        """ 背包中已有的同类且等级足够的工具可以代替所需工具, 选择等级最低的那个 """
+        tier, _, shape = tool.partition("_")
+        if tier not in TOOL_TIERS:
+            return tool
+
+        candidates = [
+            f"{held_tier}_{shape}" for held_tier, level in TOOL_TIERS.items()
+            if level >= TOOL_TIERS[tier] and inventory.get(f"{held_tier}_{shape}", 0) > 0
+        ]
+        if not candidates:
+            return tool
+
+        return min(candidates, key=lambda name: TOOL_TIERS[name.split("_")[0]])
+
+    def needed(self, item, count, inventory):
+        """ 与 curriculum agent 的 "Items Needed" 一致: 只分解一层, 不包括工作台和熔炉
+
+        :return: {物品名: 数量}, item 不在图中时返回 None
+        """
+        item = self.canonical(item)
+        if item in ITEM_GROUPS:
+            item = self.resolve_group(item, inventory)
+
+        if item not in self.recipes:
+            return None
+
+        method, _, requirements, output = self.recipes[item]
+
+        if method == COLLECT or count <= 0:
+            return {}
+
+        if method == MINE:
+            return {self.resolve_tool(tool, inventory): num for tool, num in requirements.items()}
+
+        batches = math.ceil(count / output)
+        needed = {}
+        for name, num in requirements.items():
+            if name in ITEM_GROUPS:
+                name = self.resolve_group(name, inventory)
+            needed[name] = needed.get(name, 0) + num * batches
+
+        return needed
+
+    @classmethod
+    def missing(cls, needed, inventory):
+        return {name: num - inventory.get(name, 0) for name, num in needed.items() if inventory.get(name, 0) < num}
+
+    def source_blocks(self, item):
+        """ 获取 item 时要找的方块或生物: 掉落物与方块不同时换成方块 (cobblestone -> stone, leather -> cow),
+        原木可以是任意一种, 要求的那种排在最前
+
+        :return: 名称列表, 不能直接采集或挖掘时为 [item]
+        """
+        item = self.canonical(item)
+
+        logs = ITEM_GROUPS["log"]
+        if item == "log":
+            return list(logs)
+        if item in logs:
+            return [item] + [name for name in logs if name != item]
+
+        recipe = self.recipes.get(item)
+        if recipe is not None and recipe[0] in (COLLECT, MINE):
+            return [recipe[1]]
+
+        return [item]
+
+    def search_targets(self, item):
+        """ exploreAndMine 要搜索的方块 / 生物: source_blocks 再展开深板岩矿石等同类方块, 去重并保持顺序 """
+        targets = []
+        for source in self.source_blocks(item):
+            for name in block_variants(source):
+                if name not in targets:
+                    targets.append(name)
+
+        return targets
+
+    def frontier(self, item, inventory):
+        """ item 的前置物品中, 以当前背包就可以着手获取的那些 (可以直接采集, 或者直接原料已经齐全)
+
+        :return: 物品名集合
+        """
+        item = self.canonical(item)
+        candidates = set(self.prerequisites(item)) | {item}
+
+        startable = set()
+        for name in candidates:
+            if name in ITEM_GROUPS or name not in self.recipes:
+                continue
+
+            needed = self.needed(name, 1, inventory)
+            if not self.missing(needed, inventory):
+                startable.add(name)
+
+        return startable
@@ -0,0 +1,89 @@
+""" rule-based task verifier """
+
+from __future__ import annotations
+
+from .recipes import ITEM_ALIASES
+
+
+class TaskVerifier:
+    # 这些名称指代一类物品 (例如 log 可以是 oak_log 或 birch_log), 只能交给 critic LLM 判断
+    GENERIC_NAMES = {
+        "log", "wood", "plank", "planks", "wool", "stone", "ore", "ingot", "sapling", "leaves", "sand",
+        "fence", "fence_gate", "door", "boat", "bed", "slab", "stair", "stairs", "tool", "pickaxe", "axe",
+        "shovel", "sword", "hoe", "armor", "helmet", "chestplate", "leggings", "boots", "fuel", "food", "meat",
+    }
+
+    def __init__(self):
+        self.short_circuits = 0
+        self.fallbacks = 0
+
+    @classmethod
+    def parse_task(cls, final_task, normalize):
+        """ 解析 "Get N item." 形式的任务
+
+        :param final_task: 任务字符串
+        :param normalize: 名称规范化函数, 与 critic 渲染消息时一致
+        :return: (物品名, 数量), 无法解析时返回 (None, None)
+        """
+        task_info = final_task.strip(' .\n').lower().split(' ')
+
+        if len(task_info) < 3 or task_info[0] != "get":
+            return None, None
+
+        try:
+            task_nums = int(task_info[1])
+        except ValueError:
+            return None, None
+
+        return normalize('_'.join(task_info[2:])), task_nums
+
+    def decide(self, task_name, task_nums, inventory):
+        """ 只根据背包判断任务是否完成
+
+        :param task_name: 规范化后的物品名
+        :param task_nums: 需要的数量
+        :param inventory: 规范化后的背包 {物品名: 数量}
+        :return: True / False 为确定结论, None 表示名称有歧义, 需要询问 LLM
+        """
+        if task_name is None:
+            return None
+
+        if task_nums <= 0:
+            return True
+
+        if task_name in inventory:
+            return inventory[task_name] >= task_nums
+
+        # 非标准名称 (gold_pickaxe -> golden_pickaxe), 背包中有对应物品时可以判定, 否则交给 LLM
+        if task_name in ITEM_ALIASES:
+            alias_nums = inventory.get(ITEM_ALIASES[task_name], 0)
+            return True if alias_nums >= task_nums else None
+
+        if task_name in TaskVerifier.GENERIC_NAMES:
+            return None
+
+        # 背包中有名称相互包含的物品 (iron / iron_ingot, stone / cobblestone), 无法确定是否指同一物品
+        for item_name in inventory:
+            if task_name in item_name or item_name in task_name:
+                return None
+
+        return False
+
+    def verify(self, task_name, task_nums, inventory):
+        finished = self.decide(task_name, task_nums, inventory)
+
+        if finished is None:
+            self.fallbacks += 1
+        else:
+            self.short_circuits += 1
+
+        return finished
+
+    def stats(self):
+        total = self.short_circuits + self.fallbacks
+
+        return {
+            "short_circuits": self.short_circuits,
+            "fallbacks": self.fallbacks,
+            "short_circuit_rate": self.short_circuits / total if total else 0.0,
+        }
@@ -0,0 +1,62 @@
+// Explore to the east and south until any log is in sight, then mine 3 of it in the same step:
+// exploreAndMine(bot, ["oak_log", "birch_log"], 3, new Vec3(1, 0, 1), 60);
+// Mob names are hunted instead: exploreAndMine(bot, ["cow"], 1, new Vec3(1, 0, 1), 60);
+async function exploreAndMine(
+    bot,
+    names,
+    count = 1,
+    direction = new Vec3(1, 0, 1),
+    maxTime = 60
+) {
+    if (typeof names === "string") {
+        names = [names];
+    }
+    if (!Array.isArray(names) || names.length === 0) {
+        throw new Error("names for exploreAndMine must be a block name or a list of block names");
+    }
+    if (typeof count !== "number") {
+        throw new Error("count for exploreAndMine must be a number");
+    }
+
+    // unknown variants are skipped, the list only widens the search
+    const ids = names
+        .filter((name) => mcData.blocksByName[name])
+        .map((name) => mcData.blocksByName[name].id);
+    const mobs = names.filter((name) => !mcData.blocksByName[name] && mcData.entitiesByName[name]);
+    if (ids.length === 0 && mobs.length === 0) {
+        throw new Error(`No block or mob named ${names.join(", ")}`);
+    }
+
+    const findMob = () => {
+        return bot.nearestEntity(
+            (entity) =>
+                mobs.includes(entity.name) &&
+                entity.position.distanceTo(bot.entity.position) < 32
+        );
+    };
+
+    const found = await exploreUntil(bot, direction, maxTime, () => {
+        if (ids.length > 0) {
+            const block = bot.findBlock({
+                matching: ids,
+                maxDistance: 32,
+            });
+            if (block) return block;
+        }
+        return mobs.length > 0 ? findMob() : null;
+    });
+    if (!found) {
+        bot.chat(`Could not find ${names.join(", ")} within ${maxTime} seconds`);
+        return;
+    }
+
+    if (!mobs.includes(found.name)) {
+        await mineBlock(bot, found.name, count);
+        return;
+    }
+
+    // each kill drops at least one item, stop early when no more of the mob is around
+    for (let i = 0; i < count && findMob(); i++) {
+        await killMob(bot, findMob().name, 300);
+    }
+}
@@ -8,7 +8,7 @@ async function givePlacedItemBack(bot, name, position) {
     await bot.chat("/gamerule doTileDrops true");
 
     async function givePlacedItemBackSingle(bot, name, position) {
-        bot.chat(`/give bot ${name} 1`);
+        bot.chat(`/give @s ${name} 1`);
         const x = Math.floor(position.x);
         const y = Math.floor(position.y);
         const z = Math.floor(position.z);
@@ -1,5 +1,5 @@
 async function mineBlock(bot, name, count = 1) {
-    bot.chat('/effect give bot night_vision 999999');
+    bot.chat('/effect give @s night_vision 999999');
 
     // return if name is not string
     if (typeof name !== "string") {
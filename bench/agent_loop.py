@@ -0,0 +1,173 @@
+""" end-to-end benchmark of the agent loop against the in-process mineflayer and llama stand-ins
+
+python -m llm4mc.bench.agent_loop [--iterations 3] [--seed 0] [--backend llama|openai] [--tasks "Get 1 wooden_pickaxe." ...]
+
+No Minecraft server, node, GPU or API key is needed: the mineflayer stand-in simulates inventory and recipes,
+the agents' answers come from the offline recipe graph, either through the llama stand-in (/minecraftapi path)
+or scripted ChatOpenAI models (baseline path), so every run with the same seed takes the same path.
+Reports wall time, peak Python memory, mineflayer requests and LLM calls per task.
+"""
+
+import os
+import sys
+import json
+import time
+import random
+import socket
+import argparse
+import tempfile
+import tracemalloc
+import contextlib
+
+from llm4mc.mock.llama_server import serve, recipe_response
+from llm4mc.mock.chat_model import install_chat_models
+from llm4mc.mock.mineflayer_server import FakeWorld, MineflayerStandIn, InProcessMineflayer
+from llm4mc.utils import fanout_stats
+
+# main.py 按包目录内的顶层模块导入 (与 scheduler.py 一致)
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from main import AgentMC  # noqa: E402
+
+DEFAULT_TASKS = [
+    "Get 1 crafting_table.",
+    "Get 4 stick.",
+    "Get 1 wooden_pickaxe.",
+    "Get 1 furnace.",
+    "Get 1 stone_pickaxe.",
+    "Get 4 torch.",
+    "Get 1 chest.",
+]
+
+
+def free_port():
+    with socket.socket(socket.AF_INET, socket.SOCK_STREAM) as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+def build_agent(llama_server, stand_in, log_path, max_attempts, backend, reuse_process=False):
+    """ mineflayer 进程替换为进程内的 stand-in, 所有 agent 走同一种 LLM 路径
+
+    :param backend: llama 使用 llama stand-in, openai 使用 ScriptedChatModel
+    """
+    server_port = free_port()
+    model_type = "baseline" if backend == "openai" else "llama"
+
+    agent = AgentMC(
+        mc_port=25565,
+        api_key="bench",
+        api_base="http://127.0.0.1:1",
+        llama_server=llama_server,
+        max_attempts=max_attempts,
+        server_port=server_port,
+        env_log_path=log_path,
+        judge_model_type=model_type,
+        actor_model_type=model_type,
+        guide_model_type=model_type,
+        critic_model_type=model_type,
+        curriculum_model_type=model_type,
+        env_reuse_process=reuse_process,
+    )
+    agent.env.mineflayer = InProcessMineflayer(server_port, stand_in=stand_in)
+    agent.env.restart_delay = 0   # 进程内的 stand-in 没有需要等待释放的端口, 否则每个任务都要多等 1 秒
+
+    chat_models = install_chat_models(agent, responder=recipe_response) if backend == "openai" else {}
+
+    return agent, chat_models
+
+
+def count_llm_calls(llama_stand_in, chat_models):
+    return llama_stand_in.stats()["single_requests"] + sum(model.calls for model in chat_models.values())
+
+
+def run_task(agent, stand_in, llama_stand_in, chat_models, task, seed, quiet):
+    # 每个任务都从同一个世界和随机状态开始
+    stand_in.world = FakeWorld(seed)
+    random.seed(seed)
+
+    env_before = stand_in.stats()["requests"]
+    llm_before = count_llm_calls(llama_stand_in, chat_models)
+
+    tracemalloc.start()
+    start = time.perf_counter()
+
+    with open(os.devnull, "w") as devnull, contextlib.redirect_stdout(devnull if quiet else sys.stdout):
+        finished = agent.inference(task, reset_mode="hard")
+
+    elapsed = time.perf_counter() - start
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+
+    env_after = stand_in.stats()["requests"]
+
+    return {
+        "task": task,
+        "finished": finished,
+        "wall_ms": elapsed * 1000,
+        "peak_kib": peak / 1024,
+        "env_requests": {route: count - env_before.get(route, 0) for route, count in env_after.items()
+                         if count - env_before.get(route, 0)},
+        "llm_calls": count_llm_calls(llama_stand_in, chat_models) - llm_before,
+        "inventory": dict(stand_in.world.inventory),
+    }
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmark the agent loop against local stand-ins.")
+    parser.add_argument("--iterations", type=int, default=3)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--tasks", nargs="*", default=DEFAULT_TASKS)
+    parser.add_argument("--backend", choices=["llama", "openai"], default="llama")
+    parser.add_argument("--max-attempts", type=int, default=3)
+    parser.add_argument("--reuse-process", action="store_true", help="keep the mineflayer process across resets")
+    parser.add_argument("--llama-latency", type=float, default=0.0, help="simulated seconds per LLM call")
+    parser.add_argument("--step-latency", type=float, default=0.0, help="simulated seconds per /step")
+    parser.add_argument("--verbose", action="store_true", help="keep the agents' console output")
+    parser.add_argument("--output", default=None, help="write every iteration's results to this json file")
+    args = parser.parse_args(argv)
+
+    llama_port = free_port()
+    llama_server, llama_stand_in = serve(port=llama_port, latency=args.llama_latency, responder=recipe_response)
+    stand_in = MineflayerStandIn(seed=args.seed, latency=args.step_latency)
+
+    results = []
+    with tempfile.TemporaryDirectory() as log_path:
+        agent, chat_models = build_agent(
+            f"http://127.0.0.1:{llama_port}", stand_in, log_path, args.max_attempts, args.backend,
+            reuse_process=args.reuse_process
+        )
+
+        try:
+            for iteration in range(args.iterations):
+                for task in args.tasks:
+                    result = run_task(
+                        agent, stand_in, llama_stand_in, chat_models, task, args.seed, not args.verbose
+                    )
+                    result["iteration"] = iteration
+                    results.append(result)
+
+                    print(f"[{iteration}] {task:<28} {'ok ' if result['finished'] else 'FAIL'} "
+                          f"{result['wall_ms']:>10.1f} ms {result['peak_kib']:>10.1f} KiB "
+                          f"{sum(result['env_requests'].values()):>5} env requests {result['llm_calls']:>5} LLM calls")
+        finally:
+            agent.env.mineflayer.stop()
+            llama_server.shutdown()
+            llama_server.server_close()
+
+    # 第一轮包含缓存预热, 汇总时只统计之后的轮次 (只有一轮时统计全部)
+    steady = [result for result in results if result["iteration"] > 0] or results
+    total_ms = sum(result["wall_ms"] for result in steady)
+    print(f"\n{len(steady)} tasks, {sum(result['finished'] for result in steady)} finished, "
+          f"{total_ms:.1f} ms total, {total_ms / len(steady):.1f} ms/task, "
+          f"{sum(result['llm_calls'] for result in steady)} LLM calls, "
+          f"{sum(sum(result['env_requests'].values()) for result in steady)} env requests, "
+          f"{fanout_stats()['discarded']} discarded speculative calls")
+
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as fp:
+            json.dump(results, fp, indent=2)
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,68 @@
+""" microbenchmark: per-call inflect.engine() normalization vs the shared name normalizer
+
+python -m llm4mc.bench.name_normalization [--rounds 200]
+"""
+
+import sys
+import time
+import argparse
+
+import inflect
+
+from llm4mc.utils import canonical_item_name, resolve_item_name
+
+# 一次决策中各 agent 会规范化的典型名称: 背包键、任务名、LLM 输出
+SAMPLE_NAMES = [
+    "oak_log", "oak_planks", "stick", "crafting_table", "wooden_pickaxe", "cobblestone", "stone_pickaxe",
+    "coal", "raw_iron", "iron_ingot", "furnace", "torch", "dirt", "birch_log", "white_wool", "leather",
+    "Sticks", "Oak Planks", "iron ingots", "wooden pickaxes", "cobble_stone", "iron_ingott", "crafting tables",
+]
+
+
+def legacy_normalize(key):
+    """ 原先各 agent 中的实现: 每次调用都新建 inflect.engine() """
+    p = inflect.engine()
+
+    key = key.strip(' .\n').lower().replace(" ", "_")
+
+    singular_key = p.singular_noun(key)
+    item_name = singular_key if singular_key else key
+
+    if item_name.endswith('plank'):
+        item_name += 's'
+
+    return item_name
+
+
+def measure(fn, names, rounds):
+    start = time.perf_counter()
+    for _ in range(rounds):
+        for name in names:
+            fn(name)
+
+    return (time.perf_counter() - start) / (rounds * len(names))
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmark item-name normalization.")
+    parser.add_argument("--rounds", type=int, default=200)
+    args = parser.parse_args(argv)
+
+    canonical_item_name.cache_clear()
+    resolve_item_name.cache_clear()
+
+    results = {
+        "legacy (inflect.engine() per call)": measure(legacy_normalize, SAMPLE_NAMES, args.rounds),
+        "canonical_item_name (first round)": measure(canonical_item_name, SAMPLE_NAMES, 1),
+        "canonical_item_name (memoized)": measure(canonical_item_name, SAMPLE_NAMES, args.rounds),
+        "resolve_item_name (first round, fuzzy)": measure(resolve_item_name, SAMPLE_NAMES, 1),
+        "resolve_item_name (memoized)": measure(resolve_item_name, SAMPLE_NAMES, args.rounds),
+    }
+
+    baseline = results["legacy (inflect.engine() per call)"]
+    for name, seconds in results.items():
+        print(f"{name:<40} {seconds * 1e6:>10.2f} us/name {baseline / seconds:>10.1f}x")
+
+
+if __name__ == "__main__":
+    sys.exit(main())
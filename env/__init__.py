@@ -1 +1,5 @@
 from .bridge import LLM4MCEnv
+from .async_bridge import AsyncLLM4MCEnv
+from .world_state import WorldState
+from .supervisor import ProcessSupervisor, RestartBudgetExceeded
+from .spatial_memory import SpatialMemory
@@ -0,0 +1,204 @@
+import asyncio
+import aiohttp
+
+import llm4mc.utils as mc_utils
+from .bridge import LLM4MCEnv
+from .world_state import SequenceGapError
+
+
+class AsyncLLM4MCEnv(LLM4MCEnv):
+    def __init__(self, *args, async_session=None, **kwargs):
+        """ LLM4MCEnv 的协程版本, 协议与进程监控方式不变, 一个事件循环可以同时驱动多个 bot
+
+        :param async_session: 可选的共享 aiohttp.ClientSession, 多个 bot 共用同一个连接池
+        """
+        super().__init__(*args, **kwargs)
+
+        self.async_session = async_session
+        self.own_async_session = async_session is None
+
+    def get_async_session(self):
+        # aiohttp 的 session 需要在事件循环内创建, 因此延迟到第一次请求
+        if self.async_session is None or self.async_session.closed:
+            connector = aiohttp.TCPConnector(limit=self.pool_size)
+            self.async_session = aiohttp.ClientSession(connector=connector)
+            self.own_async_session = True
+
+        return self.async_session
+
+    async def apost(self, route, data=None, timeout=None):
+        recording = mc_utils.get_session()   # 与同步版本的 post 共用记录格式
+        if recording is not None and recording.replaying:
+            response = recording.replay("env", route, data)
+            return response["status_code"], response["text"]
+
+        status, text = await self._apost(route, data, timeout)
+        if recording is not None:
+            recording.record("env", route, data, {"status_code": status, "text": text})
+
+        return status, text
+
+    async def _apost(self, route, data, timeout):
+        session = self.get_async_session()
+        client_timeout = aiohttp.ClientTimeout(total=timeout)
+
+        attempt = 0
+        while True:
+            try:
+                with mc_utils.span("env.request", route=route, asynchronous=True) as s:
+                    async with session.post(f"{self.server}{route}", json=data, timeout=client_timeout) as res:
+                        text = await res.text()
+                        s.set(status=res.status, response_bytes=len(text))
+
+                        return res.status, text
+            except aiohttp.ClientConnectorError:   # 与同步版本一致, 只重试建立连接阶段的失败
+                if attempt >= self.max_retries:
+                    raise
+                await asyncio.sleep(0.5 * 2 ** attempt)
+                attempt += 1
+
+    async def acheck_process(self, reason="exited"):
+        """ 进程在运行时直接返回; 需要重启时才在线程中执行 check_process, 与同步版本共用进程锁、重试退避、
+        备用进程切换与监督线程的统计, 阻塞操作不占用事件循环, 也不在每次请求时占用默认线程池 """
+        if self.mineflayer.is_running:
+            return None
+
+        return await asyncio.to_thread(self.check_process, reason)
+
+    async def astep(self, code, programs="", fields=None, events=None):
+        if not self.has_reset:
+            raise RuntimeError("Environment has not been reset yet")
+
+        await self.acheck_process()
+        self.observation_cache.clear()
+
+        data = self.build_step_data(code, fields=fields, events=events)
+        if self.step_and_pause:
+            data["unpause"] = self.server_paused
+            data["pause"] = True
+        else:
+            await self.aunpause()
+
+        if programs:
+            data["skills"] = await self.aupload_skills(programs)
+
+        try:
+            status, text = await self.apost("/step", data, timeout=self.request_timeout)
+        except aiohttp.ClientConnectionError:
+            if self.supervisor is None:
+                raise
+            return await asyncio.to_thread(self.recovered_events, "Mineflayer process restarted while running code")
+        if status == 409 and programs:
+            self.skills.invalidate()
+            data["skills"] = await self.aupload_skills(programs)
+
+            status, text = await self.apost("/step", data, timeout=self.request_timeout)
+        if status != 200:
+            raise RuntimeError("Failed to step Minecraft server")
+
+        returned_data = mc_utils.EventList(mc_utils.json_loads_fast(text))
+        if self.step_and_pause:
+            self.server_paused = True
+        else:
+            await self.apause()
+
+        try:
+            returned_data = self.merge_observation(returned_data)
+        except SequenceGapError:
+            returned_data = self.resync_events(returned_data, (await self.aobserve())[-1][1])
+
+        return returned_data
+
+    async def aobserve(self, fields=None, events=None):
+        if not self.has_reset:
+            raise RuntimeError("Environment has not been reset yet")
+
+        await self.acheck_process()
+
+        data = self.build_observe_data(fields=fields, events=events)
+        key = (tuple(data.get("fields", ())), tuple(data.get("events", ())))
+
+        if key not in self.observation_cache:
+            status, text = await self.apost("/observe", data, timeout=self.request_timeout)
+            if status != 200:
+                raise RuntimeError("Failed to observe Minecraft server")
+
+            self.observation_cache[key] = self.merge_observation(mc_utils.EventList(mc_utils.json_loads_fast(text)))
+
+        return self.observation_cache[key]
+
+    async def aupload_skills(self, programs):
+        skill_hash = self.skills.register(programs)
+
+        if not self.skills.is_uploaded(skill_hash):
+            status, text = await self.apost(
+                "/skills",
+                {"hash": skill_hash, "programs": programs},
+                timeout=self.request_timeout
+            )
+            if status != 200:
+                raise RuntimeError(f"Failed to upload skills to Minecraft server: {text}")
+
+            self.skills.mark_uploaded(skill_hash)
+
+        return skill_hash
+
+    async def areset(self, *, seed=None, options=None):
+        self.reset_options = self.build_reset_options(options)
+        self.world_state.reset()
+        self.observation_cache.clear()
+
+        await self.aunpause()
+        if self.reuse_process and self.mineflayer.is_running:
+            returned_data = await self.arestart_bot()
+        else:
+            returned_data = await asyncio.to_thread(self.restart_process)
+
+        self.has_reset = True
+        self.connected = True
+        self.reset_options["reset"] = "soft"
+
+        await self.apause()
+        return returned_data
+
+    async def arestart_bot(self):
+        status, text = await self.apost("/start", self.reset_options, timeout=self.request_timeout)
+        if status != 200:
+            raise RuntimeError(f"Minecraft server reply with code {status}")
+
+        return mc_utils.EventList(mc_utils.json_loads_fast(text))
+
+    async def aclose(self, close_session=False):
+        await self.aunpause()
+
+        if self.connected:
+            status, _ = await self.apost("/stop")
+            if status == 200:
+                self.connected = False
+
+        if not self.reuse_process:
+            await asyncio.to_thread(self.mineflayer.close)
+
+        if close_session and self.own_async_session and self.async_session is not None:
+            await self.async_session.close()
+            self.async_session = None
+
+        return not self.connected
+
+    async def apause(self):
+        if self.mineflayer.is_running and not self.server_paused:
+            status, text = await self.apost("/pause")
+            if status == 200:
+                self.server_paused = True
+            else:
+                print(text)
+        return self.server_paused
+
+    async def aunpause(self):
+        if self.mineflayer.is_running and self.server_paused:
+            status, text = await self.apost("/pause")
+            if status == 200:
+                self.server_paused = False
+            else:
+                print(text)
+        return self.server_paused
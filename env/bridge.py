@@ -1,11 +1,17 @@
 import time
-import json
+import atexit
+import threading
 import os.path
 import requests
 import gymnasium as gym
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
 
 import llm4mc.utils as mc_utils
-from .process_monitor import SubprocessMonitor
+from .skill_registry import SkillRegistry
+from .world_state import WorldState, SequenceGapError
+from .process_monitor import SubprocessMonitor, ReplayedProcess
+from .supervisor import ProcessSupervisor, backoff_delay
 
 
 class LLM4MCEnv(gym.Env):
@@ -15,7 +21,23 @@ class LLM4MCEnv(gym.Env):
             server_port=3000,
             log_path="./logs",
             request_timeout=600,
-            server_host="http://127.0.0.1"
+            server_host="http://127.0.0.1",
+            pool_size=4,
+            max_retries=3,
+            step_and_pause=True,
+            bot_username="bot",
+            settle_ticks=100,
+            settle_stable_ticks=5,
+            observe_fields=None,
+            observe_events=None,
+            delta=False,
+            reuse_process=False,
+            standby_port=None,
+            heartbeat_interval=None,
+            step_timeout=None,
+            restart_budget=5,
+            spatial_memory=None,
+            restart_delay=1.0
     ):
         if not mc_port:
             raise ValueError("Mc_port must be specified.")
@@ -23,17 +45,62 @@ class LLM4MCEnv(gym.Env):
         self.mc_port = mc_port
         self.log_path = log_path
         self.server_port = server_port
+        self.bot_username = bot_username
         self.request_timeout = request_timeout
+        self.server_host = server_host
         self.server = f"{server_host}:{server_port}"
-
+        self.step_and_pause = step_and_pause
+        self.pool_size = pool_size
+        self.max_retries = max_retries
+        self.settle_ticks = settle_ticks
+        self.settle_stable_ticks = settle_stable_ticks
+        self.observe_fields = observe_fields
+        self.observe_events = observe_events
+        self.delta = delta
+        # reset 时保留 node 进程, 只通过 /start 重新连接 bot
+        self.reuse_process = reuse_process
+        # 可选的备用进程端口, 备用进程预先启动, 当前进程退出时直接切换
+        self.standby_port = standby_port
+        # 硬重置时结束进程后等待端口释放的时间 (秒), 进程内的 stand-in 不需要等待
+        self.restart_delay = restart_delay
+
+        self.session = self.get_http_session(pool_size, max_retries)
         self.mineflayer = self.get_mineflayer_process(server_port)
+        self.skills = SkillRegistry()
+        self.world_state = WorldState()
+        self.observation_cache = {}
+        # 可选的 SpatialMemory, 每次拿到完整观测后记录 bot 附近的方块
+        self.spatial_memory = spatial_memory
+
+        self.standby = None
+        self.failovers = 0
+        self.spawn_standby()
 
         self.has_reset = False
         self.connected = False
         self.reset_options = None
         self.server_paused = False
 
-    def get_mineflayer_process(self, server_port):
+        # 重启进程时持有, 避免监督线程与调用方线程同时重启
+        self.process_lock = threading.RLock()
+        # 可选的监督线程, 每 heartbeat_interval 秒探测一次 /health, 进程退出或 /step 超过 step_timeout 秒时主动重启
+        self.supervisor = None
+        if heartbeat_interval and not mc_utils.is_replaying():
+            self.supervisor = ProcessSupervisor(
+                self,
+                interval=heartbeat_interval,
+                step_timeout=step_timeout,
+                restart_budget=restart_budget
+            )
+            self.supervisor.start()
+
+        if reuse_process or standby_port is not None or self.supervisor is not None:   # 退出时统一回收
+            atexit.register(self.stop_processes)
+
+    def get_mineflayer_process(self, server_port, name="mineflayer"):
+        if mc_utils.is_replaying():   # 回放前 (start_replay 之后) 创建的环境不启动 node 进程
+            return ReplayedProcess()
+
         log_path = mc_utils.f_mkdir(self.log_path, "mineflayer")
 
         # TODO file_utils.py 中有文件可以代替
@@ -45,68 +112,318 @@ class LLM4MCEnv(gym.Env):
                 mc_utils.f_join(file_path, "mineflayer/index.js"),
                 str(server_port),
             ],
-            name="mineflayer",
+            name=name,
             ready_match=r"Server started on port (\d+)",
             log_path=log_path,
         )
 
-    def check_process(self):
-        retry = 0
-        while not self.mineflayer.is_running:
-            print("Mineflayer process has exited, restarting")
-            self.mineflayer.run()
+    @classmethod
+    def get_http_session(cls, pool_size, max_retries):
+        # 只重试建立连接阶段的失败, /step 不是幂等的, 读超时不能重发
+        retry = Retry(
+            total=max_retries,
+            connect=max_retries,
+            read=0,
+            status=0,
+            backoff_factor=0.5,
+        )
+        adapter = HTTPAdapter(pool_connections=pool_size, pool_maxsize=pool_size, max_retries=retry)
+
+        session = requests.Session()
+        session.mount("http://", adapter)
+        session.mount("https://", adapter)
+
+        return session
+
+    def post(self, route, data=None, timeout=None):
+        """ 所有对 mineflayer 服务的请求都经过这里, 开启追踪时记录路由、状态码与响应大小 """
+        with mc_utils.span("env.request", route=route) as s:
+            res = mc_utils.call_recorded(
+                "env", route, data,
+                lambda: self.session.post(f"{self.server}{route}", json=data, timeout=timeout),
+                encode=mc_utils.RecordedResponse.encode,
+                decode=mc_utils.RecordedResponse.decode
+            )
+            s.set(status=res.status_code, response_bytes=len(res.content))
+
+            return res
+
+    def spawn_standby(self):
+        """ 在后台线程启动备用进程, 不等待它就绪 """
+        if self.standby_port is None or mc_utils.is_replaying():
+            return
+
+        self.standby = self.get_mineflayer_process(self.standby_port, name=f"mineflayer_{self.standby_port}")
+        threading.Thread(target=self.standby.run, name="mineflayer-standby", daemon=True).start()
 
-            if not self.mineflayer.is_running:
+    def failover_to_standby(self):
+        """ 当前进程已退出且备用进程已就绪时, 交换两者的端口并在原端口上启动新的备用进程
+
+        :return: 是否已切换
+        """
+        standby = self.standby
+        if standby is None or not standby.is_running:
+            return False
+
+        self.mineflayer.close()   # 旧进程不会再启动, 同时停止它写日志的线程
+        self.mineflayer, self.standby = standby, None
+        self.server_port, self.standby_port = self.standby_port, self.server_port
+        self.server = f"{self.server_host}:{self.server_port}"
+        self.failovers += 1
+
+        self.spawn_standby()
+
+        return True
+
+    def stop_processes(self):
+        if self.supervisor is not None:
+            self.supervisor.stop()
+
+        self.mineflayer.close()
+        if self.standby is not None:
+            self.standby.close()
+
+    @mc_utils.traced("env.check_process")
+    def check_process(self, reason="exited", detected_at=None):
+        """ 进程未运行时重启并按 reset_options 重新发送 /start, 失败时按指数退避重试
+
+        :param reason: 重启原因, None 表示 reset 主动启动, 不计入监督线程的重启预算与恢复统计
+        :param detected_at: 发现异常的时间 (time.monotonic), 用于统计恢复耗时, 默认为调用时间
+        :return: 重启时为 /start 返回的事件列表, 否则为 None
+        """
+        with self.process_lock:
+            if self.mineflayer.is_running:
+                return None
+
+            detected_at = detected_at or time.monotonic()
+            retry = 0
+            while not self.mineflayer.is_running:
                 if retry > 3:
                     raise RuntimeError("Mineflayer process failed to start")
+                if retry:
+                    time.sleep(backoff_delay(retry))
+                if reason is not None and self.supervisor is not None:
+                    self.supervisor.take_restart(reason)
+                retry += 1
+
+                if self.failover_to_standby():
+                    print(f"Mineflayer process is not running, switched to standby on port {self.server_port}")
                 else:
+                    print("Mineflayer process has exited, restarting")
+                    self.mineflayer.run()
+                self.skills.invalidate()
+                self.world_state.reset()
+                self.observation_cache.clear()
+
+                if not self.mineflayer.is_running:
                     continue
-            print(self.mineflayer.ready_line)
+                print(self.mineflayer.ready_line)
 
-            res = requests.post(
-                f"{self.server}/start",
-                json=self.reset_options,
-                timeout=self.request_timeout,
-            )
-            if res.status_code != 200:
-                self.mineflayer.stop()
-                raise RuntimeError(f"Minecraft server reply with code {res.status_code}")
+                res = self.post("/start", self.reset_options, timeout=self.request_timeout)
+                if res.status_code != 200:
+                    self.mineflayer.stop()
+                    raise RuntimeError(f"Minecraft server reply with code {res.status_code}")
+
+                if reason is not None and self.supervisor is not None:
+                    self.supervisor.record_recovery(reason, detected_at, attempts=retry)
+
+                return mc_utils.EventList(mc_utils.json_loads_fast(res.content))
+
+    def recovered_events(self, message):
+        """ 请求过程中进程被监督线程结束 (或自行退出): 等待恢复完成, 返回新 bot 的观测, 并在前面附加一条 onError 事件 """
+        self.check_process(reason="connection lost")
+
+        events = self.observe()   # 缓存的观测只读, 构造新的事件列表
+
+        return mc_utils.EventList([["onError", dict(events[-1][1], onError=message)]] + list(events))
 
-            return res.json()
+    @mc_utils.traced("env.step")
+    def step(self, code, programs="", fields=None, events=None):
+        """ 执行代码并返回事件列表
 
-    def step(self, code, programs=""):
+        :param code: 要执行的代码
+        :param programs: 技能代码
+        :param fields: 只返回这些观测字段 (如 inventory, status, voxels), 默认使用 observe_fields, None 为全部
+        :param events: 只返回这些事件类型, 最后的 observe 事件总会返回, 默认使用 observe_events, None 为全部
+        :return: [[event_type, event], ...]
+        """
         if not self.has_reset:
             raise RuntimeError("Environment has not been reset yet")
 
         self.check_process()
-        self.unpause()
-
-        data = {"code": code, "programs": programs}
-        res = requests.post(
-            f"{self.server}/step",
-            json=data,
-            timeout=self.request_timeout
-        )
+        self.observation_cache.clear()   # 执行代码后之前的观测失效
+
+        data = self.build_step_data(code, fields=fields, events=events)
+        if self.step_and_pause:   # unpause -> step -> pause 在同一次请求中完成
+            data["unpause"] = self.server_paused
+            data["pause"] = True
+        else:
+            self.unpause()
+
+        if programs:
+            data["skills"] = self.upload_skills(programs)
+
+        try:
+            res = self.post("/step", data, timeout=self.request_timeout)
+        except requests.ConnectionError:
+            if self.supervisor is None:
+                raise
+            return self.recovered_events("Mineflayer process restarted while running code")
+        if res.status_code == 409 and programs:   # 服务端不认识该哈希 (进程在外部被重启), 重新上传后重试
+            self.skills.invalidate()
+            data["skills"] = self.upload_skills(programs)
+
+            res = self.post("/step", data, timeout=self.request_timeout)
         if res.status_code != 200:
             raise RuntimeError("Failed to step Minecraft server")
 
-        returned_data = res.json()
-        self.pause()
+        returned_data = mc_utils.EventList(mc_utils.json_loads_fast(res.content))
+        if self.step_and_pause:
+            self.server_paused = True
+        else:
+            self.pause()
+
+        try:
+            returned_data = self.merge_observation(returned_data)
+        except SequenceGapError:   # 镜像与服务端不同步, 重新取回完整观测
+            returned_data = self.resync_events(returned_data, self.observe()[-1][1])
 
-        return json.loads(returned_data)
+        return returned_data
+
+    @mc_utils.traced("env.observe")
+    def observe(self, fields=None, events=None):
+        """ 不执行代码, 只获取当前观测; 服务端处于暂停状态, 两次执行代码之间重复调用直接返回缓存
+
+        返回的就是缓存的 EventList (不复制, 已解析的 Observation 随之复用), 调用方只读, 不应修改
+
+        :param fields: 同 step
+        :param events: 同 step
+        :return: [[event_type, event], ...]
+        """
+        if not self.has_reset:
+            raise RuntimeError("Environment has not been reset yet")
+
+        self.check_process()
+
+        data = self.build_observe_data(fields=fields, events=events)
+        key = (tuple(data.get("fields", ())), tuple(data.get("events", ())))
+
+        if key not in self.observation_cache:
+            res = self.post("/observe", data, timeout=self.request_timeout)
+            if res.status_code != 200:
+                raise RuntimeError("Failed to observe Minecraft server")
+
+            self.observation_cache[key] = self.merge_observation(mc_utils.EventList(mc_utils.json_loads_fast(res.content)))
+
+        return self.observation_cache[key]
+
+    def build_observe_data(self, fields=None, events=None):
+        data = {}
+
+        fields = fields or self.observe_fields
+        events = events or self.observe_events
+        if fields:
+            data["fields"] = list(fields)
+        if events:
+            data["events"] = list(events)
+        if self.delta:
+            data["delta"] = {"ack": self.world_state.seq}
+
+        return data
+
+    def build_step_data(self, code, fields=None, events=None):
+        data = {"code": code, "programs": ""}
+        data.update(self.build_observe_data(fields=fields, events=events))
+
+        if code and self.settle_ticks:
+            data["settle"] = self.build_settle_options()
+
+        return data
+
+    def merge_observation(self, events):
+        """ delta 模式下按顺序把每个事件还原为完整观测, agents 读到的格式不变 """
+        if self.delta:
+            for event in events:
+                event[1] = self.world_state.apply(event[1])
+
+        if self.spatial_memory is not None and events and events[-1][0] == "observe":
+            self.spatial_memory.observe(events[-1][1])
+
+        return events
+
+    def resync_events(self, events, observation):
+        """ 镜像与服务端不同步时, 没能还原的事件改用重新取回的完整观测, 保留事件自身的内容 (onChat 等) """
+        for event in events:
+            if "$seq" in event[1]:
+                event[1] = dict(observation, **{key: value for key, value in event[1].items() if key.startswith("on")})
+
+        return events
+
+    def build_settle_options(self):
+        """ 代码执行完后, 服务端等待 bot 静止 (没有寻路、挖掘, 背包连续 stableTicks 个 tick 不变) 再观测, 最多 maxTicks 个 tick """
+        return {"maxTicks": self.settle_ticks, "stableTicks": self.settle_stable_ticks}
+
+    def upload_skills(self, programs):
+        skill_hash = self.skills.register(programs)
+
+        if not self.skills.is_uploaded(skill_hash):
+            res = self.post("/skills", {"hash": skill_hash, "programs": programs}, timeout=self.request_timeout)
+            if res.status_code != 200:
+                raise RuntimeError(f"Failed to upload skills to Minecraft server: {res.text}")
+
+            self.skills.mark_uploaded(skill_hash)
+
+        return skill_hash
 
     def render(self):
         raise NotImplementedError("render is not implemented")
 
+    @mc_utils.traced("env.reset")
     def reset(self, *, seed=None, options=None):
+        self.reset_options = self.build_reset_options(options)
+        self.world_state.reset()
+        self.observation_cache.clear()
+
+        self.unpause()
+        if self.reuse_process and self.mineflayer.is_running:
+            returned_data = self.restart_bot()
+        else:
+            returned_data = self.restart_process()
+
+        self.has_reset = True
+        self.connected = True
+        self.reset_options["reset"] = "soft"
+
+        self.pause()
+        return returned_data
+
+    def restart_process(self):
+        """ 结束并重新启动进程, 按 reset_options 发送 /start; 持有进程锁, 监督线程不会把有意结束的进程当作异常退出 """
+        with self.process_lock:
+            self.mineflayer.close()   # run 时重新启动写日志的线程
+            if self.restart_delay and not mc_utils.is_replaying():
+                time.sleep(self.restart_delay)
+
+            return self.check_process(reason=None)
+
+    def restart_bot(self):
+        """ 进程保持运行, /start 断开旧 bot 并按 reset_options 重新连接; 已上传的技能仍然有效 """
+        res = self.post("/start", self.reset_options, timeout=self.request_timeout)
+        if res.status_code != 200:
+            raise RuntimeError(f"Minecraft server reply with code {res.status_code}")
+
+        return mc_utils.EventList(mc_utils.json_loads_fast(res.content))
+
+    def build_reset_options(self, options):
         if options is None:
             options = {}
 
         if options.get("inventory", {}) and options.get("mode", "hard") != "hard":
             raise RuntimeError("inventory can only be set when options is hard")
 
-        self.reset_options = {
+        return {
             "port": self.mc_port,
+            "username": self.bot_username,
             "reset": options.get("mode", "hard"),
             "inventory": options.get("inventory", {}),
             "equipment": options.get("equipment", []),
@@ -115,34 +432,22 @@ class LLM4MCEnv(gym.Env):
             "position": options.get("position", None),
         }
 
-        self.unpause()
-        self.mineflayer.stop()
-        time.sleep(1)
-
-        returned_data = self.check_process()
-
-        self.has_reset = True
-        self.connected = True
-        self.reset_options["reset"] = "soft"
-
-        self.pause()
-        return json.loads(returned_data)
-
     def close(self):
         self.unpause()
 
         if self.connected:
-            res = requests.post(f"{self.server}/stop")
+            res = self.post("/stop")
             if res.status_code == 200:
                 self.connected = False
 
-        self.mineflayer.stop()
+        if not self.reuse_process:
+            self.mineflayer.close()
 
         return not self.connected
 
     def pause(self):
         if self.mineflayer.is_running and not self.server_paused:
-            res = requests.post(f"{self.server}/pause")
+            res = self.post("/pause")
             if res.status_code == 200:
                 self.server_paused = True
             else:
@@ -151,7 +456,7 @@ class LLM4MCEnv(gym.Env):
 
     def unpause(self):
         if self.mineflayer.is_running and self.server_paused:
-            res = requests.post(f"{self.server}/pause")
+            res = self.post("/pause")
             if res.status_code == 200:
                 self.server_paused = False
             else:
@@ -1,4 +1,5 @@
 const fs = require("fs");
+const crypto = require("crypto");
 const express = require("express");
 const bodyParser = require("body-parser");
 const mineflayer = require("mineflayer");
@@ -16,6 +17,10 @@ const Chests = require("./lib/observation/chests");
 const { plugin: tool } = require("mineflayer-tool");
 
 let bot = null;
+// start time of the /step being served, reported by /health so a hung step can be detected
+let stepStartedAt = null;
+// content-addressed skill library, uploaded once per process through /skills
+const skillRegistry = {};
 
 const app = express();
 
@@ -29,7 +34,7 @@ app.post("/start", (req, res) => {
     bot = mineflayer.createBot({
         host: "localhost", // minecraft server ip
         port: req.body.port, // minecraft server port
-        username: "bot",
+        username: req.body.username || "bot",
         disableChatSigning: true,
         checkTimeoutInterval: 60 * 60 * 1000,
     });
@@ -127,7 +132,8 @@ app.post("/start", (req, res) => {
         }
 
         await bot.waitForTicks(bot.waitTicks * itemTicks);
-        res.json(bot.observe());
+        // observe() already returns a JSON string, send it as is
+        res.type("json").send(bot.observe());
 
         initCounter(bot);
         bot.chat("/gamerule keepInventory true");
@@ -149,18 +155,53 @@ app.post("/start", (req, res) => {
     }
 });
 
+app.post("/skills", (req, res) => {
+    const { hash, programs } = req.body;
+    if (!hash || typeof programs !== "string") {
+        res.status(400).json({ error: "hash and programs are required" });
+        return;
+    }
+    const digest = crypto.createHash("sha256").update(programs).digest("hex");
+    if (digest !== hash) {
+        res.status(400).json({ error: "Skill hash mismatch" });
+        return;
+    }
+    skillRegistry[hash] = programs;
+    res.json({ message: "Success", hash: hash });
+});
+
 app.post("/step", async (req, res) => {
+    // resolve registered skills before touching the bot
+    let programs = req.body.programs || "";
+    if (req.body.skills) {
+        if (!(req.body.skills in skillRegistry)) {
+            res.status(409).json({ error: "Unknown skills" });
+            return;
+        }
+        programs = skillRegistry[req.body.skills];
+    }
+    stepStartedAt = Date.now();
+
     // import useful package
     let response_sent = false;
     function otherError(err) {
         console.log("Uncaught Error");
         bot.emit("error", handleError(err));
-        bot.waitForTicks(bot.waitTicks).then(() => {
-            if (!response_sent) {
-                response_sent = true;
-                res.json(bot.observe());
-            }
-        });
+        bot.waitForTicks(bot.waitTicks).then(sendObservation);
+    }
+
+    // observe first, then toggle pause back on within the same round trip if asked to
+    async function sendObservation() {
+        if (response_sent) return;
+        response_sent = true;
+        stepStartedAt = null;
+        const observation = bot.observe();
+        bot.observeOptions = {};
+        if (req.body.pause) {
+            bot.chat("/pause");
+            await bot.waitForTicks(bot.waitTicks);
+        }
+        res.type("json").send(observation);
     }
 
     process.on("uncaughtException", otherError);
@@ -233,8 +274,15 @@ app.post("/step", async (req, res) => {
 
     // Retrieve array form post bod
     const code = req.body.code;
-    const programs = req.body.programs;
     bot.cumulativeObs = [];
+    bot.observeOptions = {
+        events: req.body.events || null,
+        fields: req.body.fields || null,
+        delta: req.body.delta || null,
+    };
+    if (req.body.unpause) {
+        bot.chat("/pause");
+    }
     await bot.waitForTicks(bot.waitTicks);
     const r = await evaluateCode(code, programs);
     process.off("uncaughtException", otherError);
@@ -242,12 +290,13 @@ app.post("/step", async (req, res) => {
         bot.emit("error", handleError(r));
     }
     await returnItems();
+    // wait until pending digging, pathfinding and item pickups are done
+    if (req.body.settle) {
+        await waitUntilSettled(req.body.settle);
+    }
     // wait for last message
     await bot.waitForTicks(bot.waitTicks);
-    if (!response_sent) {
-        response_sent = true;
-        res.json(bot.observe());
-    }
+    await sendObservation();
     bot.removeListener("physicTick", onTick);
 
     async function evaluateCode(code, programs) {
@@ -260,6 +309,37 @@ app.post("/step", async (req, res) => {
         }
     }
 
+    function inventorySignature() {
+        return bot.inventory
+            .items()
+            .map((item) => `${item.name}:${item.count}`)
+            .join(",");
+    }
+
+    function isBusy() {
+        if (bot.pathfinder.isMoving() || bot.targetDigBlock) return true;
+        // dropped items close enough to be picked up in the next ticks
+        return Object.values(bot.entities).some(
+            (entity) =>
+                entity.name === "item" &&
+                entity.position.distanceTo(bot.entity.position) < 2
+        );
+    }
+
+    async function waitUntilSettled(settle) {
+        const maxTicks = settle.maxTicks || 100;
+        const stableTicks = settle.stableTicks || 5;
+        let signature = inventorySignature();
+        let stable = 0;
+        for (let tick = 0; tick < maxTicks && stable < stableTicks; tick++) {
+            await bot.waitForTicks(1);
+            const current = inventorySignature();
+            stable = isBusy() || current !== signature ? 0 : stable + 1;
+            signature = current;
+        }
+        return stable >= stableTicks;
+    }
+
     function onStuck(posThreshold) {
         const currentPos = bot.entity.position;
         bot.stuckPosList.push(currentPos);
@@ -399,12 +479,30 @@ app.post("/step", async (req, res) => {
 });
 
 app.post("/stop", (req, res) => {
-    bot.end();
+    // the process may be kept for the next /start (reuse_process), so drop the ended bot
+    if (bot) bot.end();
+    bot = null;
     res.json({
         message: "Bot stopped",
     });
 });
 
+// observation only: no code is run and the pause state is left untouched
+app.post("/observe", (req, res) => {
+    if (!bot) {
+        res.status(400).json({ error: "Bot not spawned" });
+        return;
+    }
+    bot.observeOptions = {
+        events: req.body.events || null,
+        fields: req.body.fields || null,
+        delta: req.body.delta || null,
+    };
+    const observation = bot.observe();
+    bot.observeOptions = {};
+    res.type("json").send(observation);
+});
+
 app.post("/pause", (req, res) => {
     if (!bot) {
         res.status(400).json({ error: "Bot not spawned" });
@@ -416,6 +514,16 @@ app.post("/pause", (req, res) => {
     });
 });
 
+// heartbeat for the supervisor: answered from the event loop, so a blocked loop shows up as a timeout
+app.get("/health", (req, res) => {
+    res.json({
+        bot: bot !== null,
+        spawned: Boolean(bot && bot.entity),
+        stepMs: stepStartedAt === null ? null : Date.now() - stepStartedAt,
+        uptime: process.uptime(),
+    });
+});
+
 // Server listening to PORT 3000
 
 const DEFAULT_PORT = 3000;
@@ -1,3 +1,5 @@
+const { encodeDelta } = require("./delta");
+
 class Observation {
     constructor(bot) {
         if (new.target === Observation) {
@@ -21,13 +23,22 @@ function inject(bot, obs_list) {
     bot.obsList = [];
     bot.cumulativeObs = [];
     bot.eventMemory = {};
+    // optional projection set by /step: {events: [event names], fields: [observation names], delta: {ack}}
+    bot.observeOptions = {};
     obs_list.forEach((obs) => {
         bot.obsList.push(new obs(bot));
     });
     bot.event = function (event_name) {
+        const { events, fields } = bot.observeOptions;
+        if (events && event_name !== "observe" && !events.includes(event_name)) {
+            return;
+        }
         let result = {};
         bot.obsList.forEach((obs) => {
-            if (obs.name.startsWith("on") && obs.name !== event_name) {
+            if (obs.name.startsWith("on")) {
+                if (obs.name !== event_name) return;
+            } else if (fields && !fields.includes(obs.name)) {
+                // not requested, skip computing it
                 return;
             }
             result[obs.name] = obs.observe();
@@ -36,8 +47,11 @@ function inject(bot, obs_list) {
     };
     bot.observe = function () {
         bot.event("observe");
-        const result = bot.cumulativeObs;
+        let result = bot.cumulativeObs;
         bot.cumulativeObs = [];
+        if (bot.observeOptions.delta) {
+            result = encodeDelta(bot, result, bot.observeOptions.delta.ack);
+        }
         return JSON.stringify(result);
     };
 }
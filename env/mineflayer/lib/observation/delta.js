@@ -0,0 +1,85 @@
+// delta observations: only what changed since the snapshot the client acknowledged
+
+// observations holding a set of block names, diffed as added / removed names
+const SET_FIELDS = ["voxels", "blockRecords"];
+
+function isObject(value) {
+    return value !== null && typeof value === "object" && !Array.isArray(value);
+}
+
+function diffSet(prev, cur) {
+    const prevSet = new Set(prev);
+    const curSet = new Set(cur);
+    return {
+        $add: cur.filter((name) => !prevSet.has(name)),
+        $del: prev.filter((name) => !curSet.has(name)),
+    };
+}
+
+// changed keys of cur, nested objects diffed recursively, removed keys listed in $del
+function diffObject(prev, cur) {
+    const diff = {};
+    for (const key of Object.keys(cur)) {
+        const before = prev[key];
+        const after = cur[key];
+        if (isObject(before) && isObject(after)) {
+            const nested = diffObject(before, after);
+            if (Object.keys(nested).length) diff[key] = nested;
+        } else if (JSON.stringify(before) !== JSON.stringify(after)) {
+            diff[key] = after;
+        }
+    }
+    const removed = Object.keys(prev).filter((key) => !(key in cur));
+    if (removed.length) diff.$del = removed;
+    return diff;
+}
+
+function diffObservation(prev, cur) {
+    const diff = {};
+    for (const key of Object.keys(cur)) {
+        if (!(key in prev)) {
+            diff[key] = cur[key];
+        } else if (SET_FIELDS.includes(key)) {
+            const changes = diffSet(prev[key], cur[key]);
+            if (changes.$add.length || changes.$del.length) diff[key] = changes;
+        } else if (isObject(prev[key]) && isObject(cur[key])) {
+            const changes = diffObject(prev[key], cur[key]);
+            if (Object.keys(changes).length) diff[key] = changes;
+        } else if (JSON.stringify(prev[key]) !== JSON.stringify(cur[key])) {
+            diff[key] = cur[key];
+        }
+    }
+    // top-level observations no longer present (e.g. a narrower fields projection, an event-only key like onChat)
+    const removed = Object.keys(prev).filter((key) => !(key in cur));
+    if (removed.length) diff.$del = removed;
+    return diff;
+}
+
+// replace every event's observation with a delta against the one before it, the first against
+// the acknowledged snapshot; if the client is out of sync the first is sent in full instead.
+// each event gets its own sequence number, the client applies them in order
+function encodeDelta(bot, events, ack) {
+    let state = bot.deltaState;
+    let synced = state && ack === state.seq;
+
+    for (const event of events) {
+        // round trip through JSON so the snapshot holds plain values (Vec3 -> {x, y, z})
+        const observation = JSON.parse(JSON.stringify(event[1]));
+        const seq = state ? state.seq + 1 : 1;
+
+        if (synced) {
+            event[1] = Object.assign(
+                { $seq: seq, $base: state.seq },
+                diffObservation(state.snapshot, observation)
+            );
+        } else {
+            event[1] = Object.assign({ $seq: seq, $base: null }, observation);
+        }
+        state = { seq: seq, snapshot: observation };
+        synced = true;
+    }
+    bot.deltaState = state;
+    return events;
+}
+
+module.exports = { diffObservation, encodeDelta };
@@ -2,15 +2,35 @@
 
 import re
 import time
+import queue
 import psutil
 import logging
 import warnings
 import threading
 import subprocess
+from collections import deque
+from logging.handlers import QueueHandler, QueueListener
 
 import llm4mc.utils as mc_utils
 
 
+class DroppingQueueHandler(QueueHandler):
+    def __init__(self, log_queue):
+        """ 队列满时丢弃日志并计数, 不阻塞读取子进程输出的线程 """
+        super().__init__(log_queue)
+        self.dropped = 0
+
+    def prepare(self, record):
+        # 子进程输出没有格式化参数, 交给写日志的线程格式化
+        return record
+
+    def enqueue(self, record):
+        try:
+            self.queue.put_nowait(record)
+        except queue.Full:
+            self.dropped += 1
+
+
 class SubprocessMonitor:
     def __init__(
             self,
@@ -20,8 +40,21 @@ class SubprocessMonitor:
             log_path="logs",
             callback_match=r"^(?!x)x$",
             callback=None,
-            finished_callback=None
+            finished_callback=None,
+            log_queue_size=10000,
+            ring_size=200
     ):
+        """ 启动并监控子进程, 读取其输出
+
+        输出的每一行写入内存中的环形缓冲区 (最近 ring_size 行, 用于崩溃诊断), 并经由有界队列交给
+        后台线程写入日志文件; 磁盘较慢时丢弃日志而不是阻塞读取, 避免子进程的 stdout 管道写满
+
+        写日志的线程在 run 时启动, close 时停止并移除 logger 上的 handler; close 之后可以再次 run,
+        日志继续追加到同一个文件
+
+        :param log_queue_size: 等待写入日志文件的最大行数
+        :param ring_size: 环形缓冲区保存的行数
+        """
         self.name = name
         self.callback = callback
         self.commands = commands
@@ -29,19 +62,22 @@ class SubprocessMonitor:
         self.callback_match = callback_match
         self.finished_callback = finished_callback
 
+        self.ready_pattern = re.compile(ready_match)
+        self.callback_pattern = re.compile(callback_match) if callback is not None else None
+
         self.logger = logging.getLogger(name)
         start_time = time.strftime("%Y%m%d_%H%M%S")
 
-        handler = logging.FileHandler(mc_utils.f_join(log_path, f"{start_time}.log"))
-
-        formatter = logging.Formatter("%(asctime)s - %(name)s - %(levelname)s - %(message)s")
-
-        handler.setFormatter(formatter)
-
-        self.logger.addHandler(handler)
+        self.log_file = mc_utils.f_join(log_path, f"{start_time}.log")
+        self.log_handler = DroppingQueueHandler(queue.Queue(maxsize=log_queue_size))
+        self.log_listener = None
 
         self.logger.setLevel(logging.INFO)
 
+        self.recent = deque(maxlen=ring_size)
+        self.ring_dropped = 0   # 被挤出环形缓冲区的行数
+        self.lines = 0
+
         self.thread = None
         self.process = None
         self.ready_line = None
@@ -54,29 +90,58 @@ class SubprocessMonitor:
             self.commands,
             stdout=subprocess.PIPE,
             stderr=subprocess.STDOUT,
-            universal_newlines=True,
         )
         print(f"Subprocess {self.name} started with PID {self.process.pid}.")
 
-        for line in iter(self.process.stdout.readline, ""):
-            self.logger.info(line.strip())
+        ready_event = self.ready_event
+        recent = self.recent
+        callback_pattern = self.callback_pattern
+
+        for raw_line in iter(self.process.stdout.readline, b""):
+            line = raw_line.decode("utf-8", errors="replace").rstrip()
+
+            if len(recent) == recent.maxlen:
+                self.ring_dropped += 1
+            recent.append(line)
+            self.lines += 1
+
+            self.logger.info(line)
 
-            if re.search(self.ready_match, line):
+            if not ready_event.is_set() and self.ready_pattern.search(line):   # 就绪后不再匹配
                 self.ready_line = line
                 self.logger.info("Subprocess is ready.")
-                self.ready_event.set()
+                ready_event.set()
 
-            if re.search(self.callback_match, line):
+            if callback_pattern is not None and callback_pattern.search(line):
                 self.callback()
 
-        if not self.ready_event.is_set():
-            self.ready_event.set()
-            warnings.warn(f"Subprocess {self.name} failed to start.")
+        if not ready_event.is_set():
+            ready_event.set()
+            tail = "\n".join(list(recent)[-20:])
+            warnings.warn(f"Subprocess {self.name} failed to start. Last output:\n{tail}")
 
         if self.finished_callback:
             self.finished_callback()
 
+    def open_log(self):
+        """ 启动写日志的线程, 已启动时不做任何事 """
+        if self.log_listener is not None:
+            return
+
+        handler = logging.FileHandler(self.log_file)
+
+        formatter = logging.Formatter("%(asctime)s - %(name)s - %(levelname)s - %(message)s")
+
+        handler.setFormatter(formatter)
+
+        self.log_listener = QueueListener(self.log_handler.queue, handler)
+        self.log_listener.start()
+
+        self.logger.addHandler(self.log_handler)
+
     def run(self):
+        self.open_log()
+
         self.ready_event = threading.Event()
         self.ready_line = None
 
@@ -91,8 +156,56 @@ class SubprocessMonitor:
             self.process.terminate()
             self.process.wait()
 
+    def close(self):
+        """ 停止子进程, 把队列中剩余的日志写入文件, 并停止写日志的线程 """
+        self.stop()
+        if self.log_listener is None:
+            return
+
+        self.logger.removeHandler(self.log_handler)
+        self.log_listener.stop()
+        for handler in self.log_listener.handlers:
+            handler.close()
+        self.log_listener = None
+
     @property
     def is_running(self):
         if self.process is None:
             return False
         return self.process.is_running()
+
+    def recent_lines(self, n=None):
+        """ 环形缓冲区中最近的 n 行输出, 默认全部 """
+        lines = list(self.recent)
+
+        return lines if n is None else lines[-n:]
+
+    def stats(self):
+        return {
+            "lines": self.lines,
+            "log_dropped": self.log_handler.dropped,
+            "ring_dropped": self.ring_dropped,
+            "log_pending": self.log_handler.queue.qsize(),
+        }
+
+
+class ReplayedProcess:
+    def __init__(self, name="mineflayer"):
+        """ 回放模式下代替 SubprocessMonitor, 不启动 node 进程, 请求的响应来自记录 """
+        self.name = name
+        self.running = False
+        self.ready_line = None
+
+    def run(self):
+        self.running = True
+        self.ready_line = f"Subprocess {self.name} replayed from recording"
+
+    def stop(self):
+        self.running = False
+
+    def close(self):
+        self.stop()
+
+    @property
+    def is_running(self):
+        return self.running
@@ -0,0 +1,28 @@
+import hashlib
+
+
+class SkillRegistry:
+    def __init__(self):
+        self.hashes = {}       # 技能库源码 -> 内容哈希
+        self.programs = {}     # 内容哈希 -> 技能库源码
+        self.uploaded = set()  # 当前 mineflayer 进程中已经注册过的哈希
+
+    def register(self, programs):
+        skill_hash = self.hashes.get(programs)
+
+        if skill_hash is None:
+            skill_hash = hashlib.sha256(programs.encode("utf-8")).hexdigest()
+            self.hashes[programs] = skill_hash
+            self.programs[skill_hash] = programs
+
+        return skill_hash
+
+    def is_uploaded(self, skill_hash):
+        return skill_hash in self.uploaded
+
+    def mark_uploaded(self, skill_hash):
+        self.uploaded.add(skill_hash)
+
+    def invalidate(self):
+        # mineflayer 进程重启后, 服务端的注册表随之清空
+        self.uploaded.clear()
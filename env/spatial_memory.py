@@ -0,0 +1,222 @@
+""" sparse memory of where blocks were observed, kept across tasks in the same world """
+
+import math
+from collections import OrderedDict
+
+import llm4mc.utils as mc_utils
+
+# 水平方向的相邻格子
+NEIGHBORS = ((1, 0), (-1, 0), (0, 1), (0, -1))
+
+
+class SpatialMemory:
+    def __init__(self, cell_size=16, max_cells=4096, search_radius=8):
+        """ 按格子 (默认 16 x 16 x 16, 与区块相同) 记录每次观测中 voxels 里的方块以及看到它们时 bot 的位置
+
+        voxels 只包含 bot 周围 (8, 2, 8) 范围内的方块名, 没有坐标, 因此记录的位置是 "在这里能看到该方块" 的位置,
+        寻路到该位置后 mineBlock / exploreAndMine 就能找到方块
+
+        :param cell_size: 格子边长
+        :param max_cells: 最多记住的格子数, 超出后丢弃最久没有经过的格子, 丢弃的格子回到未探索的边界中
+        :param search_radius: 查询时按环逐圈搜索的最大半径 (格子数), 超出后退回遍历索引
+        """
+        self.cell_size = cell_size
+        self.max_cells = max_cells
+        self.search_radius = search_radius
+
+        self.cells = OrderedDict()     # 格子 -> {方块名: [x, y, z]}, 按最近经过的顺序
+        self.index = {}                # 方块名 -> 记录了它的格子集合
+        self.frontier = OrderedDict()  # 与经过的格子水平相邻、但还没有经过的格子
+
+        self.updates = 0
+        self.evictions = 0
+
+    def cell_of(self, position):
+        return tuple(math.floor(position[axis] / self.cell_size) for axis in "xyz")
+
+    def update(self, voxels, position):
+        """ 记录一次观测
+
+        :param voxels: 观测中的 voxels
+        :param position: 观测中 status 的 position
+        """
+        key = self.cell_of(position)
+        point = [round(position[axis]) for axis in "xyz"]
+
+        cell = self.cells.get(key)
+        if cell is None:
+            cell = self.cells[key] = {}
+        self.cells.move_to_end(key)
+
+        for name in voxels:
+            cell[name] = point
+            self.index.setdefault(name, set()).add(key)
+
+        self.frontier.pop(key, None)
+        for dx, dz in NEIGHBORS:
+            neighbor = (key[0] + dx, key[1], key[2] + dz)
+            if neighbor not in self.cells:
+                self.frontier[neighbor] = None
+                self.frontier.move_to_end(neighbor)
+
+        self.updates += 1
+        self._evict()
+
+    def observe(self, event):
+        """ 记录 observe 事件, 缺少 voxels 或位置 (observe_fields 中没有) 时忽略 """
+        position = event.get("status", {}).get("position")
+        if position and "voxels" in event:
+            self.update(event["voxels"], position)
+
+    def _evict(self):
+        while len(self.cells) > self.max_cells:
+            key, cell = self.cells.popitem(last=False)
+            for name in cell:
+                keys = self.index[name]
+                keys.discard(key)
+                if not keys:
+                    del self.index[name]
+            self.frontier[key] = None   # 忘记了格子里有什么, 重新当作未探索的格子
+            self.evictions += 1
+
+        while len(self.frontier) > 4 * self.max_cells:
+            self.frontier.popitem(last=False)
+
+    def forget(self, name, position):
+        """ 到达记录的位置后没有找到方块 (已被挖掉), 删除这条记录 """
+        key = self.cell_of(position)
+        cell = self.cells.get(key)
+        if cell is None or cell.pop(name, None) is None:
+            return
+
+        keys = self.index[name]
+        keys.discard(key)
+        if not keys:
+            del self.index[name]
+
+    def _rings(self, center):
+        """ 从 center 所在格子开始, 按水平方向的环由近到远产生格子, 每个位置同时包括上下相邻的一层 """
+        cx, cy, cz = center
+        for radius in range(self.search_radius + 1):
+            ring = []
+            for dx in range(-radius, radius + 1):
+                for dz in range(-radius, radius + 1):
+                    if max(abs(dx), abs(dz)) == radius:
+                        ring.extend((cx + dx, cy + dy, cz + dz) for dy in (0, -1, 1))
+            yield ring
+
+    def _nearest(self, keys, contains, position):
+        """ 逐圈搜索 contains(格子) 为真的格子; 第一次命中后再多搜一圈, 环是方形的, 外圈可能更近
+
+        候选格子比搜索范围内的格子还少时直接返回全部候选, 查询耗时不超过 min(候选数, 搜索范围)
+        """
+        if len(keys) <= 3 * (2 * self.search_radius + 1) ** 2:
+            return list(keys)
+
+        found = []
+        hit_radius = None
+        for radius, ring in enumerate(self._rings(self.cell_of(position))):
+            found.extend(key for key in ring if contains(key))
+            if found and hit_radius is None:
+                hit_radius = radius
+            if hit_radius is not None and radius > hit_radius:
+                break
+
+        if not found:   # 附近没有, 遍历全部
+            found = list(keys)
+
+        return found
+
+    def nearest(self, names, position):
+        """ 离 position 最近的已知方块
+
+        :param names: 可以互相代替的方块名
+        :return: (方块名, [x, y, z]), 都没有记录时为 None
+        """
+        names = [name for name in names if name in self.index]
+        if not names:
+            return None
+
+        keys = set().union(*(self.index[name] for name in names))
+        best = None
+        for key in self._nearest(keys, keys.__contains__, position):
+            for name in names:
+                point = self.cells[key].get(name)
+                if point is None:
+                    continue
+
+                distance = math.dist(point, [position[axis] for axis in "xyz"])
+                if best is None or distance < best[0]:
+                    best = (distance, name, point)
+
+        return None if best is None else (best[1], best[2])
+
+    def nearest_frontier(self, position):
+        """ 离 position 最近的还没有经过的格子, 返回格子中心 [x, y, z], 没有时为 None """
+        if not self.frontier:
+            return None
+
+        keys = self._nearest(self.frontier, self.frontier.__contains__, position)
+        key = min(keys, key=lambda k: math.dist(self.center_of(k), [position[axis] for axis in "xyz"]))
+
+        return self.center_of(key)
+
+    def frontier_direction(self, position):
+        """ 朝最近的未探索格子的 exploreUntil 方向, 如 (1, 0, -1), 没有时为 None """
+        target = self.nearest_frontier(position)
+        if target is None:
+            return None
+
+        dx = target[0] - position["x"]
+        dz = target[2] - position["z"]
+        direction = (int(math.copysign(1, dx)) if abs(dx) >= self.cell_size / 2 else 0, 0,
+                     int(math.copysign(1, dz)) if abs(dz) >= self.cell_size / 2 else 0)
+
+        return direction if direction != (0, 0, 0) else None
+
+    def center_of(self, key):
+        return [(axis + 0.5) * self.cell_size for axis in key]
+
+    def to_dict(self):
+        return {
+            "cell_size": self.cell_size,
+            "cells": [[list(key), cell] for key, cell in self.cells.items()],
+            "frontier": [list(key) for key in self.frontier],
+        }
+
+    @classmethod
+    def from_dict(cls, data, **kwargs):
+        memory = cls(**dict(kwargs, cell_size=data["cell_size"]))   # 保存的格子按原来的边长划分
+        for key, cell in data["cells"]:   # 按保存的顺序恢复, 最久没有经过的格子在前
+            key = tuple(key)
+            memory.cells[key] = cell
+            for name in cell:
+                memory.index.setdefault(name, set()).add(key)
+        for key in data["frontier"]:
+            memory.frontier[tuple(key)] = None
+
+        memory._evict()
+
+        return memory
+
+    def save(self, path):
+        if mc_utils.get_dir(path):
+            mc_utils.f_mkdir_in_path(path)
+        mc_utils.json_dump(self.to_dict(), path)
+
+    @classmethod
+    def load(cls, path, **kwargs):
+        """ 从 save 保存的文件恢复, 文件不存在时返回空的记忆 """
+        if not mc_utils.f_exists(path):
+            return cls(**kwargs)
+
+        return cls.from_dict(mc_utils.json_load(path), **kwargs)
+
+    def stats(self):
+        return {
+            "cells": len(self.cells),
+            "frontier": len(self.frontier),
+            "names": len(self.index),
+            "updates": self.updates,
+            "evictions": self.evictions,
+        }
@@ -0,0 +1,183 @@
+import time
+import threading
+from collections import deque
+
+import requests
+
+
+def backoff_delay(attempt, base=0.5, cap=30.0):
+    """ 第 attempt 次 (从 1 开始) 重试前的等待时间: base * 2^(attempt - 1), 不超过 cap """
+    return min(cap, base * 2 ** (attempt - 1))
+
+
+class RestartBudgetExceeded(RuntimeError):
+    pass
+
+
+class ProcessSupervisor:
+    # 出现一次即重启的原因, 其余 (连接失败、状态码异常) 连续 failure_threshold 次才重启
+    FATAL_REASONS = ("exited", "step hung")
+
+    def __init__(
+            self,
+            env,
+            interval=5.0,
+            probe_timeout=2.0,
+            failure_threshold=2,
+            step_timeout=None,
+            restart_budget=5,
+            budget_window=3600
+    ):
+        """ 在后台线程中定期探测 mineflayer 进程的 /health, 进程退出、无响应或 /step 卡住时主动重启,
+        并按 env.reset_options 重新发送 /start, 不再等到下一次 step 或 request_timeout 才发现
+
+        :param env: LLM4MCEnv
+        :param interval: 心跳间隔 (秒)
+        :param probe_timeout: 单次 /health 的超时 (秒)
+        :param failure_threshold: 连续多少次探测失败后重启
+        :param step_timeout: 一次 /step 执行超过该时长 (秒) 视为 bot 卡住, None 为不检查
+        :param restart_budget: budget_window 秒内最多重启的次数, 超出后放弃并在下一次请求时抛出 RestartBudgetExceeded
+        :param budget_window: 重启预算的时间窗口 (秒)
+        """
+        self.env = env
+        self.interval = interval
+        self.probe_timeout = probe_timeout
+        self.failure_threshold = failure_threshold
+        self.step_timeout = step_timeout
+        self.restart_budget = restart_budget
+        self.budget_window = budget_window
+
+        self.session = requests.Session()   # 与 env.session 分开, 心跳不占用 step 的连接
+        self.restart_times = deque()        # 时间窗口内各次重启的时间
+        self.recoveries = []                # 每次恢复的原因与耗时
+
+        self.probes = 0
+        self.probe_failures = 0
+        self.consecutive_failures = 0
+        self.first_failure = None   # 本轮连续失败中第一次失败的时间
+        self.last_healthy = None
+        self.exhausted = False
+
+        self.stop_event = threading.Event()
+        self.thread = None
+
+    def start(self):
+        if self.thread is not None and self.thread.is_alive():
+            return
+
+        self.stop_event.clear()
+        self.thread = threading.Thread(target=self._run, name="mineflayer-supervisor", daemon=True)
+        self.thread.start()
+
+    def stop(self):
+        self.stop_event.set()
+        if self.thread is not None and self.thread is not threading.current_thread():
+            self.thread.join()
+        self.session.close()
+
+    def _run(self):
+        while not self.stop_event.wait(self.interval):
+            # reset 之前与 close 之后进程本来就不需要运行
+            if not self.env.has_reset or not self.env.connected or self.exhausted:
+                continue
+
+            reason = self.probe()
+            if reason is None:
+                self.consecutive_failures = 0
+                self.first_failure = None
+                continue
+
+            self.probe_failures += 1
+            self.consecutive_failures += 1
+            if self.first_failure is None:
+                self.first_failure = time.monotonic()
+
+            if reason in self.FATAL_REASONS or self.consecutive_failures >= self.failure_threshold:
+                try:
+                    self.recover(reason, detected_at=self.first_failure)
+                except Exception as e:   # 恢复失败时留给下一次心跳或调用方线程的 check_process
+                    print(f"Failed to recover mineflayer process: {e}")
+
+    def probe(self):
+        """ 探测一次进程状态
+
+        :return: None 表示健康, 否则为不健康的原因
+        """
+        self.probes += 1
+
+        if not self.env.mineflayer.is_running:
+            return "exited"
+
+        try:
+            res = self.session.get(f"{self.env.server}/health", timeout=self.probe_timeout)
+        except requests.RequestException as e:
+            return f"unreachable ({e.__class__.__name__})"
+        if res.status_code != 200:
+            return f"health status {res.status_code}"
+
+        health = res.json()
+        step_ms = health.get("stepMs")
+        if self.step_timeout is not None and step_ms is not None and step_ms > self.step_timeout * 1000:
+            return "step hung"
+
+        self.last_healthy = time.monotonic()
+        return None
+
+    def recover(self, reason, detected_at=None):
+        """ 结束当前进程并通过 env.check_process 重启, 调用方线程中阻塞的请求会因连接断开立即返回
+
+        :return: /start 返回的事件列表, 已被其他线程恢复时为 None
+        """
+        env = self.env
+        with env.process_lock:
+            if not env.connected:
+                return None
+            if self.probe() is None:   # 等锁期间已被其他线程恢复
+                return None
+
+            print(f"Mineflayer process is unhealthy ({reason}), restarting")
+            env.mineflayer.stop()
+
+            return env.check_process(reason=reason, detected_at=detected_at)
+
+    def take_restart(self, reason):
+        """ 每次重启前调用, 超出预算时抛出 RestartBudgetExceeded """
+        now = time.monotonic()
+        while self.restart_times and now - self.restart_times[0] > self.budget_window:
+            self.restart_times.popleft()
+
+        if len(self.restart_times) >= self.restart_budget:
+            self.exhausted = True
+            raise RestartBudgetExceeded(
+                f"Mineflayer restarted {len(self.restart_times)} times in {self.budget_window}s, giving up ({reason})"
+            )
+
+        self.restart_times.append(now)
+
+    def record_recovery(self, reason, detected_at, attempts):
+        """ 记录一次恢复, time_to_recover 从第一次发现异常到新 bot 的 /start 返回 """
+        recovered_at = time.monotonic()
+        self.recoveries.append({
+            "reason": reason,
+            "attempts": attempts,
+            "time_to_recover": recovered_at - detected_at,
+            "downtime": recovered_at - self.last_healthy if self.last_healthy is not None else None,
+        })
+
+        self.consecutive_failures = 0
+        self.first_failure = None
+        self.last_healthy = recovered_at
+
+    def stats(self):
+        recover_times = [r["time_to_recover"] for r in self.recoveries]
+
+        return {
+            "probes": self.probes,
+            "probe_failures": self.probe_failures,
+            "recoveries": len(self.recoveries),
+            "restarts_in_window": len(self.restart_times),
+            "exhausted": self.exhausted,
+            "mean_time_to_recover": sum(recover_times) / len(recover_times) if recover_times else None,
+            "max_time_to_recover": max(recover_times) if recover_times else None,
+            "last_recoveries": self.recoveries[-5:],
+        }
@@ -0,0 +1,82 @@
+""" client-side mirror of the observation, rebuilt from delta observations """
+
+
+class SequenceGapError(RuntimeError):
+    pass
+
+
+class WorldState:
+    def __init__(self):
+        """ 保存最近一次完整的 observe 观测, 服务端开启 delta 模式后只发送变化的部分 """
+        self.seq = None
+        self.observation = None
+
+        self.full_updates = 0
+        self.delta_updates = 0
+
+    def reset(self):
+        """ 服务端重启或环境重置后调用, 下一次请求会拿到完整观测 """
+        self.seq = None
+        self.observation = None
+
+    @staticmethod
+    def apply_set(names, changes):
+        removed = set(changes.get("$del", []))
+        names = [name for name in names if name not in removed]
+
+        return names + [name for name in changes.get("$add", []) if name not in names]
+
+    @classmethod
+    def apply_diff(cls, target, diff):
+        """ 返回应用 diff 之后的新字典, 只复制 diff 涉及的部分, 没有变化的部分与 target 共用, target 不被修改 """
+        result = dict(target)
+        for key in diff.get("$del", []):
+            result.pop(key, None)
+
+        for key, value in diff.items():
+            if key == "$del":
+                continue
+
+            current = result.get(key)
+            if isinstance(current, list) and isinstance(value, dict):   # voxels 等集合字段
+                result[key] = cls.apply_set(current, value)
+            elif isinstance(current, dict) and isinstance(value, dict):
+                result[key] = cls.apply_diff(current, value)
+            else:
+                result[key] = value
+
+        return result
+
+    def apply(self, event):
+        """ 用服务端发来的 observe 事件更新镜像
+
+        :param event: 带 $seq / $base 的 observe 事件, $base 为 None 表示完整观测
+        :return: 完整观测, 与镜像以及之前返回的观测共用没有变化的部分, 只读, 与 observe() 缓存的事件列表一样
+        """
+        event = dict(event)
+        seq, base = event.pop("$seq"), event.pop("$base")
+
+        if base is None:
+            self.observation = event
+            self.full_updates += 1
+        elif base != self.seq or self.observation is None:
+            message = f"Delta based on {base}, mirror is at {self.seq}"
+            self.reset()
+            raise SequenceGapError(message)
+        else:
+            self.observation = self.apply_diff(self.observation, event)
+            self.delta_updates += 1
+
+        self.seq = seq
+
+        return self.observation
+
+    def stats(self):
+        total = self.full_updates + self.delta_updates
+
+        return {
+            "seq": self.seq,
+            "full_updates": self.full_updates,
+            "delta_updates": self.delta_updates,
+            "delta_rate": self.delta_updates / total if total else 0.0,
+        }
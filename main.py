@@ -1,11 +1,17 @@
 # TODO 如果无法摆放工作台或者熔炉怎么移动
 import os
+import json
 import time
 import random
 
-from env import LLM4MCEnv
+from env import LLM4MCEnv, SpatialMemory
 from basic_skills import load_basic_skills
-from agents import ActorAgent, GuideAgent, CriticAgent, CurriculumAgent
+from agents import ActorAgent, GuideAgent, CriticAgent, CurriculumAgent, LlamaBatcher
+# 追踪、记录、词表与线程池都是模块级全局状态, 必须与 env / agents 使用同一个模块 (llm4mc.utils)
+from llm4mc.utils import (
+    ResponseCache, submit_captured, canonical_item_name, Observation,
+    enable_tracing, get_tracer, span, traced, start_recording, start_replay
+)
 
 
 class AgentMC:
@@ -19,6 +25,18 @@ class AgentMC:
             server_port=3000,
             env_wait_ticks=20,
             env_request_timeout=600,
+            env_settle_ticks=100,
+            env_observe_fields=("voxels", "status", "inventory"),
+            env_delta=False,
+            env_reuse_process=False,
+            env_standby_port=None,
+            env_heartbeat_interval=None,
+            env_step_timeout=None,
+            env_restart_budget=5,
+            explore_max_time=60,
+            explore_max_searches=3,
+            spatial_memory=True,
+            spatial_memory_path=None,
             judge_model_name="gpt-4",             # judge agent
             judge_model_temperature=0,
             judge_model_type="baseline",
@@ -34,12 +52,53 @@ class AgentMC:
             curriculum_agent_name="gpt-4",        # curriculum agent
             curriculum_agent_temperature=0.3,
             curriculum_model_type="baseline",
-            openai_api_request_timeout=240
+            openai_api_request_timeout=240,
+            bot_username="bot",
+            env_log_path="./logs",
+            response_cache_path=None,
+            response_cache_size=10000,
+            llama_batch_size=None,
+            llama_batch_wait=0.05,
+            llama_batcher=None,
+            trace_path=None,
+            record_path=None,
+            replay_path=None
     ):
+        # 开启后记录各阶段耗时, close() 时导出到 {trace_path}.jsonl 与 {trace_path}.trace.json
+        self.trace_path = trace_path
+        self.trace_exported = False
+        if trace_path:
+            enable_tracing()
+
+        # 记录所有 LLM 与 mineflayer 请求, 或者从记录回放 (不启动 node, 不访问 LLM); 两者都固定 random 的种子
+        if replay_path:
+            start_replay(replay_path)
+        elif record_path:
+            start_recording(record_path)
+        if replay_path or record_path:
+            random.seed(0)
+
+        # 记录观测到的方块位置, 再次需要同一种方块时直接寻路过去; 给出路径时在 close() 中保存, 同一个世界的任务之间共用
+        self.spatial_memory_path = spatial_memory_path
+        self.spatial_memory = None
+        if spatial_memory:
+            self.spatial_memory = SpatialMemory.load(spatial_memory_path) if spatial_memory_path else SpatialMemory()
+
         self.env = LLM4MCEnv(
             mc_port=mc_port,
             server_port=server_port,
-            request_timeout=env_request_timeout
+            log_path=env_log_path,
+            request_timeout=env_request_timeout,
+            bot_username=bot_username,
+            settle_ticks=env_settle_ticks,
+            observe_fields=env_observe_fields,
+            delta=env_delta,
+            reuse_process=env_reuse_process,
+            standby_port=env_standby_port,
+            heartbeat_interval=env_heartbeat_interval,
+            step_timeout=env_step_timeout,
+            restart_budget=env_restart_budget,
+            spatial_memory=self.spatial_memory
         )
 
         os.environ["OPENAI_API_KEY"] = api_key
@@ -47,6 +106,21 @@ class AgentMC:
 
         self.server = llama_server
 
+        # 可选的磁盘响应缓存, 只给 temperature=0 的确定性 agent 使用
+        self.response_cache = None
+        if response_cache_path:
+            self.response_cache = ResponseCache(path=response_cache_path, max_entries=response_cache_size)
+
+        # 可选的 llama 请求合批; 本 bot 中唯一并发的 llama 请求是推测执行的 curriculum 请求, 批次通常只有 1 个请求,
+        # 同一进程中的多个 AgentMC (WorkerPool 的线程模式) 传入同一个 llama_batcher 时, 不同 bot 的请求才会合成一批
+        self.llama_batcher = llama_batcher
+        if self.llama_batcher is None and llama_batch_size:
+            self.llama_batcher = LlamaBatcher(
+                server=llama_server,
+                max_batch_size=llama_batch_size,
+                max_wait=llama_batch_wait
+            )
+
         self.curriculum_agent = CurriculumAgent(
             llama_server=llama_server,
             model_type=judge_model_type,
@@ -54,32 +128,41 @@ class AgentMC:
             temperature=curriculum_agent_temperature,
             request_timeout=openai_api_request_timeout,
             judge_model_name=judge_model_name,
-            judge_model_temperature=judge_model_temperature
+            judge_model_temperature=judge_model_temperature,
+            judge_response_cache=self.response_cache if judge_model_temperature == 0 else None,
+            llama_batcher=self.llama_batcher
         )
 
         self.actor_agent = ActorAgent(
             llama_server=llama_server,
             baseline_model_name=actor_agent_name,
             temperature=actor_agent_temperature,
-            request_timeout=openai_api_request_timeout
+            request_timeout=openai_api_request_timeout,
+            llama_batcher=self.llama_batcher
         )
 
         self.guide_agent = GuideAgent(
             llama_server=llama_server,
             baseline_model_name=guide_agent_name,
             temperature=guide_agent_temperature,
-            request_timeout=openai_api_request_timeout
+            request_timeout=openai_api_request_timeout,
+            llama_batcher=self.llama_batcher
         )
 
         self.critic_agent = CriticAgent(
             llama_server=llama_server,
             baseline_model_name=critic_agent_name,
             temperature=critic_agent_temperature,
-            request_timeout=openai_api_request_timeout
+            request_timeout=openai_api_request_timeout,
+            response_cache=self.response_cache if critic_agent_temperature == 0 else None,
+            llama_batcher=self.llama_batcher
         )
 
         self.env_wait_ticks = env_wait_ticks
         self.max_attempts = max_attempts
+        # exploreAndMine 每次搜索的最长时间 (秒) 与最多搜索次数, 每次搜索前询问一次 guide
+        self.explore_max_time = explore_max_time
+        self.explore_max_searches = explore_max_searches
         self.basic_skills = load_basic_skills()
 
         self.curriculum_baseline = True if curriculum_model_type.lower() == "baseline" else False
@@ -87,6 +170,7 @@ class AgentMC:
         self.critic_baseline = True if critic_model_type.lower() == "baseline" else False
         self.guide_baseline = True if guide_model_type.lower() == "baseline" else False
 
+    @traced("agent_mc.reset")
     def reset(self, options, reset_env=True):
         if reset_env:
             self.env.reset(options=options)
@@ -95,78 +179,135 @@ class AgentMC:
             "bot.chat(`/time set ${getNextTime()}`);\n bot.chat('/difficulty peaceful');"
         )
 
-    def mine_block(self, task_name, block_name, add, total):
-        final_task = f"Get {total} {task_name}."
-        add_task = ""
-        events = self.env.step("")
+    @traced("agent_mc.verify_task")
+    def verify_task(self, events, final_task):
+        # 背包可以直接判定时不再询问 critic LLM
+        finished = self.critic_agent.verify_locally(events=events, final_task=final_task)
+
+        if finished is None:
+            if self.critic_baseline:
+                response = self.critic_agent.get_gpt4_response(events=events, final_task=final_task)
+            else:
+                response = self.critic_agent.get_llama_sft_response(events=events, final_task=final_task)
+
+            finished = self.critic_agent.process_ai_answer(response)
+
+        return finished
+
+    @traced("agent_mc.check_action")
+    def check_action(self, events, final_task):
+        finished = self.verify_task(events=events, final_task=final_task)
+        add_task = self.critic_agent.summarize_error(events=events)
+
+        return finished, add_task
 
+    @traced("agent_mc.request_curriculum")
+    def request_curriculum(self, events, final_task):
+        if self.curriculum_baseline:
+            return self.curriculum_agent.get_gpt4_response(events=events, final_task=final_task)
+        else:
+            return self.curriculum_agent.get_llama_sft_response(events=events, final_task=final_task)
+
+    @traced("agent_mc.request_guide")
+    def request_guide(self, events, goals):
         if self.guide_baseline:
-            guide_response = self.guide_agent.get_gpt4_response(events=events, goals=block_name)
+            guide_response = self.guide_agent.get_gpt4_response(events=events, goals=goals)
         else:
-            guide_response = self.guide_agent.get_llama_sft_response(events=events, goals=block_name)
+            guide_response = self.guide_agent.get_llama_sft_response(events=events, goals=goals)
 
-        flag, direction, name = self.guide_agent.process_ai_answer(guide_response)
-        guides = 0
+        return self.guide_agent.process_ai_answer(guide_response)
 
-        while guides < 10:  # 挖矿探索次数为10
+    @traced("agent_mc.explore_and_mine")
+    def explore_and_mine(self, goals, block_name, count, final_task):
+        """ guide 只在开始和每次搜索失败后给出方向, 探索到看见目标方块并挖掘在服务端的同一次 step 中完成
 
-            # 方块存在, 可以找到
-            if flag:
-                # 挖掘代码
-                mine_code = f"await mineBlock(bot, '{name}', {add})"
-                code = self.basic_skills + '\n' + mine_code
+        :param goals: 询问 guide 的目标
+        :param block_name: 要挖的方块或要获取的物品, 物品换成掉落它的方块 / 生物, 同类方块 (各种原木、深板岩矿石) 一起搜索
+        :param count: 挖掘数量
+        :param final_task: 用于检查是否完成
+        :return: add_task
+        """
+        add_task = ""
+        events = self.env.observe()
+        recipe_graph = self.curriculum_agent.recipe_graph
+        targets = recipe_graph.search_targets(block_name)
 
-                new_events = self.env.step(code=code)
-                time.sleep(1)
+        # 之前在别处见过且现在看不到: 寻路过去后挖掘, 一次 step 完成, 不询问 guide
+        known = self.recall_block(targets, events)
+        if known is not None:
+            name, point = known
+            goto_code = f"await bot.pathfinder.goto(new GoalNear({point[0]}, {point[1]}, {point[2]}, 2));"
+            mine_code = (f"await exploreAndMine(bot, {json.dumps(targets)}, {count}, "
+                         f"new Vec3{self.explore_direction(events)}, {self.explore_max_time})")
+            events = self.env.step(code=goto_code + "\n" + mine_code, programs=self.basic_skills)
 
-                if self.critic_baseline:
-                    critic_response = self.critic_agent.get_gpt4_response(events=new_events, final_task=final_task)
-                else:
-                    critic_response = self.critic_agent.get_llama_sft_response(events=new_events, final_task=final_task)
+            finished, add_task = self.check_action(events=events, final_task=final_task)
 
-                add_task = self.critic_agent.summarize_error(events=new_events)
+            if finished or add_task:
+                return add_task
+            if name not in Observation.of(events).voxel_set:   # 已经被挖掉了
+                self.spatial_memory.forget(name, point)
 
-                finished = self.critic_agent.process_ai_answer(critic_response)
+        for _ in range(self.explore_max_searches):
+            flag, direction, name = self.request_guide(events=events, goals=goals)
 
-                if finished or add_task:
-                    break
+            candidates = recipe_graph.search_targets(name) if flag else targets
+            if direction is None:   # 目标已在视野内时 exploreAndMine 不会移动, 方向只是占位
+                direction = self.explore_direction(events)
 
-            # 探索代码
-            explore_code = f"await exploreUntil(bot, new Vec3{direction}, 5)"
-            code = self.basic_skills + '\n' + explore_code
+            mine_code = (f"await exploreAndMine(bot, {json.dumps(candidates)}, {count}, "
+                         f"new Vec3{direction}, {self.explore_max_time})")
+            events = self.env.step(code=mine_code, programs=self.basic_skills)
 
-            events = self.env.step(code=code)
+            finished, add_task = self.check_action(events=events, final_task=final_task)
 
-            if self.guide_baseline:
-                guide_response = self.guide_agent.get_gpt4_response(events=events, goals=block_name)
-            else:
-                guide_response = self.guide_agent.get_llama_sft_response(events=events, goals=block_name)
+            if finished or add_task:
+                break
+
+        return add_task
 
-            flag, direction, name = self.guide_agent.process_ai_answer(guide_response)
+    def recall_block(self, candidates, events):
+        """ 空间记忆中离 bot 最近的候选方块, 没有记忆、候选方块就在附近或者没有见过时为 None
 
-            guides += 1
+        :return: (方块名, [x, y, z])
+        """
+        observation = Observation.of(events)
+        if self.spatial_memory is None or not observation.position:
+            return None
+        if observation.voxel_set.intersection(candidates):
+            return None
 
-        return add_task
+        return self.spatial_memory.nearest(candidates, observation.position)
 
-    def craft_without_table(self, task_name, add, total):
+    def explore_direction(self, events):
+        """ 朝最近的未探索区域, 没有空间记忆时使用 random_direction """
+        position = Observation.of(events).position
+        if self.spatial_memory is not None and position:
+            direction = self.spatial_memory.frontier_direction(position)
+            if direction is not None:
+                return direction
+
+        return AgentMC.random_direction()
+
+    @traced("agent_mc.mine_block")
+    def mine_block(self, task_name, block_name, add, total):
         final_task = f"Get {total} {task_name}."
 
-        craft_code = f"await craftItem(bot, '{task_name}', {add})"
+        return self.explore_and_mine(goals=block_name, block_name=block_name, count=add, final_task=final_task)
 
-        code = self.basic_skills + '\n' + craft_code
+    @traced("agent_mc.craft_without_table")
+    def craft_without_table(self, task_name, add, total):
+        final_task = f"Get {total} {task_name}."
 
-        new_events = self.env.step(code=code)
-        time.sleep(1)
+        craft_code = f"await craftItem(bot, '{task_name}', {add})"
 
-        if self.critic_baseline:
-            _ = self.critic_agent.get_gpt4_response(events=new_events, final_task=final_task)
-        else:
-            _ = self.critic_agent.get_llama_sft_response(events=new_events, final_task=final_task)
+        new_events = self.env.step(code=craft_code, programs=self.basic_skills)
 
-        add_task = self.critic_agent.summarize_error(events=new_events)
+        _, add_task = self.check_action(events=new_events, final_task=final_task)
 
         return add_task
 
+    @traced("agent_mc.craft_with_table")
     def craft_with_table(self, task_name, add, total):
         final_task = f"Get {total} {task_name}."
         place_attempts = 0
@@ -176,19 +317,9 @@ class AgentMC:
 
             place_code = "await placeItem(bot, 'crafting_table', bot.entity.position.offset(0, 0, 1))"
             craft_code = f"await craftItem(bot, '{task_name}', {add})"
-            code = self.basic_skills + '\n' + place_code + '\n' + craft_code
-
-            new_events = self.env.step(code=code)
-            time.sleep(1)
+            new_events = self.env.step(code=place_code + '\n' + craft_code, programs=self.basic_skills)
 
-            if self.critic_baseline:
-                critic_response = self.critic_agent.get_gpt4_response(events=new_events, final_task=final_task)
-            else:
-                critic_response = self.critic_agent.get_llama_sft_response(events=new_events, final_task=final_task)
-
-            add_task = self.critic_agent.summarize_error(events=new_events)
-
-            finished = self.critic_agent.process_ai_answer(critic_response)
+            finished, add_task = self.check_action(events=new_events, final_task=final_task)
 
             if finished or add_task:
                 break
@@ -197,12 +328,11 @@ class AgentMC:
 
             direction = AgentMC.random_direction()
             move_code = f"await exploreUntil(bot, new Vec3{direction}, 10)"
-            code = self.basic_skills + '\n' + move_code
-
-            self.env.step(code=code)
+            self.env.step(code=move_code, programs=self.basic_skills)
 
         return add_task
 
+    @traced("agent_mc.smelt_with_furnace")
     def smelt_with_furnace(self, task_name, furn_info, add, total):
         final_task = f"Get {total} {task_name}."
         place_attempts = 0
@@ -219,18 +349,9 @@ class AgentMC:
         while place_attempts < 10:
             place_code = "await placeItem(bot, 'furnace', bot.entity.position.offset(0, 0, 1))"
             smelt_code = f"await smeltItem(bot, '{raw_materials}', '{fuels}', {add})"
-            code = self.basic_skills + '\n' + place_code + '\n' + smelt_code
-
-            new_events = self.env.step(code=code)
-            time.sleep(1)
-
-            if self.critic_baseline:
-                critic_response = self.critic_agent.get_gpt4_response(events=new_events, final_task=final_task)
-            else:
-                critic_response = self.critic_agent.get_llama_sft_response(events=new_events, final_task=final_task)
-            add_task = self.critic_agent.summarize_error(events=new_events)
+            new_events = self.env.step(code=place_code + '\n' + smelt_code, programs=self.basic_skills)
 
-            finished = self.critic_agent.process_ai_answer(critic_response)
+            finished, add_task = self.check_action(events=new_events, final_task=final_task)
 
             if finished:
                 break
@@ -239,12 +360,11 @@ class AgentMC:
 
             direction = AgentMC.random_direction()
             execute_code = f"await exploreUntil(bot, new Vec3{direction}, 10)"
-            code = self.basic_skills + '\n' + execute_code
-
-            self.env.step(code=code)
+            self.env.step(code=execute_code, programs=self.basic_skills)
 
         return add_task
 
+    @traced("agent_mc.collect_action")
     def collect_action(self, requirements, materials):
         add_task = ""
 
@@ -252,66 +372,32 @@ class AgentMC:
             num_in_inventory = materials[item_name]
 
             temp_task = f"Get {item_nums + num_in_inventory} {item_name}."
-            add_task = ""
-
-            events = self.env.step("")
-
-            if self.guide_baseline:
-                guide_response = self.guide_agent.get_gpt4_response(events=events, goals=item_name)
-            else:
-                guide_response = self.guide_agent.get_llama_sft_response(events=events, goals=item_name)
-
-            flag, direction, name = self.guide_agent.process_ai_answer(guide_response)
-            guides = 0
-
-            # 定位、探索
-            while guides < 5:
-                if flag:
-                    mine_code = f"await mineBlock(bot, '{name}', {item_nums})"
-                    code = self.basic_skills + '\n' + mine_code
-
-                    new_events = self.env.step(code=code)
-                    time.sleep(1)
-
-                    if self.critic_baseline:
-                        critic_response = self.critic_agent.get_gpt4_response(events=new_events, final_task=temp_task)
-                    else:
-                        critic_response = self.critic_agent.get_llama_sft_response(events=new_events,
-                                                                                   final_task=temp_task)
-                    add_task = self.critic_agent.summarize_error(events=new_events)
-
-                    finished = self.critic_agent.process_ai_answer(critic_response)
-
-                    if finished or add_task:
-                        break
-
-                guide_code = f"await exploreUntil(bot, new Vec3{direction}, 10)"
 
-                code = self.basic_skills + '\n' + guide_code
-
-                events = self.env.step(code=code)   # 执行
-
-                if self.guide_baseline:
-                    guide_response = self.guide_agent.get_gpt4_response(events=events, goals=item_name)    # 获得响应用于检查
-                else:
-                    guide_response = self.guide_agent.get_llama_sft_response(events=events, goals=item_name)
-
-                flag, direction, name = self.guide_agent.process_ai_answer(guide_response)
-
-                guides += 1
+            # 定位、探索、挖掘
+            add_task = self.explore_and_mine(goals=item_name, block_name=item_name, count=item_nums, final_task=temp_task)
 
             if add_task:
                 break
 
         return add_task
 
-    def inference(self, task=None, reset_mode="soft"):
+    @traced("agent_mc.inference")
+    def inference(self, task=None, reset_mode="soft", timeout=None):
+        """ 执行任务直到完成, 或最终检查 max_attempts 次都未完成
+
+        :param task: 如 "Get 1 crafting_table."
+        :param reset_mode: reset 的模式
+        :param timeout: 可选, 任务最长执行时间 (秒), 超时后关闭环境并抛出 TimeoutError
+        :return: 任务是否完成
+        """
         if not task:
             raise ValueError("In inference step, a final task is essential.")
 
+        deadline = None if timeout is None else time.monotonic() + timeout
+
         task_info = task.strip(' .\n').lower().split(' ')
 
-        final_name = self.curriculum_agent.norm_name(self.curriculum_agent.singular_underscore('_'.join(task_info[2:])))
+        final_name = canonical_item_name('_'.join(task_info[2:]))
         final_nums = task_info[1]
 
         new_task = f"Get {final_nums} {final_name}."
@@ -322,20 +408,36 @@ class AgentMC:
             "wait_ticks": self.env_wait_ticks,
         }
         self.reset(options=options, reset_env=True)
+        finished = False
+        speculative_plan = None
 
         while True:
-            events = self.env.step("")
+            if deadline is not None and time.monotonic() > deadline:
+                self.close()
+                raise TimeoutError(f"Task {new_task} did not finish within {timeout}s")
 
-            if self.curriculum_baseline:
-                response = self.curriculum_agent.get_gpt4_response(events=events, final_task=new_task)
-            else:
-                response = self.curriculum_agent.get_llama_sft_response(events=events, final_task=new_task)
+            events = self.env.observe()   # 上一轮最终检查后没有执行代码时, 直接返回缓存的观测
+
+            # 配方图中已知的物品直接离线规划, 未知物品再询问 curriculum LLM
+            with span("agent_mc.plan_locally"):
+                plan = self.curriculum_agent.plan_locally(events=events, final_task=new_task)
+
+            if plan is None:
+                if speculative_plan is not None:
+                    response = speculative_plan.result()
+                else:
+                    response = self.request_curriculum(events=events, final_task=new_task)
+
+                plan = self.curriculum_agent.process_ai_answer(response)
+            elif speculative_plan is not None:
+                speculative_plan.discard()
+            speculative_plan = None
 
             (final_task,
              updated_task,
              task_label,
              missing_dict,
-             having_dict) = self.curriculum_agent.process_ai_answer(response)
+             having_dict) = plan
 
             if task_label and updated_task:
 
@@ -373,22 +475,32 @@ class AgentMC:
                     self.curriculum_agent.task_history.append(add_task_dict)
 
             if not self.curriculum_agent.task_history and new_task_attempts < self.max_attempts:
-                current_event = self.env.step("")
+                events = self.env.observe()
 
-                if self.critic_baseline:
-                    response = self.critic_agent.get_gpt4_response(events=current_event, final_task=new_task)
-                else:
-                    response = self.critic_agent.get_llama_sft_response(events=current_event, final_task=new_task)
+                # 背包能判定时不需要 judge LLM; 只有需要询问 judge 且下一轮无法离线规划时,
+                # 才与最终检查并行地推测请求下一轮 curriculum, 任务完成时丢弃它 (计入 fanout_stats)
+                finished = self.critic_agent.verify_locally(events=events, final_task=new_task)
+                if finished is None:
+                    check = submit_captured(self.verify_task, events=events, final_task=new_task)
+                    if not self.curriculum_agent.can_plan_locally(events=events, final_task=new_task):
+                        speculative_plan = submit_captured(self.request_curriculum, events=events, final_task=new_task)
 
-                finished = self.critic_agent.process_ai_answer(response)
+                    finished = check.result()
 
                 if finished:
+                    if speculative_plan is not None:
+                        speculative_plan.discard()
                     break
 
                 new_task_attempts += 1
 
+            if not self.curriculum_agent.task_history and new_task_attempts >= self.max_attempts:
+                break   # 最终检查的次数用完, 任务失败
+
         self.close()
 
+        return finished
+
     @classmethod
     def split_task(cls, task):
         info_list = task.strip(' .\n').split(' ')
@@ -406,6 +518,24 @@ class AgentMC:
 
     def close(self):
         self.env.close()
+        self.export_trace()
+
+        if self.spatial_memory is not None and self.spatial_memory_path:
+            self.spatial_memory.save(self.spatial_memory_path)
+
+    def export_trace(self):
+        tracer = get_tracer()
+        if not self.trace_path or tracer is None:
+            return
+
+        # 只导出上次导出之后的 span, 追加到文件末尾; 本次运行的第一次导出覆盖之前运行留下的文件
+        spans = tracer.take_spans()
+        tracer.export_jsonl(f"{self.trace_path}.jsonl", spans, append=self.trace_exported)
+        tracer.export_chrome(f"{self.trace_path}.trace.json", spans, append=self.trace_exported)
+        self.trace_exported = True
+
+        for name, stats in tracer.summary().items():
+            print(f"{name:<32} {stats['count']:>6} calls {stats['total_ms']:>12.1f} ms {stats['mean_ms']:>10.1f} ms/call")
 
     @classmethod
     def render_task(cls):
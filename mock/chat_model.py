@@ -0,0 +1,54 @@
+""" stand-in for the agents' ChatOpenAI models, answering with the same responders as the llama stand-in """
+
+import threading
+
+from langchain.schema import AIMessage
+
+from .llama_server import default_response
+
+# 各 agent 的 ChatOpenAI 属性 -> 对应的 llama mode
+AGENT_MODES = {
+    "curriculum": "1",
+    "judge": "2",
+    "guide": "3",
+    "actor": "4",
+    "critic": "5",
+}
+
+
+class ScriptedChatModel:
+    def __init__(self, mode, responder=default_response, model_name="scripted", temperature=0):
+        """ 与 get_chat_response 用到的 ChatOpenAI 接口一致: model_name, temperature, __call__(messages).content
+
+        :param mode: 该模型代替的 agent 对应的 llama mode
+        :param responder: (最后一条消息内容, mode) -> 回答字符串
+        """
+        self.mode = str(mode)
+        self.responder = responder
+        self.model_name = model_name
+        self.temperature = temperature
+
+        self.lock = threading.Lock()
+        self.calls = 0
+
+    def __call__(self, messages):
+        with self.lock:
+            self.calls += 1
+
+        return AIMessage(content=self.responder(messages[-1].content, self.mode))
+
+
+def install_chat_models(agent_mc, responder=default_response):
+    """ 替换 AgentMC 中所有 agent 的 ChatOpenAI 模型
+
+    :return: {agent 名称: ScriptedChatModel}
+    """
+    models = {name: ScriptedChatModel(mode, responder=responder) for name, mode in AGENT_MODES.items()}
+
+    agent_mc.curriculum_agent.curriculum_llm = models["curriculum"]
+    agent_mc.curriculum_agent.judger.judge_llm = models["judge"]
+    agent_mc.guide_agent.guide_llm = models["guide"]
+    agent_mc.actor_agent.actor_llm = models["actor"]
+    agent_mc.critic_agent.critic_llm = models["critic"]
+
+    return models
@@ -0,0 +1,255 @@
+""" local stand-in for the llama SFT server, for testing the agents and LlamaBatcher without a GPU
+
+python -m llm4mc.mock.llama_server 8000 [--latency 0.5] [--script responses.json]
+"""
+
+import re
+import ast
+import sys
+import json
+import time
+import argparse
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+TASK_PATTERN = re.compile(r"Final Task: Get (\d+) (\S+?)\.")
+GOAL_PATTERN = re.compile(r"Goals: (\S+)")
+ENVIRONMENT_PATTERN = re.compile(r"Environment: \[(.*?)\]")
+ITEM_LIST_PATTERN = re.compile(r"Item List: \[(.*?)\]")
+INVENTORY_PATTERN = re.compile(r"Inventory \(\d+/36\): (\{.*\})")
+
+
+def default_response(input_txt, mode):
+    """ 按 mode 生成一个能被对应 agent 的 process_ai_answer 解析的固定回答
+
+    :param input_txt: agent 渲染的消息
+    :param mode: 1 curriculum, 2 judge, 3 guide, 4 actor, 5 critic
+    :return: 回答字符串
+    """
+    mode = str(mode)
+    task = TASK_PATTERN.search(input_txt)
+    task_nums, task_name = (int(task.group(1)), task.group(2)) if task else (1, "crafting_table")
+
+    if mode == "1":
+        response = {
+            "Original final task": {task_name: task_nums},
+            "My Inventory": {},
+            "Updated final task": {task_name: task_nums},
+            "Items Needed": {},
+            "Items Missing": {},
+        }
+    elif mode == "2":
+        items = ITEM_LIST_PATTERN.search(input_txt)
+        names = re.findall(r"'([^']+)'", items.group(1)) if items else []
+        response = {name: "collected items" for name in names}
+    elif mode == "3":
+        goal = GOAL_PATTERN.search(input_txt)
+        environment = ENVIRONMENT_PATTERN.search(input_txt)
+        goal = goal.group(1) if goal else ""
+        nearby = re.findall(r"'([^']+)'", environment.group(1)) if environment else []
+
+        found = next((name for name in nearby if goal and goal in name), "None")
+        response = {"Found": found, "Not found": "None" if found != "None" else "(1, 0, 0)"}
+    elif mode == "4":
+        response = {
+            "My task": task_name,
+            "Task category": "Crafting",
+            "Mining block": "None",
+            "Crafting tool": "crafting_table",
+            "Furnace info": "None",
+        }
+    else:
+        response = {"Finished": "false"}
+
+    return json.dumps(response)
+
+
+def recipe_response(input_txt, mode):
+    """ 按离线配方图给出正确回答, 让 agent 循环能在 mineflayer stand-in 上完成任务 (基准测试用)
+
+    curriculum 与 judge (mode 1 / 2) 使用 default_response
+    """
+    from llm4mc.agents.recipes import RECIPES, ITEM_GROUPS, ITEM_ALIASES, COLLECT, MINE, SMELT
+
+    mode = str(mode)
+
+    task = TASK_PATTERN.search(input_txt)
+    task_nums, task_name = (int(task.group(1)), task.group(2)) if task else (1, "crafting_table")
+    task_name = ITEM_ALIASES.get(task_name, task_name)
+    inventory = INVENTORY_PATTERN.search(input_txt)
+    inventory = ast.literal_eval(inventory.group(1)) if inventory else {}
+
+    if mode == "3":
+        goal = GOAL_PATTERN.search(input_txt)
+        environment = ENVIRONMENT_PATTERN.search(input_txt)
+        goal = goal.group(1) if goal else ""
+        nearby = re.findall(r"'([^']+)'", environment.group(1)) if environment else []
+
+        # 目标可以是方块本身, 一类方块 (log), 或者挖掘后得到的物品 (coal -> coal_ore)
+        blocks = set(ITEM_GROUPS.get(goal, [goal]))
+        recipe = RECIPES.get(goal)
+        if recipe and recipe[0] in (COLLECT, MINE):
+            blocks.add(recipe[1])
+
+        found = next((name for name in nearby if name in blocks), "None")
+        response = {"Found": found, "Not found": "None" if found != "None" else "(1, 0, 0)"}
+    elif mode == "4":
+        method, station, requirements, _ = RECIPES.get(task_name, (COLLECT, task_name, {}, 1))
+        response = {"My task": task_name, "Mining block": "None", "Crafting tool": "None", "Furnace info": "None"}
+
+        if method in (COLLECT, MINE):
+            response.update({"Task category": "Mining", "Mining block": station})
+        elif method == SMELT:
+            raw = next(name for name in requirements if name != "coal")
+            need_coal = inventory.get("coal", 0) < task_nums
+            response.update({
+                "Task category": "Crafting",
+                "Crafting tool": "furnace",
+                "Furnace info": {"raw materials": raw, "need coal": "true" if need_coal else "false"},
+            })
+        else:
+            response.update({"Task category": "Crafting", "Crafting tool": station})
+    elif mode == "5":
+        held = sum(inventory.get(name, 0) for name in ITEM_GROUPS.get(task_name, [task_name]))
+        response = {"Finished": "true" if held >= task_nums else "false"}
+    else:
+        return default_response(input_txt, mode)
+
+    return json.dumps(response)
+
+
+class LlamaStandIn:
+    def __init__(self, latency=0.0, batch_latency=None, script=None, responder=default_response):
+        """ 回答生成与统计
+
+        :param latency: 单个请求的模拟推理耗时 (秒)
+        :param batch_latency: 一个批次的模拟推理耗时, 默认与单个请求相同 (GPU 批处理的收益)
+        :param script: 可选, {mode: [回答, ...]}, 按顺序循环返回
+        :param responder: 没有脚本回答时使用, (input_txt, mode) -> 回答字符串
+        """
+        self.responder = responder
+        self.latency = latency
+        self.batch_latency = latency if batch_latency is None else batch_latency
+        self.script = {str(mode): list(responses) for mode, responses in (script or {}).items()}
+        self.cursor = {}
+
+        self.lock = threading.Lock()
+        self.single_requests = 0
+        self.batch_requests = 0
+        self.batched_prompts = 0
+
+    def answer(self, input_txt, mode):
+        mode = str(mode)
+        with self.lock:
+            if self.script.get(mode):
+                index = self.cursor.get(mode, 0)
+                self.cursor[mode] = index + 1
+                return self.script[mode][index % len(self.script[mode])]
+
+        return self.responder(input_txt, mode)
+
+    def single(self, request_data):
+        with self.lock:
+            self.single_requests += 1
+        time.sleep(self.latency)
+
+        return {"response_sft": self.answer(request_data["input_txt"], request_data["mode"])}
+
+    def batch(self, request_data):
+        requests = request_data["requests"]
+        with self.lock:
+            self.batch_requests += 1
+            self.batched_prompts += len(requests)
+        time.sleep(self.batch_latency)
+
+        return {"responses_sft": [self.answer(request["input_txt"], request["mode"]) for request in requests]}
+
+    def stats(self):
+        with self.lock:
+            return {
+                "single_requests": self.single_requests,
+                "batch_requests": self.batch_requests,
+                "batched_prompts": self.batched_prompts,
+            }
+
+
+def make_handler(stand_in):
+    class Handler(BaseHTTPRequestHandler):
+        protocol_version = "HTTP/1.1"
+        disable_nagle_algorithm = True   # 头部与正文分两次写出, 否则 keep-alive 连接上每个请求多等 40 ms 的延迟 ACK
+
+        def _reply(self, status, data):
+            body = json.dumps(data).encode("utf-8")
+            self.send_response(status)
+            self.send_header("Content-Type", "application/json")
+            self.send_header("Content-Length", str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+        def do_POST(self):
+            length = int(self.headers.get("Content-Length", 0))
+            request_data = json.loads(self.rfile.read(length) or b"{}")
+            path = self.path.rstrip("/")
+
+            if path.endswith("/minecraftapi/batch"):
+                self._reply(200, stand_in.batch(request_data))
+            elif path.endswith("/minecraftapi"):
+                self._reply(200, stand_in.single(request_data))
+            else:
+                self._reply(404, {"error": f"Unknown route {self.path}"})
+
+        def do_GET(self):
+            if self.path.rstrip("/").endswith("/stats"):
+                self._reply(200, stand_in.stats())
+            else:
+                self._reply(404, {"error": f"Unknown route {self.path}"})
+
+        def log_message(self, format, *args):
+            pass
+
+    return Handler
+
+
+def serve(port=8000, latency=0.0, batch_latency=None, script=None, host="127.0.0.1", responder=default_response):
+    """ 在后台线程启动 stand-in 服务
+
+    :return: (server, stand_in), 用 server.shutdown() 关闭
+    """
+    stand_in = LlamaStandIn(latency=latency, batch_latency=batch_latency, script=script, responder=responder)
+    server = ThreadingHTTPServer((host, port), make_handler(stand_in))
+
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+
+    return server, stand_in
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Local stand-in for the llama SFT /minecraftapi server.")
+    parser.add_argument("port", type=int, nargs="?", default=8000)
+    parser.add_argument("--latency", type=float, default=0.0)
+    parser.add_argument("--batch-latency", type=float, default=None)
+    parser.add_argument("--script", default=None, help="json file mapping mode -> list of responses")
+    parser.add_argument("--recipes", action="store_true", help="answer from the offline recipe graph")
+    args = parser.parse_args(argv)
+
+    script = None
+    if args.script:
+        with open(args.script, "r", encoding="utf-8") as fp:
+            script = json.load(fp)
+
+    responder = recipe_response if args.recipes else default_response
+    stand_in = LlamaStandIn(latency=args.latency, batch_latency=args.batch_latency, script=script, responder=responder)
+    server = ThreadingHTTPServer(("127.0.0.1", args.port), make_handler(stand_in))
+
+    print(f"Server started on port {args.port}", flush=True)
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+
+
+if __name__ == "__main__":
+    sys.exit(main())
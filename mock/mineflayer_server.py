@@ -0,0 +1,477 @@
+""" in-process stand-in for the mineflayer express server, for benchmarking the Python side without Minecraft
+
+python -m llm4mc.mock.mineflayer_server 3000 [--seed 0] [--latency 0.0]
+
+The world is a coarse simulation: skill calls in the step code (mineBlock, craftItem, smeltItem,
+placeItem, exploreUntil, exploreAndMine, pathfinder.goto) are matched with regexes and applied to an inventory
+using the offline recipe graph, with the chat messages the real skills print on failure. The blocks around the
+bot depend only on the seed and the 16 x 16 x 16 cell it stands in, so returning to a place shows the same blocks.
+"""
+
+import re
+import sys
+import json
+import time
+import random
+import argparse
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+from llm4mc.agents.recipes import RECIPES, ITEM_GROUPS, COLLECT, MINE, SMELT, CRAFT, CRAFTING_TABLE, TOOL_TIERS
+
+MINE_PATTERN = re.compile(r"mineBlock\(bot,\s*'([^']+)',\s*(\d+)\)")
+CRAFT_PATTERN = re.compile(r"craftItem\(bot,\s*'([^']+)',\s*(\d+)\)")
+SMELT_PATTERN = re.compile(r"smeltItem\(bot,\s*'([^']+)',\s*'([^']+)',\s*(\d+)\)")
+EXPLORE_PATTERN = re.compile(r"exploreUntil\(bot,\s*new Vec3\(([-\d.]+),\s*([-\d.]+),\s*([-\d.]+)\)")
+GOTO_PATTERN = re.compile(r"pathfinder\.goto\(new GoalNear\(([-\d.]+),\s*([-\d.]+),\s*([-\d.]+)")
+EXPLORE_AND_MINE_PATTERN = re.compile(
+    r"exploreAndMine\(bot,\s*(\[[^\]]*\]),\s*(\d+),\s*new Vec3\(([-\d.]+),\s*([-\d.]+),\s*([-\d.]+)\),\s*(\d+)\)"
+)
+
+# 方块 -> 掉落物, 没有列出的方块掉落自身
+BLOCK_DROPS = {
+    "stone": "cobblestone",
+    "coal_ore": "coal",
+    "iron_ore": "raw_iron",
+    "gold_ore": "raw_gold",
+    "copper_ore": "raw_copper",
+    "diamond_ore": "diamond",
+    "redstone_ore": "redstone",
+    "lapis_ore": "lapis_lazuli",
+    "grass_block": "dirt",
+}
+COMMON_BLOCKS = ["dirt", "grass_block", "stone", "oak_log", "birch_log", "sand", "gravel", "sugar_cane"]
+RARE_BLOCKS = ["coal_ore", "iron_ore", "copper_ore", "gold_ore", "diamond_ore", "redstone_ore", "lapis_ore"]
+MOBS = ["cow", "sheep", "chicken", "spider"]
+# 生物 -> 击杀后的掉落物
+MOB_DROPS = {recipe[1]: item for item, recipe in RECIPES.items() if recipe[0] == COLLECT and recipe[1] in MOBS}
+
+
+class FakeWorld:
+    def __init__(self, seed=0):
+        """ 背包、位置和附近方块的粗略模拟, 同一个 seed 得到同样的结果 """
+        self.seed = seed
+        self.inventory = {}
+        self.position = {"x": 0.5, "y": 64.0, "z": 0.5}
+        self.elapsed_ticks = 0
+        self.voxels = []
+        self.entities = {}
+        self.explore()
+
+    def reset(self, mode, inventory, position=None):
+        if mode == "hard":
+            self.inventory = {name: count for name, count in (inventory or {}).items() if count}
+        if position:
+            self.position = dict(position)
+
+    def explore(self, direction=(1, 0, 0)):
+        for axis, delta in zip("xyz", direction):
+            self.position[axis] += 10 * float(delta)
+
+        self.look_around()
+        self.elapsed_ticks += 200
+
+    def goto(self, x, y, z):
+        self.position = {"x": x, "y": y, "z": z}
+
+        self.look_around()
+        self.elapsed_ticks += 100
+
+    def look_around(self):
+        """ 附近的方块只由 seed 和所在的格子决定 """
+        cell = tuple(int(self.position[axis] // 16) for axis in "xyz")
+        rng = random.Random(f"{self.seed}:{cell}")
+
+        rare = [name for name in RARE_BLOCKS if rng.random() < 0.6]
+        self.voxels = COMMON_BLOCKS[:5] + rng.sample(COMMON_BLOCKS[5:], 2) + rare
+        rng.shuffle(self.voxels)
+        self.entities = {mob: round(rng.uniform(2, 30), 2) for mob in MOBS if rng.random() < 0.5}
+
+    def count(self, name):
+        if name in ITEM_GROUPS:
+            return sum(self.inventory.get(variant, 0) for variant in ITEM_GROUPS[name])
+        return self.inventory.get(name, 0)
+
+    def take(self, name, count):
+        variants = ITEM_GROUPS.get(name, [name])
+        for variant in variants:
+            used = min(count, self.inventory.get(variant, 0))
+            if used:
+                self.inventory[variant] -= used
+                if not self.inventory[variant]:
+                    del self.inventory[variant]
+                count -= used
+
+    def add(self, name, count):
+        self.inventory[name] = self.inventory.get(name, 0) + count
+
+    def has_tool(self, tool):
+        tier, _, shape = tool.partition("_")
+        if tier not in TOOL_TIERS:
+            return self.count(tool) > 0
+
+        return any(
+            self.count(f"{held_tier}_{shape}") > 0
+            for held_tier, level in TOOL_TIERS.items() if level >= TOOL_TIERS[tier]
+        )
+
+    def mine(self, block, count, chats):
+        if block in ITEM_GROUPS:   # 一类方块, 挖附近的任意一种
+            block = next((name for name in ITEM_GROUPS[block] if name in self.voxels), block)
+
+        if block not in self.voxels:
+            chats.append(f"No {block} nearby, please explore first")
+            return
+
+        drop = BLOCK_DROPS.get(block, block)
+        recipe = RECIPES.get(drop)
+
+        if recipe and recipe[0] == MINE:
+            for tool in recipe[2]:
+                if not self.has_tool(tool):
+                    chats.append(f"I need at least a {tool} to mine {block}!")
+                    return
+
+        self.add(drop, count)
+        self.elapsed_ticks += 40 * count
+
+    def craft(self, name, count, chats):
+        recipe = RECIPES.get(name)
+        if recipe is None or recipe[0] != CRAFT:
+            chats.append(f"I cannot make {name}")
+            return
+
+        _, station, requirements, output = recipe
+
+        batches = -(-count // output)
+        lacking = {item: num * batches - self.count(item) for item, num in requirements.items()
+                   if self.count(item) < num * batches}
+        if station == CRAFTING_TABLE and self.count("crafting_table") < 1:
+            lacking["crafting_table"] = 1
+
+        if lacking:
+            needs = ", ".join(f"{num} more {item}" for item, num in lacking.items())
+            chats.append(f"I cannot make {name} because I need: {needs}")
+            return
+
+        for item, num in requirements.items():
+            self.take(item, num * batches)
+        self.add(name, output * batches)
+        self.elapsed_ticks += 20
+
+    def smelt(self, raw, fuel, count, chats):
+        product = next((name for name, recipe in RECIPES.items()
+                        if recipe[0] == SMELT and raw in recipe[2]), None)
+
+        if product is None:
+            chats.append(f"{raw} is not a valid input")
+            return
+        if self.count("furnace") < 1:
+            chats.append("No furnace nearby")
+            return
+        if self.count(raw) < count:
+            chats.append(f"No {raw} to smelt in inventory")
+            return
+        if self.count(fuel) < count:
+            chats.append(f"No {fuel} as fuel in inventory")
+            return
+
+        self.take(raw, count)
+        self.take(fuel, count)
+        self.add(product, count)
+        self.elapsed_ticks += 200 * count
+
+    def explore_and_mine(self, names, count, direction, max_time, chats):
+        """ 每 10 秒探索一次, 直到附近出现 names 中的任意方块, 然后挖掘 """
+        for _ in range(max(1, max_time // 10)):
+            block = next((name for name in names if name in self.voxels), None)
+            if block is not None:
+                self.mine(block, count, chats)
+                return
+
+            mob = next((name for name in names if name in self.entities and name in MOB_DROPS), None)
+            if mob is not None:
+                self.add(MOB_DROPS[mob], count)
+                self.elapsed_ticks += 100 * count
+                return
+
+            self.explore(direction)
+
+        chats.append(f"Could not find {', '.join(names)} within {max_time} seconds")
+
+    def run(self, code):
+        """ 依次执行代码中的技能调用
+
+        :return: 技能输出的聊天消息列表
+        """
+        chats = []
+        calls = []
+        for pattern, kind in ((MINE_PATTERN, "mine"), (CRAFT_PATTERN, "craft"),
+                              (SMELT_PATTERN, "smelt"), (EXPLORE_PATTERN, "explore"),
+                              (EXPLORE_AND_MINE_PATTERN, "explore_and_mine"), (GOTO_PATTERN, "goto")):
+            calls.extend((match.start(), kind, match.groups()) for match in pattern.finditer(code))
+
+        for _, kind, args in sorted(calls):
+            if kind == "mine":
+                self.mine(args[0], int(args[1]), chats)
+            elif kind == "craft":
+                self.craft(args[0], int(args[1]), chats)
+            elif kind == "smelt":
+                self.smelt(args[0], args[1], int(args[2]), chats)
+            elif kind == "goto":
+                self.goto(*(float(axis) for axis in args))
+            elif kind == "explore_and_mine":
+                direction = tuple(float(axis) for axis in args[2:5])
+                self.explore_and_mine(json.loads(args[0]), int(args[1]), direction, int(args[5]), chats)
+            else:
+                self.explore(tuple(float(axis) for axis in args))
+
+        self.elapsed_ticks += 20
+
+        return chats
+
+    def observe(self):
+        return {
+            "voxels": list(self.voxels),
+            "status": {
+                "health": 20,
+                "food": 20,
+                "saturation": 5,
+                "oxygen": 20,
+                "position": dict(self.position),
+                "velocity": {"x": 0, "y": 0, "z": 0},
+                "yaw": 0,
+                "pitch": 0,
+                "onGround": True,
+                "equipment": [None] * 6,
+                "name": "bot",
+                "biome": "plains",
+                "entities": dict(self.entities),
+                "timeOfDay": "day",
+                "inventoryUsed": len(self.inventory),
+                "elapsedTime": self.elapsed_ticks,
+            },
+            "inventory": dict(self.inventory),
+            "chests": {},
+            "blockRecords": list(self.voxels),
+        }
+
+
+class MineflayerStandIn:
+    def __init__(self, seed=0, latency=0.0):
+        """ 路由处理与统计
+
+        :param seed: 世界的随机种子
+        :param latency: 每个 /step 的模拟耗时 (秒)
+        """
+        self.world = FakeWorld(seed)
+        self.latency = latency
+        self.skills = {}
+        self.paused = False
+        self.started = False
+        self.seq = 0
+
+        self.lock = threading.Lock()
+        self.requests = {}
+        self.response_bytes = 0
+
+        # 模拟卡住的 bot: 接下来 hang_steps 个 /step 不返回, 直到服务被 stop (进程被结束), 连接直接断开
+        self.hang_steps = 0
+        self.stopped = threading.Event()
+        self.step_started = None
+
+    def events(self, chats, data):
+        observation = self.world.observe()
+
+        fields = data.get("fields")
+        if fields:
+            observation = {name: value for name, value in observation.items() if name in fields}
+
+        events = [["onChat", dict(observation, onChat=chat)] for chat in chats]
+        if data.get("events") is not None:
+            events = [event for event in events if event[0] in data["events"]]
+
+        events.append(["observe", observation])
+        if data.get("delta"):   # 不计算差异, 每个事件都发送带序号的完整观测
+            for event in events:
+                self.seq += 1
+                event[1] = dict(event[1], **{"$seq": self.seq, "$base": None})
+
+        return events
+
+    def health(self):
+        return {
+            "bot": self.started,
+            "spawned": self.started,
+            "stepMs": None if self.step_started is None else int((time.time() - self.step_started) * 1000),
+        }
+
+    def hang(self):
+        """ 当前 /step 是否应卡住; 卡住时阻塞到服务被 stop 后抛出 ConnectionAbortedError """
+        with self.lock:
+            if self.hang_steps <= 0:
+                return
+            self.hang_steps -= 1
+            self.step_started = time.time()
+
+        self.stopped.wait()
+        self.step_started = None
+        raise ConnectionAbortedError("Stand-in stopped during a hung /step")
+
+    def handle(self, route, data):
+        if route == "/health":   # 不经过锁, 与 index.js 一样在执行 /step 期间也能回答
+            return 200, self.health()
+        if route == "/step":
+            self.hang()
+
+        with self.lock:
+            self.requests[route] = self.requests.get(route, 0) + 1
+
+            if route == "/start":
+                self.world.reset(data.get("reset", "hard"), data.get("inventory"), data.get("position"))
+                self.started = True
+                return 200, self.events([], {})
+
+            if route == "/skills":
+                self.skills[data["hash"]] = data["programs"]
+                return 200, {"hash": data["hash"]}
+
+            if not self.started:
+                return 400, {"error": "Bot not spawned"}
+
+            if route == "/step":
+                if data.get("skills") and data["skills"] not in self.skills:
+                    return 409, {"error": "Unknown skills"}
+
+                if data.get("unpause"):
+                    self.paused = False
+                chats = self.world.run(data.get("code", ""))
+                if data.get("pause"):
+                    self.paused = True
+
+                if self.latency:
+                    time.sleep(self.latency)
+                return 200, self.events(chats, data)
+
+            if route == "/observe":
+                return 200, self.events([], data)
+
+            if route == "/pause":
+                self.paused = not self.paused
+                return 200, {"message": "Success"}
+
+            if route == "/stop":
+                self.started = False
+                return 200, {"message": "Bot stopped"}
+
+        return 404, {"error": f"Unknown route {route}"}
+
+    def stats(self):
+        with self.lock:
+            return {
+                "requests": dict(self.requests),
+                "total_requests": sum(self.requests.values()),
+                "response_bytes": self.response_bytes,
+            }
+
+
+def make_handler(stand_in):
+    class Handler(BaseHTTPRequestHandler):
+        protocol_version = "HTTP/1.1"
+        disable_nagle_algorithm = True   # 头部与正文分两次写出, 否则 keep-alive 连接上每个请求多等 40 ms 的延迟 ACK
+
+        def _reply(self, status, data):
+            body = json.dumps(data).encode("utf-8")
+            with stand_in.lock:
+                stand_in.response_bytes += len(body)
+
+            self.send_response(status)
+            self.send_header("Content-Type", "application/json")
+            self.send_header("Content-Length", str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+        def do_POST(self):
+            length = int(self.headers.get("Content-Length", 0))
+            data = json.loads(self.rfile.read(length) or b"{}")
+
+            try:
+                self._reply(*stand_in.handle(self.path.rstrip("/"), data))
+            except ConnectionAbortedError:   # 不回复, 关闭连接, 与进程被结束时一致
+                self.close_connection = True
+
+        def do_GET(self):
+            if self.path.rstrip("/") == "/stats":
+                self._reply(200, stand_in.stats())
+            elif self.path.rstrip("/") == "/health":
+                self._reply(*stand_in.handle("/health", {}))
+            else:
+                self._reply(404, {"error": f"Unknown route {self.path}"})
+
+        def log_message(self, format, *args):
+            pass
+
+    return Handler
+
+
+class InProcessMineflayer:
+    def __init__(self, port, stand_in=None, host="127.0.0.1"):
+        """ 与 SubprocessMonitor 接口一致 (run / stop / close / is_running / ready_line), 可以直接替换 LLM4MCEnv.mineflayer
+
+        世界状态保存在 stand_in 中, 服务重启 (LLM4MCEnv.reset) 后保留, 与真实的 Minecraft 服务器一致
+        """
+        self.port = port
+        self.host = host
+        self.stand_in = stand_in or MineflayerStandIn()
+
+        self.server = None
+        self.thread = None
+        self.ready_line = None
+
+    def run(self):
+        self.stand_in.stopped.clear()
+        self.server = ThreadingHTTPServer((self.host, self.port), make_handler(self.stand_in))
+        # shutdown 要等 serve_forever 的下一次轮询, 默认 0.5 秒, 每次重置都要付出
+        self.thread = threading.Thread(target=self.server.serve_forever, kwargs={"poll_interval": 0.01}, daemon=True)
+        self.thread.start()
+
+        self.ready_line = f"Server started on port {self.port}"
+
+    def stop(self):
+        if self.server is not None:
+            self.stand_in.stopped.set()
+            self.server.shutdown()
+            self.server.server_close()
+            self.thread.join()
+            self.server = None
+
+    def close(self):
+        self.stop()
+
+    @property
+    def is_running(self):
+        return self.server is not None
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="In-process stand-in for the mineflayer HTTP server.")
+    parser.add_argument("port", type=int, nargs="?", default=3000)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--latency", type=float, default=0.0)
+    args = parser.parse_args(argv)
+
+    stand_in = MineflayerStandIn(seed=args.seed, latency=args.latency)
+    server = ThreadingHTTPServer(("127.0.0.1", args.port), make_handler(stand_in))
+
+    # 与 index.js 的输出一致, SubprocessMonitor 以此判断服务已就绪
+    print(f"Server started on port {args.port}", flush=True)
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,195 @@
+import time
+import threading
+import multiprocessing
+from multiprocessing.util import Finalize
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor, as_completed
+
+import llm4mc.utils as mc_utils
+from agents import LlamaBatcher
+from main import AgentMC
+
+# 每个工作进程 (线程模式下为每个工作线程) 持有一个 AgentMC: agent, index, task_timeout
+_worker = threading.local()
+
+
+def load_tasks(*filepaths):
+    """ 从任务文件中读取任务, 每行一个, 忽略空行和 # 开头的注释
+
+    :param filepaths: 任务文件路径
+    :return: 任务列表
+    """
+    lines = mc_utils.load_text_lines(*filepaths)
+
+    return [line.strip() for line in lines if line.strip() and not line.strip().startswith("#")]
+
+
+def _init_worker(slot_queue, agent_kwargs, task_timeout, finalizers):
+    _worker.task_timeout = task_timeout
+
+    # 每个工作进程领取一个独立的 (编号, mineflayer 端口, Minecraft 服务器端口), bot 名称和日志目录随之区分
+    _worker.index, server_port, mc_port = slot_queue.get()
+
+    log_path = mc_utils.f_join(agent_kwargs.get("env_log_path", "./logs"), f"worker_{_worker.index}")
+
+    # 备用进程端口同样按编号错开, env_standby_port 视为第 0 个工作进程的端口
+    standby_port = agent_kwargs.get("env_standby_port")
+    if standby_port is not None:
+        standby_port += _worker.index
+
+    agent = _worker.agent = AgentMC(
+        **{
+            **agent_kwargs,
+            "mc_port": mc_port,
+            "server_port": server_port,
+            "bot_username": f"bot{_worker.index}",
+            "env_log_path": log_path,
+            "env_standby_port": standby_port,
+        }
+    )
+
+    # ProcessPoolExecutor 的工作进程退出时不会执行 atexit, 用 Finalize 保证 node 进程被回收; 线程模式下 run 结束时调用
+    finalizers.append(Finalize(agent, agent.env.stop_processes, exitpriority=10))
+
+
+def _run_task(task, index):
+    start_time = time.time()
+    result = {
+        "index": index,
+        "task": task,
+        "worker": _worker.index,
+        "server_port": _worker.agent.env.server_port,
+        "finished": False,
+        "error": None,
+    }
+
+    try:
+        result["finished"] = _worker.agent.inference(task, timeout=_worker.task_timeout)
+    except Exception as e:
+        result["error"] = f"{type(e).__name__}: {e}"
+
+        try:
+            _worker.agent.close()
+        except Exception:
+            pass
+
+    result["elapsed"] = time.time() - start_time
+
+    return result
+
+
+class WorkerPool:
+    def __init__(self, num_workers, base_server_port=3000, mc_ports=None, task_timeout=None, threads=False,
+                 **agent_kwargs):
+        """ 多 bot 任务调度器, 每个工作进程拥有独立的 AgentMC, mineflayer 端口, bot 与 Minecraft 服务器
+
+        /pause 以及 returnItems 修改的游戏规则、时间和难度作用于整个 Minecraft 服务器, 多个 bot 共用一个服务器时
+        会互相撤销对方的暂停状态, 因此每个工作进程必须连接自己的服务器
+
+        :param num_workers: 工作进程 (bot) 数量
+        :param base_server_port: 第 i 个工作进程使用 base_server_port + i 端口
+        :param mc_ports: 每个工作进程的 Minecraft 服务器端口, 长度为 num_workers; 只有一个工作进程时可以改为传入 mc_port
+        :param task_timeout: 单个任务的最长执行时间 (秒), 超时的任务记为失败, 工作进程继续执行下一个任务
+        :param threads: 在同一进程的多个线程中运行各个 bot, 此时所有 bot 共用一个 LlamaBatcher (llama_batch_size),
+                        不同 bot 的 llama 请求可以合成一批; 默认每个 bot 一个进程, 不共用 batcher
+        :param agent_kwargs: 传给 AgentMC 的其余参数, 如 api_key, llama_server 等
+        """
+        if num_workers < 1:
+            raise ValueError("num_workers must be at least 1.")
+
+        if mc_ports is None and num_workers == 1 and "mc_port" in agent_kwargs:
+            mc_ports = [agent_kwargs.pop("mc_port")]
+        if mc_ports is None or len(mc_ports) != num_workers:
+            raise ValueError("Each worker needs its own Minecraft server, pass one port per worker in mc_ports.")
+        if len(set(mc_ports)) != len(mc_ports):
+            raise ValueError("Workers cannot share a Minecraft server, mc_ports must be distinct.")
+
+        self.num_workers = num_workers
+        self.base_server_port = base_server_port
+        self.mc_ports = list(mc_ports)
+        self.task_timeout = task_timeout
+        self.threads = threads
+        self.agent_kwargs = agent_kwargs
+
+    def run(self, tasks, callback=None):
+        """ 并行执行任务, 任务由进程池的共享队列分发给空闲的 bot
+
+        :param tasks: 任务列表, 如 ["Get 1 crafting_table.", ...]
+        :param callback: 可选, 每完成一个任务调用一次 callback(result)
+        :return: 与 tasks 顺序一致的结果列表
+        """
+        slot_queue = multiprocessing.Queue()
+        for i in range(self.num_workers):
+            slot_queue.put((i, self.base_server_port + i, self.mc_ports[i]))
+
+        results = [None] * len(tasks)
+
+        agent_kwargs = self.agent_kwargs
+        if self.threads and agent_kwargs.get("llama_batch_size"):
+            agent_kwargs = dict(agent_kwargs, llama_batcher=LlamaBatcher(
+                server=agent_kwargs["llama_server"],
+                max_batch_size=agent_kwargs["llama_batch_size"],
+                max_wait=agent_kwargs.get("llama_batch_wait", 0.05)
+            ))
+
+        finalizers = []
+        executor_cls = ThreadPoolExecutor if self.threads else ProcessPoolExecutor
+        with executor_cls(
+                max_workers=self.num_workers,
+                initializer=_init_worker,
+                initargs=(slot_queue, agent_kwargs, self.task_timeout, finalizers)
+        ) as executor:
+            futures = [executor.submit(_run_task, task, index) for index, task in enumerate(tasks)]
+
+            for future in as_completed(futures):
+                result = future.result()
+                results[result["index"]] = result
+
+                if callback:
+                    callback(result)
+
+        for finalizer in finalizers:   # 只有线程模式下会收集到, 进程模式的工作进程退出时各自执行
+            finalizer()
+        if "llama_batcher" in agent_kwargs:
+            agent_kwargs["llama_batcher"].close()
+
+        return results
+
+    @classmethod
+    def summarize(cls, results):
+        finished = sum(1 for result in results if result["finished"])
+        failed = sum(1 for result in results if result["error"])
+        elapsed = sum(result["elapsed"] for result in results)
+
+        return {
+            "total": len(results),
+            "finished": finished,
+            "failed": failed,
+            "mean_elapsed": elapsed / len(results) if results else 0,
+        }
+
+
+if __name__ == "__main__":
+    key = r"your key"
+    base = r"your base"
+    server = r"https://u284241-a083-3edacbc8.westc.gpuhub.com:8443/"
+
+    pool = WorkerPool(
+        num_workers=4,
+        base_server_port=3000,
+        llama_server=server,
+        mc_ports=[50838, 50839, 50840, 50841],
+        api_key=key,
+        api_base=base,
+        env_wait_ticks=40,
+        env_request_timeout=1000,
+        task_timeout=1800,
+    )
+
+    task_list = [AgentMC.render_task() for _ in range(8)]
+
+    def report(result):
+        msg = ('*' * 10 + f" worker {result['worker']}: {result['task']} " + '*' * 10).center(100, '*')
+        print(f"{msg}\nfinished: {result['finished']}, error: {result['error']}, elapsed: {result['elapsed']:.1f}s")
+
+    task_results = pool.run(task_list, callback=report)
+    print(WorkerPool.summarize(task_results))
@@ -0,0 +1,91 @@
+import threading
+
+import pytest
+
+from llm4mc.agents.batcher import LlamaBatcher
+
+
+class FakeResponse:
+    def __init__(self, status_code, payload=None):
+        self.status_code = status_code
+        self.payload = payload
+
+    def json(self):
+        return self.payload
+
+
+class FakeServer:
+    def __init__(self):
+        self.batches = []
+        self.release = None   # 设置后, 每个批次等待该事件再返回
+
+    def post(self, url, json, timeout):
+        inputs = [request["input_txt"] for request in json["requests"]]
+        self.batches.append(inputs)
+        if self.release is not None:
+            self.release.wait()
+        return FakeResponse(200, {"responses_sft": [f"answer {text}" for text in inputs]})
+
+
+@pytest.fixture
+def server():
+    return FakeServer()
+
+
+@pytest.fixture
+def batcher(server):
+    batcher = LlamaBatcher("http://llama", max_batch_size=3, max_wait=5)
+    batcher.session.post = server.post
+    yield batcher
+    batcher.close()
+
+
+def test_lone_request_is_sent_without_waiting(batcher, server):
+    thread = threading.Thread(target=lambda: batcher.submit("a", "mode"))
+    thread.start()
+    thread.join(timeout=1)   # max_wait 为 5 秒, 只有一个请求时立即发送
+
+    assert not thread.is_alive()
+    assert server.batches == [["a"]]
+
+
+def test_requests_queued_while_a_batch_is_in_flight_are_merged(batcher, server):
+    server.release = threading.Event()
+    answers = {}
+
+    def submit(text):
+        answers[text] = batcher.submit(text, "mode")
+
+    first = threading.Thread(target=submit, args=("a",))
+    first.start()
+    while not server.batches:
+        pass
+
+    others = [threading.Thread(target=submit, args=(text,)) for text in "bcd"]
+    for thread in others:
+        thread.start()
+    while batcher.pending.qsize() < 3:
+        pass
+    server.release.set()   # 第二批凑满 max_batch_size, 不必等待 max_wait
+
+    for thread in [first] + others:
+        thread.join(timeout=10)
+
+    assert server.batches[0] == ["a"]
+    assert sorted(server.batches[1]) == ["b", "c", "d"]
+    assert answers == {text: f"answer {text}" for text in "abcd"}
+    assert batcher.stats() == {"batches": 2, "requests": 4, "mean_batch_size": 2.0}
+
+
+def test_failed_batch_raises_in_every_caller(batcher):
+    batcher.session.post = lambda url, json, timeout: FakeResponse(500)
+
+    with pytest.raises(RuntimeError, match="500"):
+        batcher.submit("a", "mode")
+
+
+def test_submit_after_close_raises(batcher):
+    batcher.close()
+
+    with pytest.raises(RuntimeError, match="closed"):
+        batcher.submit("a", "mode")
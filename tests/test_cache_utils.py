@@ -0,0 +1,52 @@
+from llm4mc.utils import ResponseCache
+
+
+def test_key_depends_on_every_part():
+    key = ResponseCache.make_key("gpt-4", 0, "system", "human")
+
+    assert key == ResponseCache.make_key("gpt-4", 0, "system", "human")
+    assert key != ResponseCache.make_key("gpt-3.5", 0, "system", "human")
+    assert key != ResponseCache.make_key("gpt-4", 0.2, "system", "human")
+    assert key != ResponseCache.make_key("gpt-4", 0, "other system", "human")
+    assert key != ResponseCache.make_key("gpt-4", 0, "system", "other human")
+
+
+def test_hits_and_misses_are_counted():
+    cache = ResponseCache(":memory:")
+    cache.put("a", "response")
+
+    assert cache.get("a") == "response"
+    assert cache.get("b") is None
+    assert cache.stats() == {"hits": 1, "misses": 1, "hit_rate": 0.5, "entries": 1, "evictions": 0}
+    cache.close()
+
+
+def test_least_recently_used_entry_is_evicted():
+    cache = ResponseCache(":memory:", max_entries=2)
+    cache.put("a", "1")
+    cache.put("b", "2")
+    cache.get("a")   # b 成为最久未访问的条目
+
+    cache.put("c", "3")
+
+    assert cache.get("b") is None
+    assert cache.get("a") == "1" and cache.get("c") == "3"
+    assert cache.stats()["evictions"] == 1
+    cache.close()
+
+
+def test_access_times_survive_reopening(tmp_path):
+    path = str(tmp_path / "responses.sqlite")
+    cache = ResponseCache(path, max_entries=2, access_batch=1000)
+    cache.put("a", "1")
+    cache.put("b", "2")
+    cache.get("a")   # 访问时间只在内存中, close 时写回
+    cache.close()
+
+    cache = ResponseCache(path, max_entries=2)
+    assert cache.stats()["entries"] == 2
+    cache.put("c", "3")
+
+    assert cache.get("b") is None
+    assert cache.get("a") == "1"
+    cache.close()
@@ -0,0 +1,41 @@
+import pytest
+
+from llm4mc.utils import resolve_item_name, register_names, block_variants
+from llm4mc.utils.name_utils import closest_name
+
+
+@pytest.mark.parametrize("name, wrong", [
+    ("stairs", "air"),
+    ("chair", "air"),
+    ("honey", "bone"),
+    ("sword", "wood"),
+    ("cotton", "mutton"),
+    ("blocks", "clock"),
+])
+def test_short_words_are_not_fuzzy_matched_to_other_items(name, wrong):
+    assert resolve_item_name(name) != wrong
+
+
+def test_match_must_share_a_prefix_or_token():
+    assert closest_name("stair") is None
+    assert closest_name("cotton") is None
+
+
+@pytest.mark.parametrize("name, expected", [
+    ("diamon_pickaxe", "diamond_pickaxe"),
+    ("iorn_ingot", "iron_ingot"),
+    ("crafting_tabel", "crafting_table"),
+    ("furnce", "furnace"),
+    ("leathr", "leather"),
+    ("oak_logs", "oak_log"),
+])
+def test_typos_are_still_corrected(name, expected):
+    assert resolve_item_name(name) == expected
+
+
+def test_register_names_clears_cached_block_variants():
+    assert block_variants("zorbite_blcok") == ("zorbite_blcok",)
+
+    register_names(["zorbite_block"])
+
+    assert block_variants("zorbite_blcok") == ("zorbite_block",)
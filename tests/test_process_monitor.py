@@ -0,0 +1,35 @@
+import sys
+
+from llm4mc.env.process_monitor import SubprocessMonitor
+
+PRINT_LINES = "for i in range(10): print(f'line {i}', flush=True)"
+
+
+def run_to_exit(monitor):
+    monitor.run()
+    monitor.thread.join(timeout=10)   # 等待子进程输出结束
+
+
+def test_ring_buffer_keeps_the_last_lines(tmp_path):
+    monitor = SubprocessMonitor([sys.executable, "-c", PRINT_LINES], "test-ring", ready_match=r"line 9",
+                                log_path=str(tmp_path), ring_size=4)
+    run_to_exit(monitor)
+    monitor.close()
+
+    assert monitor.ready_line == "line 9"
+    assert monitor.recent_lines() == ["line 6", "line 7", "line 8", "line 9"]
+    assert monitor.recent_lines(2) == ["line 8", "line 9"]
+    assert monitor.stats() == {"lines": 10, "log_dropped": 0, "ring_dropped": 6, "log_pending": 0}
+
+
+def test_logs_are_appended_after_run_again(tmp_path):
+    monitor = SubprocessMonitor([sys.executable, "-c", PRINT_LINES], "test-rerun", ready_match=r"line 0",
+                                log_path=str(tmp_path))
+    run_to_exit(monitor)
+    monitor.close()
+    run_to_exit(monitor)   # close 之后可以再次 run
+    monitor.close()
+
+    log = open(monitor.log_file).read()
+    assert log.count("line 9") == 2
+    assert monitor.stats()["lines"] == 20
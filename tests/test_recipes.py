@@ -0,0 +1,38 @@
+from llm4mc.agents.recipes import RecipeGraph
+from llm4mc.mock.mineflayer_server import FakeWorld
+
+
+def test_search_targets_use_the_block_an_item_drops_from():
+    graph = RecipeGraph()
+
+    assert graph.search_targets("cobblestone") == ["stone"]
+    assert graph.search_targets("lapis_lazuli") == ["lapis_ore", "deepslate_lapis_ore"]
+    assert graph.search_targets("coal") == ["coal_ore", "deepslate_coal_ore"]
+
+
+def test_search_targets_use_the_mob_an_item_drops_from():
+    graph = RecipeGraph()
+
+    assert graph.search_targets("leather") == ["cow"]
+    assert graph.search_targets("string") == ["spider"]
+
+
+def test_search_targets_accept_any_log():
+    graph = RecipeGraph()
+
+    targets = graph.search_targets("birch_log")
+    assert targets[0] == "birch_log"
+    assert set(targets) == {f"{wood}_log" for wood in ["oak", "spruce", "birch", "jungle", "acacia",
+                                                        "dark_oak", "mangrove", "cherry"]}
+    assert set(graph.search_targets("log")) == set(targets)
+
+
+def test_explore_and_mine_finds_cobblestone_through_stone():
+    world = FakeWorld(seed=0)
+    world.add("wooden_pickaxe", 1)
+    targets = RecipeGraph().search_targets("cobblestone")
+
+    chats = world.run(f"await exploreAndMine(bot, {targets!r}, 2, new Vec3(1, 0, 0), 60)".replace("'", '"'))
+
+    assert chats == []
+    assert world.count("cobblestone") == 2
@@ -0,0 +1,94 @@
+import gzip
+
+import pytest
+
+from llm4mc.utils import EventRecorder, json_dump
+
+
+def make_events(step):
+    observation = {
+        "inventory": {f"item_{step}": 1},
+        "status": {"biome": "plains", "elapsedTime": 10, "position": {"x": step, "y": 64, "z": 0}},
+    }
+    return [["observe", observation]]
+
+
+def record(recorder, start, count):
+    for step in range(start, start + count):
+        recorder.record(make_events(step), f"task {step}")
+    recorder.close()
+
+
+def segment_path(tmp_path, name="segment_00000.jsonl"):
+    return tmp_path / "events" / name
+
+
+@pytest.mark.parametrize("compression, extension", [(None, ""), ("gzip", ".gz")])
+def test_resume_truncates_a_torn_last_line(tmp_path, compression, extension):
+    record(EventRecorder(tmp_path, snapshot_every=0, compression=compression), 0, 5)
+
+    path = segment_path(tmp_path, "segment_00000.jsonl" + extension)
+    data = path.read_bytes()
+    if compression:
+        data = gzip.decompress(data)
+    data = data[:-20]   # 崩溃时最后一行只写了一半
+    path.write_bytes(gzip.compress(data) if compression else data)
+
+    recorder = EventRecorder(tmp_path, resume=True, snapshot_every=0, compression=compression)
+    assert recorder.iteration == 4
+    record(recorder, 5, 5)
+
+    assert EventRecorder(tmp_path, resume=True, snapshot_every=0).iteration == 9
+
+
+def state_of(recorder):
+    return recorder.snapshot_state()
+
+
+def test_resume_across_segments(tmp_path):
+    recorder = EventRecorder(tmp_path, segment_size=2, snapshot_every=0)
+    record(recorder, 0, 5)
+
+    resumed = EventRecorder(tmp_path, resume=True, segment_size=2, snapshot_every=0)
+
+    assert [segment["records"] for segment in resumed.manifest["segments"]] == [2, 2, 1]
+    assert state_of(resumed) == state_of(recorder)
+
+
+def test_resume_from_snapshot_replays_only_later_records(tmp_path):
+    recorder = EventRecorder(tmp_path, segment_size=2, snapshot_every=3)
+    record(recorder, 0, 5)
+
+    snapshot = recorder.manifest["snapshot"]
+    assert snapshot["iteration"] == 3 and (snapshot["segment"], snapshot["segment_records"]) == (1, 1)
+    assert len(list((tmp_path / "events").glob("snapshot_*"))) == 1   # 只保留最近一次快照
+
+    resumed = EventRecorder(tmp_path, resume=True, segment_size=2, snapshot_every=3)
+    assert state_of(resumed) == state_of(recorder)
+
+
+def test_resume_with_cutoff_before_the_snapshot_replays_from_the_start(tmp_path):
+    record(EventRecorder(tmp_path, snapshot_every=3), 0, 5)
+
+    recorder = EventRecorder(tmp_path, snapshot_every=3)
+    recorder.resume(cutoff=2)
+
+    assert recorder.iteration == 2
+    assert recorder.item_history == {"item_0", "item_1"}
+
+
+def test_legacy_records_are_migrated_to_a_snapshot(tmp_path):
+    events_dir = tmp_path / "events"
+    events_dir.mkdir()
+    for step in range(3):
+        json_dump(make_events(step), str(events_dir / f"task_{step}_20230705_14070{step}"))
+
+    recorder = EventRecorder(tmp_path, resume=True, snapshot_every=0)
+    assert recorder.iteration == 3
+    assert recorder.manifest["snapshot"]["iteration"] == 3
+    recorder.close()
+
+    # 之后不再读取旧格式的文件
+    for path in events_dir.glob("task_*"):
+        path.unlink()
+    assert EventRecorder(tmp_path, resume=True, snapshot_every=0).item_history == {"item_0", "item_1", "item_2"}
@@ -0,0 +1,80 @@
+import pytest
+
+from llm4mc.utils import (
+    RecordedResponse, ReplayMismatchError, call_recorded, is_replaying, start_recording, start_replay, stop_session,
+)
+
+
+@pytest.fixture(autouse=True)
+def no_session():
+    stop_session()
+    yield
+    stop_session()
+
+
+class FakeResponse:
+    status_code = 200
+
+    def __init__(self, text):
+        self.text = text
+
+
+def record_session(path, calls):
+    start_recording(str(path))
+    for kind, channel, request, response in calls:
+        call_recorded(kind, channel, request, lambda: response)
+    return stop_session()
+
+
+def test_replay_returns_recorded_responses_without_calling(tmp_path):
+    path = tmp_path / "session.jsonl"
+    record_session(path, [
+        ("llm", "action", "prompt", "first"),
+        ("llm", "action", "prompt", "second"),   # 相同请求按记录顺序回放
+        ("llm", "critic", "prompt", "critic"),
+    ])
+
+    replayer = start_replay(str(path))
+    assert is_replaying()
+
+    def fail():
+        raise AssertionError("replay must not send requests")
+
+    assert call_recorded("llm", "critic", "prompt", fail) == "critic"
+    assert call_recorded("llm", "action", "prompt", fail) == "first"
+    assert call_recorded("llm", "action", "prompt", fail) == "second"
+    assert replayer.stats() == {"path": str(path), "served": 3, "fallbacks": 0, "remaining": 0}
+
+
+def test_responses_round_trip_through_encode_and_decode(tmp_path):
+    path = tmp_path / "session.jsonl"
+    start_recording(str(path))
+    call_recorded("env", "/step", {"code": "x"}, lambda: FakeResponse('{"ok": 1}'), encode=RecordedResponse.encode)
+    stop_session()
+
+    start_replay(str(path))
+    res = call_recorded("env", "/step", {"code": "x"}, None, decode=RecordedResponse.decode)
+
+    assert (res.status_code, res.json(), res.content) == (200, {"ok": 1}, b'{"ok": 1}')
+
+
+def test_strict_replay_raises_on_an_unknown_request(tmp_path):
+    path = tmp_path / "session.jsonl"
+    record_session(path, [("llm", "action", "prompt", "first")])
+
+    start_replay(str(path))
+    with pytest.raises(ReplayMismatchError):
+        call_recorded("llm", "action", "another prompt", None)
+
+
+def test_lenient_replay_falls_back_to_the_channel_order(tmp_path):
+    path = tmp_path / "session.jsonl"
+    record_session(path, [("llm", "action", "a", "first"), ("llm", "action", "b", "second")])
+
+    replayer = start_replay(str(path), strict=False)
+
+    assert call_recorded("llm", "action", "changed", None) == "first"
+    assert call_recorded("llm", "action", "b", None) == "second"
+    with pytest.raises(ReplayMismatchError):   # 每条记录只回放一次
+        call_recorded("llm", "action", "a", None)
+    assert replayer.stats()["fallbacks"] == 1
@@ -0,0 +1,28 @@
+import hashlib
+
+from llm4mc.env.skill_registry import SkillRegistry
+
+
+def test_same_programs_get_the_same_content_hash():
+    registry = SkillRegistry()
+
+    skill_hash = registry.register("async function a(bot) {}")
+
+    assert skill_hash == hashlib.sha256(b"async function a(bot) {}").hexdigest()
+    assert registry.register("async function a(bot) {}") == skill_hash
+    assert registry.register("async function b(bot) {}") != skill_hash
+    assert registry.programs[skill_hash] == "async function a(bot) {}"
+
+
+def test_invalidate_forgets_uploads_but_keeps_hashes():
+    registry = SkillRegistry()
+    skill_hash = registry.register("async function a(bot) {}")
+
+    assert not registry.is_uploaded(skill_hash)
+    registry.mark_uploaded(skill_hash)
+    assert registry.is_uploaded(skill_hash)
+
+    registry.invalidate()   # mineflayer 进程重启
+
+    assert not registry.is_uploaded(skill_hash)
+    assert registry.register("async function a(bot) {}") == skill_hash
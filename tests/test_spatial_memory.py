@@ -0,0 +1,12 @@
+from llm4mc.env.spatial_memory import SpatialMemory
+
+
+def test_evicted_cells_return_to_the_frontier():
+    memory = SpatialMemory(cell_size=16, max_cells=2)
+    for x in (0, 16, 32):
+        memory.update(["oak_log"] if x == 0 else ["stone"], {"x": x, "y": 64, "z": 0})
+
+    assert (0, 4, 0) not in memory.cells
+    assert (0, 4, 0) in memory.frontier
+    assert memory.nearest(["oak_log"], {"x": 0, "y": 64, "z": 0}) is None
+    assert memory.nearest_frontier({"x": 8, "y": 72, "z": 8}) == [8.0, 72.0, 8.0]
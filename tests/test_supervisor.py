@@ -0,0 +1,56 @@
+import pytest
+
+from llm4mc.env import supervisor
+from llm4mc.env.supervisor import ProcessSupervisor, RestartBudgetExceeded, backoff_delay
+
+
+def test_backoff_doubles_up_to_the_cap():
+    assert [backoff_delay(attempt) for attempt in range(1, 5)] == [0.5, 1.0, 2.0, 4.0]
+    assert backoff_delay(10) == 30.0
+    assert backoff_delay(3, base=1, cap=3) == 3
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    now = [1000.0]
+    monkeypatch.setattr(supervisor.time, "monotonic", lambda: now[0])
+    return now
+
+
+def test_take_restart_gives_up_once_the_budget_is_spent(clock):
+    # start() 没有调用, env 不会被访问
+    sup = ProcessSupervisor(env=None, restart_budget=2, budget_window=60)
+    sup.take_restart("exited")
+    sup.take_restart("exited")
+
+    with pytest.raises(RestartBudgetExceeded, match="2 times in 60s"):
+        sup.take_restart("step hung")
+    assert sup.exhausted
+    assert sup.stats()["restarts_in_window"] == 2
+
+
+def test_restarts_outside_the_window_are_forgotten(clock):
+    sup = ProcessSupervisor(env=None, restart_budget=2, budget_window=60)
+    sup.take_restart("exited")
+    clock[0] += 30
+    sup.take_restart("exited")
+
+    clock[0] += 31   # 第一次重启已超出时间窗口
+    sup.take_restart("exited")
+
+    assert not sup.exhausted
+    assert sup.stats()["restarts_in_window"] == 2
+
+
+def test_record_recovery_measures_time_from_detection(clock):
+    sup = ProcessSupervisor(env=None)
+    sup.last_healthy = clock[0]
+    detected_at = clock[0] + 5
+    clock[0] += 8
+
+    sup.record_recovery("exited", detected_at, attempts=1)
+
+    stats = sup.stats()
+    assert (stats["recoveries"], stats["mean_time_to_recover"]) == (1, 3.0)
+    assert stats["last_recoveries"][0]["downtime"] == 8.0
+    assert sup.last_healthy == clock[0]
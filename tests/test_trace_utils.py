@@ -0,0 +1,81 @@
+import json
+
+import pytest
+
+from llm4mc.utils import disable_tracing, enable_tracing, get_tracer, span, traced
+
+
+@pytest.fixture
+def tracer():
+    disable_tracing()
+    yield enable_tracing()
+    disable_tracing()
+
+
+def test_nested_spans_record_their_parent_and_attributes(tracer):
+    with span("agent.step", task="mine") as outer:
+        with span("env.step") as inner:
+            inner.set(response_bytes=10)
+
+    inner_record, outer_record = tracer.take_spans()
+    assert inner_record["parent"] == outer_record["id"] and outer_record["parent"] is None
+    assert outer_record["attrs"] == {"task": "mine"}
+    assert inner_record["attrs"] == {"response_bytes": 10}
+    assert outer_record["dur_us"] >= inner_record["dur_us"]
+
+
+def test_span_records_the_exception_type(tracer):
+    with pytest.raises(ValueError):
+        with span("env.step"):
+            raise ValueError
+
+    assert tracer.take_spans()[0]["attrs"] == {"error": "ValueError"}
+
+
+def test_take_spans_clears_but_summary_keeps_counting(tracer):
+    @traced("llm.call")
+    def call():
+        return 1
+
+    call()
+    assert len(tracer.take_spans()) == 1
+    call()
+
+    assert len(tracer.take_spans()) == 1
+    assert tracer.take_spans() == []
+    assert tracer.summary()["llm.call"]["count"] == 2
+
+
+def test_exports_append_to_existing_files(tmp_path, tracer):
+    jsonl_path = tmp_path / "trace" / "spans.jsonl"
+    chrome_path = tmp_path / "trace" / "trace.json"
+
+    for name in ["first", "second"]:
+        with span(name):
+            pass
+        spans = tracer.take_spans()
+        tracer.export_jsonl(str(jsonl_path), spans, append=True)
+        tracer.export_chrome(str(chrome_path), spans, append=True)
+
+    assert [json.loads(line)["name"] for line in jsonl_path.read_text().splitlines()] == ["first", "second"]
+
+    # 未闭合的 JSON Array, 补上 "]" 即可解析
+    text = chrome_path.read_text()
+    assert text.startswith("[\n") and text.count("[\n") == 1
+    events = json.loads(text.rstrip().rstrip(",") + "]")
+    assert [(event["name"], event["ph"]) for event in events] == [("first", "X"), ("second", "X")]
+
+
+def test_disabled_tracing_records_nothing():
+    disable_tracing()
+
+    @traced("llm.call")
+    def call():
+        return 1
+
+    with span("env.step") as s:
+        s.set(response_bytes=10)
+
+    assert call() == 1
+    assert get_tracer() is None
+    assert span("env.step") is span("agent.step")   # 共享的空对象
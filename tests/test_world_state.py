@@ -0,0 +1,79 @@
+import json
+import shutil
+import subprocess
+from pathlib import Path
+
+import pytest
+
+from llm4mc.env.world_state import WorldState, SequenceGapError
+
+DELTA_JS = Path(__file__).resolve().parent.parent / "env" / "mineflayer" / "lib" / "observation" / "delta.js"
+
+
+def observation(**extra):
+    return dict({"status": {"health": 20, "food": 20}, "inventory": {"oak_log": 1}, "voxels": ["dirt"]}, **extra)
+
+
+def test_delta_deletes_a_top_level_key_that_disappears():
+    state = WorldState()
+    state.apply(dict(observation(chests={"1": "Unknown"}), **{"$seq": 1, "$base": None}))
+
+    result = state.apply({"$seq": 2, "$base": 1, "$del": ["chests"], "voxels": {"$add": ["stone"], "$del": []}})
+
+    assert result == dict(observation(), voxels=["dirt", "stone"])
+
+
+def test_deltas_of_every_event_are_applied_in_order():
+    state = WorldState()
+    state.apply(dict(observation(), **{"$seq": 1, "$base": None}))
+
+    chat = state.apply({"$seq": 2, "$base": 1, "onChat": "hi"})
+    final = state.apply({"$seq": 3, "$base": 2, "$del": ["onChat"], "inventory": {"$del": ["oak_log"]}})
+
+    assert chat == observation(onChat="hi")
+    assert final == observation(inventory={})
+
+
+def test_earlier_observations_are_not_changed_by_later_deltas():
+    state = WorldState()
+    first = state.apply(dict(observation(), **{"$seq": 1, "$base": None}))
+
+    second = state.apply({"$seq": 2, "$base": 1, "inventory": {"stick": 2}, "voxels": {"$add": ["stone"]}})
+
+    assert first == observation()
+    assert second["inventory"] == {"oak_log": 1, "stick": 2}
+    assert second["status"] is first["status"]   # 没有变化的部分共用
+
+
+def test_delta_on_a_stale_base_raises():
+    state = WorldState()
+    state.apply(dict(observation(), **{"$seq": 1, "$base": None}))
+
+    with pytest.raises(SequenceGapError):
+        state.apply({"$seq": 5, "$base": 4})
+    assert state.seq is None
+
+
+@pytest.mark.skipif(shutil.which("node") is None, reason="node is not installed")
+def test_mirror_matches_the_server_encoding():
+    steps = [
+        [["observe", observation(chests={"1": "Unknown"})]],
+        [["onChat", observation(onChat="hi")], ["observe", observation(inventory={}, voxels=["stone"])]],
+        [["observe", {"inventory": {"stick": 2}}]],   # 只请求了 inventory
+    ]
+    script = (
+        f"const {{ encodeDelta }} = require({json.dumps(str(DELTA_JS))});"
+        "const bot = {}; let ack = null;"
+        "const steps = JSON.parse(require('fs').readFileSync(0, 'utf8'));"
+        "console.log(JSON.stringify(steps.map((events) => {"
+        "    const encoded = encodeDelta(bot, events, ack); ack = bot.deltaState.seq; return encoded;"
+        "})));"
+    )
+    encoded = json.loads(subprocess.run(
+        ["node", "-e", script], input=json.dumps(steps), capture_output=True, text=True, check=True
+    ).stdout)
+
+    state = WorldState()
+    for events, sent in zip(steps, encoded):
+        assert [state.apply(event) for _, event in sent] == [event for _, event in events]
+    assert encoded[2][0][1]["$del"] == ["status", "voxels"]
@@ -0,0 +1,86 @@
+import gzip
+import importlib.util
+
+import pytest
+
+from llm4mc.utils import BackgroundWriter, json_dump, json_load, open_compressed
+
+COMPRESSIONS = [
+    None,
+    "gzip",
+    pytest.param("zstd", marks=pytest.mark.skipif(importlib.util.find_spec("zstandard") is None,
+                                                   reason="zstandard is not installed")),
+]
+EXTENSIONS = {None: "", "gzip": ".gz", "zstd": ".zst"}
+
+
+@pytest.mark.parametrize("compression", COMPRESSIONS)
+def test_json_dump_round_trip(tmp_path, compression):
+    path = str(tmp_path / f"data.json{EXTENSIONS[compression]}")
+    data = {"inventory": {"oak_log": 3}, "voxels": ["dirt", "stone"]}
+
+    json_dump(data, path)
+
+    assert json_load(path) == data
+
+
+def test_gzip_extension_writes_a_gzip_stream(tmp_path):
+    path = tmp_path / "data.json.gz"
+
+    json_dump({"a": 1}, str(path))
+
+    assert gzip.decompress(path.read_bytes()) == b'{"a": 1}'
+
+
+@pytest.mark.parametrize("compression", COMPRESSIONS)
+def test_appended_lines_are_read_back_in_order(tmp_path, compression):
+    path = str(tmp_path / f"lines.jsonl{EXTENSIONS[compression]}")
+
+    writer = BackgroundWriter()
+    for index in range(3):
+        writer.append_line(path, str(index))
+    writer.flush(close_files=True)
+    writer.append_line(path, "3")   # 重新打开后追加, 压缩文件中是新的压缩帧
+    writer.close()
+
+    with open_compressed(path, "r") as fp:
+        assert [line.strip() for line in fp] == ["0", "1", "2", "3"]
+
+
+def test_tasks_run_in_submission_order(tmp_path):
+    order = []
+    writer = BackgroundWriter()
+    for index in range(100):
+        writer.submit(order.append, index)
+    writer.flush()
+
+    assert order == list(range(100))
+    assert writer.stats()["submitted"] == 101   # 包括 flush 提交的任务
+    writer.close()
+
+
+def test_flush_raises_the_first_error_once():
+    def fail(message):
+        raise ValueError(message)
+
+    writer = BackgroundWriter()
+    writer.submit(fail, "first")
+    writer.submit(fail, "second")
+
+    with pytest.raises(ValueError, match="first"):
+        writer.flush()
+    writer.flush()   # 异常只抛出一次
+    writer.close()
+
+
+def test_close_raises_a_pending_error_and_rejects_new_tasks():
+    def fail():
+        raise OSError("disk full")
+
+    writer = BackgroundWriter()
+    writer.submit(fail)
+
+    with pytest.raises(OSError, match="disk full"):
+        writer.close()
+    with pytest.raises(RuntimeError):
+        writer.submit(print)
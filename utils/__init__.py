@@ -1,3 +1,15 @@
 from .file_utils import *
 from .json_utils import *
 from .record_utils import EventRecorder
+from .cache_utils import ResponseCache
+from .concurrency_utils import run_parallel, submit_captured, fanout_stats
+from .name_utils import (
+    canonical_item_name, resolve_item_name, singular_underscore, norm_name, register_names, block_variants
+)
+from .observation_utils import Observation, EventList
+from .trace_utils import Tracer, span, traced, enable_tracing, disable_tracing, get_tracer
+from .replay_utils import (
+    Recorder, Replayer, RecordedResponse, ReplayMismatchError, start_recording, start_replay, stop_session,
+    get_session, is_replaying, call_recorded
+)
+from .writer_utils import BackgroundWriter
@@ -0,0 +1,116 @@
+import time
+import sqlite3
+import hashlib
+import threading
+
+from .file_utils import f_mkdir_in_path, get_dir
+
+
+class ResponseCache:
+    def __init__(self, path="cache/responses.sqlite", max_entries=10000, access_batch=256):
+        """ 基于 sqlite 的 LLM 响应缓存, 按最近访问时间做 LRU 淘汰, 只应给确定性 (temperature=0) 的 agent 使用
+
+        命中时只在内存中记录访问时间, 淘汰前、累计 access_batch 条或 close 时才一次性写回, 命中不再每次提交事务
+
+        :param path: sqlite 文件路径, ":memory:" 表示只在内存中缓存
+        :param max_entries: 最大缓存条目数, 超出后淘汰最久未访问的条目
+        :param access_batch: 累计多少条访问时间后写回
+        """
+        if path != ":memory:" and get_dir(path):
+            f_mkdir_in_path(path)
+
+        self.path = path
+        self.max_entries = max_entries
+        self.access_batch = access_batch
+        self.accessed = {}   # 键 -> 还没有写回的最近访问时间
+
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+        self.lock = threading.Lock()   # 多个 agent 线程可能共用一个缓存
+        self.conn = sqlite3.connect(path, check_same_thread=False)
+        self.conn.execute(
+            "CREATE TABLE IF NOT EXISTS responses ("
+            "key TEXT PRIMARY KEY, response TEXT NOT NULL, last_access INTEGER NOT NULL)"
+        )
+        self.conn.execute("CREATE INDEX IF NOT EXISTS responses_last_access ON responses (last_access)")
+        self.conn.commit()
+
+        self.entries = self.conn.execute("SELECT COUNT(*) FROM responses").fetchone()[0]
+
+    @classmethod
+    def make_key(cls, model, temperature, system_prompt, human_message):
+        """ 缓存键: 模型, 温度, 系统提示词哈希, 渲染后的用户消息
+
+        :return: sha256 十六进制字符串
+        """
+        prompt_hash = hashlib.sha256(system_prompt.encode("utf-8")).hexdigest()
+        raw_key = "\x1f".join([str(model), str(temperature), prompt_hash, human_message])
+
+        return hashlib.sha256(raw_key.encode("utf-8")).hexdigest()
+
+    def get(self, key):
+        with self.lock:
+            row = self.conn.execute("SELECT response FROM responses WHERE key = ?", (key,)).fetchone()
+
+            if row is None:
+                self.misses += 1
+                return None
+
+            self.accessed[key] = time.time_ns()
+            if len(self.accessed) >= self.access_batch:
+                self.flush_access()
+                self.conn.commit()
+            self.hits += 1
+
+            return row[0]
+
+    def flush_access(self):
+        """ 把内存中的访问时间写回数据库, 调用方持有 self.lock 并负责提交 """
+        if not self.accessed:
+            return
+
+        self.conn.executemany(
+            "UPDATE responses SET last_access = ? WHERE key = ?",
+            [(last_access, key) for key, last_access in self.accessed.items()]
+        )
+        self.accessed.clear()
+
+    def put(self, key, response):
+        with self.lock:
+            cursor = self.conn.execute(
+                "INSERT OR IGNORE INTO responses (key, response, last_access) VALUES (?, ?, ?)",
+                (key, response, time.time_ns())
+            )
+            self.entries += cursor.rowcount
+
+            if self.entries > self.max_entries:
+                self.flush_access()   # 按最新的访问时间淘汰
+                overflow = self.entries - self.max_entries
+                self.conn.execute(
+                    "DELETE FROM responses WHERE key IN "
+                    "(SELECT key FROM responses ORDER BY last_access ASC LIMIT ?)",
+                    (overflow,)
+                )
+                self.entries -= overflow
+                self.evictions += overflow
+
+            self.conn.commit()
+
+    def stats(self):
+        total = self.hits + self.misses
+
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": self.hits / total if total else 0.0,
+            "entries": self.entries,
+            "evictions": self.evictions,
+        }
+
+    def close(self):
+        with self.lock:
+            self.flush_access()
+            self.conn.commit()
+            self.conn.close()
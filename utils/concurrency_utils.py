@@ -0,0 +1,142 @@
+import io
+import sys
+import threading
+from contextlib import contextmanager
+from concurrent.futures import ThreadPoolExecutor
+
+_executor = None
+_executor_lock = threading.Lock()
+
+_calls = {"submitted": 0, "discarded": 0}   # 提交的调用数, 其中被放弃 (推测执行未被采用) 的调用数
+
+_stdout = None        # 有调用正在捕获输出时安装的 _ThreadLocalStdout
+_capturing = 0        # 正在捕获输出的调用数
+_stdout_lock = threading.Lock()
+
+
+class _ThreadLocalStdout:
+    """ 替换 sys.stdout: 设置了缓冲区的线程写入自己的缓冲区, 其它线程照常输出 """
+
+    def __init__(self, stream):
+        self.stream = stream
+        self.local = threading.local()
+
+    def write(self, text):
+        buffer = getattr(self.local, "buffer", None)
+        if buffer is None:
+            return self.stream.write(text)
+
+        return buffer.write(text)
+
+    def flush(self):
+        if getattr(self.local, "buffer", None) is None:
+            self.stream.flush()
+
+    def __getattr__(self, name):
+        return getattr(self.stream, name)
+
+
+@contextmanager
+def _capture_stdout(buffer):
+    """ 当前线程的输出写入 buffer; sys.stdout 只在有调用正在捕获时被替换, 最后一个调用结束后恢复 """
+    global _stdout, _capturing
+
+    with _stdout_lock:
+        if _capturing == 0:
+            _stdout = _ThreadLocalStdout(sys.stdout)
+            sys.stdout = _stdout
+        _capturing += 1
+        stdout = _stdout
+
+    stdout.local.buffer = buffer
+    try:
+        yield buffer
+    finally:
+        stdout.local.buffer = None
+        with _stdout_lock:
+            _capturing -= 1
+            if _capturing == 0:
+                if sys.stdout is stdout:   # 期间被其他代码替换时保留替换后的对象
+                    sys.stdout = stdout.stream
+                _stdout = None
+
+
+def _get_executor(max_workers=8):
+    global _executor
+
+    with _executor_lock:
+        if _executor is None:
+            _executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="llm4mc-fanout")
+
+    return _executor
+
+
+def _run_captured(fn, args, kwargs):
+    result, error = None, None
+    with _capture_stdout(io.StringIO()) as buffer:
+        try:
+            result = fn(*args, **kwargs)
+        except BaseException as e:
+            error = e
+
+    return buffer.getvalue(), result, error
+
+
+class CapturedCall:
+    def __init__(self, future):
+        """ 在线程池中执行的调用, 其控制台输出被暂存, 直到调用方取结果时才按顺序打印 """
+        self.future = future
+        self.replayed = False
+
+    def result(self):
+        """ 等待调用结束, 打印它的输出, 返回结果或抛出它的异常 """
+        output, result, error = self.future.result()
+
+        if not self.replayed:
+            self.replayed = True
+            sys.stdout.write(output)
+
+        if error is not None:
+            raise error
+
+        return result
+
+    def discard(self):
+        """ 放弃结果 (推测执行未被采用), 输出不会被打印; 调用已经发出, 计入 fanout_stats 的 discarded """
+        if not self.replayed:
+            _calls["discarded"] += 1
+        self.replayed = True
+
+
+def submit_captured(fn, *args, **kwargs):
+    """ 提交一个调用到共享线程池
+
+    :param fn: 函数
+    :param args: 位置参数
+    :param kwargs: 关键字参数
+    :return: CapturedCall
+    """
+    executor = _get_executor()
+    _calls["submitted"] += 1
+
+    return CapturedCall(executor.submit(_run_captured, fn, args, kwargs))
+
+
+def fanout_stats():
+    """ 提交到线程池的调用数, 以及其中被放弃的调用数 (已经付出的开销, 例如一次 LLM 请求) """
+    return dict(_calls)
+
+
+def run_parallel(*calls):
+    """ 并行执行多个互不依赖的无参调用, 按提交顺序打印各自的输出并返回结果
+
+    :param calls: 无参可调用对象, 可用 functools.partial 绑定参数
+    :return: 结果列表, 与 calls 顺序一致
+    """
+    captured = [submit_captured(call) for call in calls]
+
+    results = []
+    for call in captured:
+        results.append(call.result())
+
+    return results
@@ -1,9 +1,70 @@
 # TODO 修改命名法
 
+import io
 import re
+import gzip
 import json
 from .file_utils import f_join
 
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+try:
+    import zstandard
+except ImportError:
+    zstandard = None
+
+# 压缩格式 -> 文件扩展名
+COMPRESSION_EXTENSIONS = {"gzip": ".gz", "zstd": ".zst"}
+
+
+def compression_of(fpath):
+    """ 按扩展名判断压缩格式
+
+    :return: gzip, zstd 或 None
+    """
+    for compression, ext in COMPRESSION_EXTENSIONS.items():
+        if fpath.endswith(ext):
+            return compression
+
+    return None
+
+
+def open_compressed(fpath, mode="r", compression=None, level=None):
+    """ 打开可能压缩的文本文件, 压缩格式默认按扩展名判断 (.gz / .zst), 追加模式下每次打开写入一个新的压缩帧
+
+    :param fpath: 文件路径
+    :param mode: r, w 或 a (文本模式)
+    :param compression: gzip, zstd 或 None
+    :param level: 压缩级别, 默认 gzip 6, zstd 3
+    :return: 文件对象
+    """
+    compression = compression or compression_of(fpath)
+
+    if compression == "gzip":
+        return gzip.open(fpath, mode + "t", encoding="utf-8", compresslevel=6 if level is None else level)
+
+    if compression == "zstd":
+        if zstandard is None:
+            raise ImportError("zstd compression requires the zstandard package: pip install zstandard")
+
+        if mode == "r":
+            reader = zstandard.ZstdDecompressor().stream_reader(open(fpath, "rb"), read_across_frames=True,
+                                                               closefd=True)
+            return io.TextIOWrapper(reader, encoding="utf-8")
+
+        writer = zstandard.ZstdCompressor(level=3 if level is None else level).stream_writer(
+            open(fpath, mode + "b"), closefd=True
+        )
+        return io.TextIOWrapper(writer, encoding="utf-8")
+
+    if compression is not None:
+        raise ValueError(f"Unknown compression {compression}")
+
+    return open(fpath, mode, encoding="utf-8")
+
 
 def json_load(*filepaths, **kwargs):
     """ 加载 json 文件, load from file
@@ -13,7 +74,7 @@ def json_load(*filepaths, **kwargs):
     :return: 加载后的 json 文件
     """
     fpath = f_join(filepaths)
-    with open(fpath, "r") as fp:
+    with open_compressed(fpath, "r") as fp:
         return json.load(fp, **kwargs)
 
 
@@ -27,16 +88,29 @@ def json_loads(string, **kwargs):
     return json.loads(string, **kwargs)
 
 
-def json_dump(data, *filepaths, **kwargs):
-    """ 保存为 json 文件
+def json_loads_fast(data):
+    """ 加载 json 字符串或 bytes, 安装了 orjson 时使用 orjson, 否则使用标准库
+
+    :param data: json 字符串或 bytes
+    :return: 加载后的数据
+    """
+    if orjson is not None:
+        return orjson.loads(data)
+
+    return json.loads(data)
+
+
+def json_dump(data, *filepaths, compression=None, **kwargs):
+    """ 保存为 json 文件, 路径以 .gz / .zst 结尾时压缩保存
 
     :param data: 要保存的数据
     :param filepaths: 保存的路径
+    :param compression: gzip, zstd 或 None, 默认按扩展名判断
     :param kwargs: other
     :return: None
     """
     fpath = f_join(filepaths)
-    with open(fpath, "w") as fp:
+    with open_compressed(fpath, "w", compression=compression) as fp:
         json.dump(data, fp, **kwargs)
 
 
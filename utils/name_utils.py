@@ -0,0 +1,261 @@
+from functools import lru_cache
+
+import inflect
+
+_inflect_engine = inflect.engine()
+
+WOOD_TYPES = ["oak", "spruce", "birch", "jungle", "acacia", "dark_oak", "mangrove", "cherry"]
+COLORS = [
+    "white", "orange", "magenta", "light_blue", "yellow", "lime", "pink", "gray",
+    "light_gray", "cyan", "purple", "blue", "brown", "green", "red", "black",
+]
+ORES = ["coal", "iron", "gold", "copper", "diamond", "emerald", "lapis", "redstone"]
+
+# LLM 常用的非标准名称 -> Minecraft 中的名称
+NAME_ALIASES = {
+    "wood_planks": "oak_planks",
+    "wooden_planks": "oak_planks",
+    "wood_log": "oak_log",
+    "wooden_log": "oak_log",
+    "gold_pickaxe": "golden_pickaxe",
+    "gold_axe": "golden_axe",
+    "gold_shovel": "golden_shovel",
+    "gold_sword": "golden_sword",
+    "gold_hoe": "golden_hoe",
+    "wood_pickaxe": "wooden_pickaxe",
+    "wood_axe": "wooden_axe",
+    "wood_shovel": "wooden_shovel",
+    "wood_sword": "wooden_sword",
+    "wood_hoe": "wooden_hoe",
+    "workbench": "crafting_table",
+    "lapis_lazuli_ore": "lapis_ore",
+    "cobble": "cobblestone",
+}
+
+
+def _build_vocabulary():
+    """ 常用的 Minecraft 物品 / 方块名, 以及 agents 中表示一类物品的名称 (planks, log) """
+    names = {
+        # 一类物品
+        "planks", "log", "wood", "leaves", "wool", "bed", "boat", "fuel", "stone", "ore", "ingot",
+        # 方块
+        "air", "dirt", "grass_block", "grass", "tall_grass", "fern", "sand", "red_sand", "gravel", "clay",
+        "stone", "cobblestone", "mossy_cobblestone", "granite", "diorite", "andesite", "deepslate",
+        "cobbled_deepslate", "tuff", "calcite", "bedrock", "obsidian", "netherrack", "water", "lava",
+        "snow", "snow_block", "ice", "sandstone", "mud", "podzol", "mycelium", "coarse_dirt",
+        "sugar_cane", "cactus", "pumpkin", "melon", "vine", "lily_pad", "dandelion", "poppy",
+        "brown_mushroom", "red_mushroom", "glass", "glass_pane", "bricks", "stone_bricks", "torch",
+        "crafting_table", "furnace", "blast_furnace", "smoker", "chest", "barrel", "ladder",
+        "bookshelf", "jukebox", "anvil", "cauldron", "hopper", "dispenser", "dropper", "lever",
+        "tripwire_hook", "rail", "tnt", "scaffolding", "campfire", "lantern", "composter",
+        "iron_door", "iron_bars", "iron_block", "gold_block", "diamond_block", "coal_block",
+        "copper_block", "redstone_block", "lapis_block", "emerald_block", "spawner",
+        # 物品
+        "stick", "coal", "charcoal", "raw_iron", "raw_gold", "raw_copper", "iron_ingot",
+        "gold_ingot", "copper_ingot", "iron_nugget", "gold_nugget", "diamond", "emerald",
+        "lapis_lazuli", "redstone", "flint", "flint_and_steel", "string", "feather", "leather",
+        "paper", "book", "bone", "bone_meal", "gunpowder", "arrow", "bow", "crossbow", "shield",
+        "bucket", "water_bucket", "lava_bucket", "milk_bucket", "shears", "compass", "clock",
+        "fishing_rod", "item_frame", "painting", "saddle", "lead", "egg", "sugar", "wheat",
+        "wheat_seeds", "bread", "apple", "golden_apple", "carrot", "potato", "baked_potato",
+        "beef", "cooked_beef", "porkchop", "cooked_porkchop", "chicken", "cooked_chicken",
+        "mutton", "cooked_mutton", "cod", "cooked_cod", "salmon", "cooked_salmon", "rotten_flesh",
+        "spider_eye", "slime_ball", "ender_pearl", "blaze_rod", "snowball", "clay_ball", "brick",
+        "bowl", "mushroom_stew", "map", "glass_bottle",
+        # 生物
+        "cow", "pig", "sheep", "chicken", "horse", "rabbit", "wolf", "zombie", "skeleton",
+        "creeper", "spider", "enderman", "slime", "witch", "villager",
+    }
+
+    for wood in WOOD_TYPES:
+        for suffix in ["log", "wood", "planks", "sapling", "leaves", "door", "trapdoor", "fence", "fence_gate",
+                       "slab", "stairs", "button", "pressure_plate", "sign", "boat"]:
+            names.add(f"{wood}_{suffix}")
+        names.add(f"stripped_{wood}_log")
+
+    for color in COLORS:
+        for suffix in ["wool", "bed", "carpet", "concrete", "terracotta", "stained_glass", "dye", "banner"]:
+            names.add(f"{color}_{suffix}")
+
+    for ore in ORES:
+        names.add(f"{ore}_ore")
+        names.add(f"deepslate_{ore}_ore")
+
+    for tier in ["wooden", "stone", "iron", "golden", "diamond", "netherite"]:
+        for shape in ["pickaxe", "axe", "shovel", "sword", "hoe"]:
+            names.add(f"{tier}_{shape}")
+
+    for tier in ["leather", "chainmail", "iron", "golden", "diamond", "netherite"]:
+        for shape in ["helmet", "chestplate", "leggings", "boots"]:
+            names.add(f"{tier}_{shape}")
+
+    for stone in ["stone", "cobblestone", "sandstone", "stone_brick", "brick"]:
+        names.add(f"{stone}_slab")
+        names.add(f"{stone}_stairs")
+
+    return frozenset(names)
+
+
+VOCABULARY = _build_vocabulary()
+
+_extra_names = set()
+_names_by_length = {}   # 长度 -> 名称列表, 模糊匹配时只比较长度相近的名称
+
+
+def register_names(names):
+    """ 向词表中加入额外的名称 (例如配方图中的物品), 会清空缓存 """
+    _extra_names.update(names)
+    _names_by_length.clear()
+    canonical_item_name.cache_clear()
+    resolve_item_name.cache_clear()
+    block_variants.cache_clear()   # 通过 resolve_item_name 依赖词表
+
+
+def _get_names_by_length():
+    if not _names_by_length:
+        for name in VOCABULARY | _extra_names:
+            _names_by_length.setdefault(len(name), []).append(name)
+
+    return _names_by_length
+
+
+def is_known_name(name):
+    return name in VOCABULARY or name in _extra_names
+
+
+@lru_cache(maxsize=4096)
+def singular_underscore(key):
+    """ 小写、空格替换为下划线并转为单数 """
+    key = key.strip(' .\n').lower().replace(" ", "_")
+
+    singular_key = _inflect_engine.singular_noun(key)
+
+    return singular_key if singular_key else key
+
+
+def norm_name(item_name):
+    if item_name.endswith('plank'):
+        item_name += 's'
+
+    return item_name
+
+
+@lru_cache(maxsize=4096)
+def canonical_item_name(name):
+    """ 物品名规范化: 词表中已有的名称保持不变 (避免 grass -> gras, oak_leaves -> oak_leaf),
+    其余与各 agent 原先的 norm_name(singular_underscore(name)) 一致
+
+    :param name: 物品名, 可以是复数、带空格或大写
+    :return: 小写、下划线连接的单数名称, planks 保持复数
+    """
+    key = name.strip(' .\n').lower().replace(" ", "_")
+    if is_known_name(key):
+        return key
+
+    return norm_name(singular_underscore(key))
+
+
+def edit_distance(a, b, limit):
+    """ Levenshtein 距离, 超过 limit 时提前返回 limit + 1 """
+    if abs(len(a) - len(b)) > limit:
+        return limit + 1
+
+    previous = list(range(len(b) + 1))
+    for i, char_a in enumerate(a, 1):
+        current = [i]
+        for j, char_b in enumerate(b, 1):
+            current.append(min(
+                previous[j] + 1,
+                current[j - 1] + 1,
+                previous[j - 1] + (char_a != char_b),
+            ))
+        if min(current) > limit:
+            return limit + 1
+        previous = current
+
+    return previous[-1]
+
+
+def allowed_distance(name, max_distance=2):
+    """ 允许的编辑距离随长度增长: 8 个字符以下只允许 1 处错误, 否则短单词很容易被改成另一个词 (stairs -> air) """
+    return min(max_distance, 1 if len(name) < 8 else 2)
+
+
+def shares_prefix_or_token(a, b):
+    """ 两个名称开头两个字符相同, 或者有相同的下划线分隔的单词 """
+    return a[:2] == b[:2] or bool(set(a.split("_")) & set(b.split("_")))
+
+
+def closest_name(name, max_distance=2, min_length=5):
+    """ 在词表中查找与 name 编辑距离最小且唯一的名称, 用于纠正 LLM 的拼写错误
+
+    允许的距离见 allowed_distance, 与 name 没有相同前缀或单词的候选不采用
+
+    :return: 名称, 没有足够接近或有多个同样接近的候选时返回 None
+    """
+    if len(name) < min_length:
+        return None
+
+    max_distance = allowed_distance(name, max_distance)
+    names_by_length = _get_names_by_length()
+
+    best, best_distance, tied = None, max_distance + 1, False
+    for length in range(len(name) - max_distance, len(name) + max_distance + 1):
+        for candidate in names_by_length.get(length, ()):
+            if not shares_prefix_or_token(name, candidate):
+                continue
+
+            distance = edit_distance(name, candidate, best_distance)
+            if distance < best_distance:
+                best, best_distance, tied = candidate, distance, False
+            elif distance == best_distance and distance <= max_distance:
+                tied = True
+
+    return None if tied else best
+
+
+@lru_cache(maxsize=4096)
+def resolve_item_name(name):
+    """ 把 LLM 给出的名称映射到词表中的名称: 规范化 -> 别名 -> 模糊匹配, 都不命中时返回规范化后的名称 """
+    key = name.strip(' .\n').lower().replace(" ", "_")
+
+    canonical = canonical_item_name(name)
+    if is_known_name(canonical):
+        return canonical
+
+    for candidate in (key, canonical):
+        if candidate in NAME_ALIASES:
+            return NAME_ALIASES[candidate]
+
+    return closest_name(canonical) or canonical
+
+
+# 一类方块 -> 其中的具体方块, 搜索任意一种即可
+BLOCK_GROUPS = {
+    "log": [f"{wood}_log" for wood in WOOD_TYPES],
+    "wood": [f"{wood}_log" for wood in WOOD_TYPES],
+    "leaves": [f"{wood}_leaves" for wood in WOOD_TYPES],
+}
+
+
+@lru_cache(maxsize=1024)
+def block_variants(name):
+    """ 掉落物相同、可以互相代替的方块: 一类方块展开为具体方块, 矿石 (或矿物本身) 同时包括深板岩矿石
+
+    :return: 方块名元组, 第一个为 name 本身对应的方块
+    """
+    name = resolve_item_name(name)
+
+    if name in BLOCK_GROUPS:
+        return tuple(BLOCK_GROUPS[name])
+
+    ore = name
+    if ore.startswith("raw_"):
+        ore = ore[len("raw_"):]
+    if ore.startswith("deepslate_"):
+        ore = ore[len("deepslate_"):]
+    ore = ore[:-len("_ore")] if ore.endswith("_ore") else ore
+    if ore in ORES:
+        return f"{ore}_ore", f"deepslate_{ore}_ore"
+
+    return name,
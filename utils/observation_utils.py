@@ -0,0 +1,57 @@
+from .name_utils import canonical_item_name
+
+
+class Observation:
+    __slots__ = ("inventory", "inventory_used", "status", "voxels", "voxel_set", "entities", "biome", "position")
+
+    def __init__(self, event):
+        """ 解析后的 observe 事件, 每次 step 只构建一次, 所有 agent 共用
+
+        :param event: events[-1][1]
+        """
+        status = event.get("status", {})
+
+        self.inventory = {}   # 规范化名称 -> 数量
+        for name, count in event.get("inventory", {}).items():
+            if count:
+                item_name = canonical_item_name(name)
+                self.inventory[item_name] = self.inventory.get(item_name, 0) + count
+
+        self.inventory_used = status.get("inventoryUsed")
+        self.status = status
+        self.voxels = event.get("voxels", [])   # 保持服务端顺序, 用于渲染消息
+        self.voxel_set = frozenset(self.voxels)
+        self.entities = status.get("entities", {})
+        self.biome = status.get("biome")
+        self.position = status.get("position")
+
+    @classmethod
+    def of(cls, events):
+        """ 获取 events 的观测, EventList 只解析一次
+
+        :param events: step 返回的事件列表
+        :return: Observation
+        """
+        if isinstance(events, EventList):
+            return events.observation
+
+        assert events[-1][0] == "observe", "Last event must be observe"
+
+        return cls(events[-1][1])
+
+
+class EventList(list):
+    __slots__ = ("_observation",)
+
+    def __init__(self, events=()):
+        """ step 返回的事件列表, 缓存最后一个 observe 事件的解析结果 """
+        super().__init__(events)
+        self._observation = None
+
+    @property
+    def observation(self):
+        if self._observation is None:
+            assert self[-1][0] == "observe", "Last event must be observe"
+            self._observation = Observation(self[-1][1])
+
+        return self._observation
@@ -1,20 +1,55 @@
+import os
 import re
+import copy
+import json
 import time
 
-from .file_utils import f_mkdir, f_listdir, f_join
-from .json_utils import json_dump, json_load
+from .file_utils import f_mkdir, f_listdir, f_join, f_exists
+from .json_utils import json_dump, json_load, open_compressed, compression_of, COMPRESSION_EXTENSIONS
+from .writer_utils import BackgroundWriter
+
+MANIFEST_NAME = "manifest.json"
+SEGMENT_PATTERN = re.compile(r"^segment_\d+\.jsonl(\.gz|\.zst)?$")
 
 
 class EventRecorder:
-    def __init__(self, ckpt_dir="checkpoint", resume=False, init_position=None):
+    def __init__(
+            self,
+            ckpt_dir="checkpoint",
+            resume=False,
+            init_position=None,
+            segment_size=1000,
+            snapshot_every=100,
+            compression=None,
+            background=True,
+            writer=None
+    ):
         """ 情景记录类
 
+        事件按记录顺序追加到 events/segment_xxxxx.jsonl (每行一次 record), events/manifest.json 记录分段列表
+        与最近一次状态快照的位置, resume 只需加载快照并重放快照之后的记录
+
         :param ckpt_dir: 保存路径
         :param resume: 是否加载已经保存的场景 (是否从之前的保存点恢复)
         :param init_position: 初始位置
+        :param segment_size: 每个分段文件的记录数
+        :param snapshot_every: 每记录多少次保存一次状态快照
+        :param compression: 新分段与快照的压缩格式, gzip, zstd 或 None; 已有的文件按扩展名读取
+        :param background: 是否在后台线程写盘, record 不再等待磁盘 I/O
+        :param writer: 可选的共享 BackgroundWriter, 默认 background 时新建一个
         """
+        if compression is not None and compression not in COMPRESSION_EXTENSIONS:
+            raise ValueError(f"Unknown compression {compression}")
+
         self.ckpt_dir = ckpt_dir
         self.init_position = init_position
+        self.segment_size = segment_size
+        self.snapshot_every = snapshot_every
+        self.compression = compression
+        self.extension = COMPRESSION_EXTENSIONS.get(compression, "")
+
+        self.own_writer = writer is None and background
+        self.writer = BackgroundWriter(name="event-recorder") if self.own_writer else writer
 
         self.item_vs_time = {}      # 两个用于记录事件的字典。
         self.item_vs_iter = {}
@@ -25,11 +60,36 @@ class EventRecorder:
         self.elapsed_time = 0       # 已经过去的时间
         self.position_history = [[0, 0]]   # 相对位置历史
 
-        _ = f_mkdir(self.ckpt_dir, "events")   # 创建路径
+        self.events_dir = f_mkdir(self.ckpt_dir, "events")   # 创建路径
+        self.manifest = self.load_manifest()
+        self.segment_fp = None
 
         if resume:
             self.resume()   # 加载已经保存的场景
 
+    def load_manifest(self):
+        path = f_join(self.events_dir, MANIFEST_NAME)
+        if f_exists(path):
+            return json_load(path)
+
+        return {"version": 2, "records": 0, "segments": [], "snapshot": None}
+
+    def write(self, fn, *args):
+        """ 后台模式下交给写线程, 否则直接执行; 参数在提交后不能再被修改 """
+        if self.writer is None:
+            fn(*args)
+        else:
+            self.writer.submit(fn, *args)
+
+    def save_manifest(self):
+        self.write(self.write_manifest, copy.deepcopy(self.manifest))
+
+    def write_manifest(self, manifest):
+        # 先写临时文件再替换, 中途崩溃时不会留下损坏的 manifest
+        path = f_join(self.events_dir, MANIFEST_NAME)
+        json_dump(manifest, path + ".tmp")
+        os.replace(path + ".tmp", path)
+
     def update_elapsed_time(self, event):   # 更新已经过去的时间
         self.elapsed_time += event["status"]["elapsedTime"]
 
@@ -43,23 +103,192 @@ class EventRecorder:
         if not self.init_position:   # 如果位置没有初始化, 利用 events 中第一个事件初始化
             self.init_position = [events[0][1]["status"]["position"]["x"], events[0][1]["status"]["position"]["z"]]
 
-        for event_type, event in events:   # 遍历 events 中每个事件, 更新
-            self.update_items(event)
-            if event_type == "observe":    # 事件类型为 observe, 更新已经过去的时间
-                self.update_elapsed_time(event)
+        self.apply_events(events)    # 与 resume 时的重放一致
         print(
             f"\033[96m****Recorder message: {self.elapsed_time} ticks have elapsed****\033[0m\n"  # 设置为青色、还原为默认色
             f"\033[96m****Recorder message: {self.iteration} iteration passed****\033[0m"
         )
-        json_dump(events, f_join(self.ckpt_dir, "events", task))
+        self.append_record({"task": task, "events": events})
 
-    def resume(self, cutoff=None):
+        if self.snapshot_every and self.manifest["records"] % self.snapshot_every == 0:
+            self.save_snapshot()
+
+    def apply_events(self, events):
+        for event_type, event in events:   # 遍历 events 中每个事件, 更新背包和相对位置
+            self.update_items(event)
+            self.update_position(event)
+            if event_type == "observe":    # 事件类型为 observe, 更新已经过去的时间
+                self.update_elapsed_time(event)
+
+    def append_record(self, record):
+        segments = self.manifest["segments"]
+
+        if not segments or segments[-1]["records"] >= self.segment_size:   # 当前分段已满, 新开一个分段
+            self.close_segment()
+            segments.append({"name": f"segment_{len(segments):05d}.jsonl{self.extension}", "records": 0})
+            self.save_manifest()
+
+        path = f_join(self.events_dir, segments[-1]["name"])
+        if self.writer is not None:   # 在调用方线程中序列化 (之后修改 events 不影响写入的内容), 写线程只负责写盘
+            self.writer.append_line(path, json.dumps(record))
+        else:
+            if self.segment_fp is None:
+                self.segment_fp = open_compressed(path, "a")
+
+            self.segment_fp.write(json.dumps(record) + "\n")
+            self.segment_fp.flush()
+
+        segments[-1]["records"] += 1
+        self.manifest["records"] += 1
+
+    def snapshot_state(self):
+        return {
+            "iteration": self.iteration,
+            "elapsed_time": self.elapsed_time,
+            "init_position": self.init_position,
+            "item_vs_time": [[key, items] for key, items in self.item_vs_time.items()],   # 键是数字, 保存为列表
+            "item_vs_iter": [[key, items] for key, items in self.item_vs_iter.items()],
+            "item_history": sorted(self.item_history),
+            "biome_history": sorted(self.biome_history, key=str),
+            "position_history": self.position_history,
+        }
+
+    def load_state(self, state):
+        self.iteration = state["iteration"]
+        self.elapsed_time = state["elapsed_time"]
+        self.init_position = state["init_position"]
+        self.item_vs_time = {key: items for key, items in state["item_vs_time"]}
+        self.item_vs_iter = {key: items for key, items in state["item_vs_iter"]}
+        self.item_history = set(state["item_history"])
+        self.biome_history = set(state["biome_history"])
+        self.position_history = state["position_history"]
+
+    def save_snapshot(self):
+        """ 保存当前状态, 记录它对应的日志位置 (分段序号, 该分段中已包含的记录数) """
+        segments = self.manifest["segments"]
+        name = f"snapshot_{self.iteration:08d}.json{self.extension}"
+
+        self.write(json_dump, copy.deepcopy(self.snapshot_state()), f_join(self.events_dir, name))
+
+        previous = self.manifest["snapshot"]
+        self.manifest["snapshot"] = {
+            "name": name,
+            "iteration": self.iteration,
+            "records": self.manifest["records"],
+            "segment": len(segments) - 1,
+            "segment_records": segments[-1]["records"] if segments else 0,
+        }
+        self.save_manifest()
+
+        if previous and previous["name"] != name:   # 只保留最近一次快照, 在新的 manifest 写入之后删除
+            self.write(self.remove_file, f_join(self.events_dir, previous["name"]))
+
+    @staticmethod
+    def remove_file(path):
+        try:
+            os.remove(path)
+        except FileNotFoundError:
+            pass
+
+    def read_segment(self, index, skip=0):
+        """ 读取分段中第 skip 条之后的记录; 遇到崩溃时写了一半的行时产生 None 并结束 """
+        path = f_join(self.events_dir, self.manifest["segments"][index]["name"])
+        if not f_exists(path):
+            return
+
+        with open_compressed(path, "r") as fp:
+            try:
+                for line_index, line in enumerate(fp):
+                    if line_index < skip:
+                        continue
+
+                    yield json.loads(line)
+            except (json.JSONDecodeError, EOFError):   # 压缩文件被截断时抛出 EOFError
+                yield None
+
+    def truncate_segment(self, index, records):
+        """ 只保留分段的前 records 条记录, 去掉崩溃时写了一半的行
+
+        之后的记录追加在完好的行后面, 压缩文件也不会接在被截断的压缩流后面; 先写临时文件再替换
+        """
+        self.close_segment()
+        self.flush()
+
+        path = f_join(self.events_dir, self.manifest["segments"][index]["name"])
+        compression = compression_of(path)
+        with open_compressed(path, "r") as src, open_compressed(path + ".tmp", "w", compression=compression) as dst:
+            for _, line in zip(range(records), src):
+                dst.write(line)
+        os.replace(path + ".tmp", path)
+
+    def reset_state(self):
         self.item_vs_time = {}       # 物品随时间、游戏次数的变化
         self.item_vs_iter = {}
         self.elapsed_time = 0
+        self.iteration = 0
         self.item_history = set()    # 物品历史
+        self.biome_history = set()
         self.position_history = [[0, 0]]
 
+    def resume(self, cutoff=None):
+        """ 加载最近的快照, 只重放之后的记录; cutoff 早于快照时从头重放 (包括旧格式的记录) """
+        self.flush()
+
+        init_position = self.init_position
+        self.reset_state()
+
+        snapshot = self.manifest["snapshot"]
+        migrate = False
+        if snapshot and (cutoff is None or cutoff >= snapshot["iteration"]):
+            self.load_state(json_load(f_join(self.events_dir, snapshot["name"])))
+            start_segment, skip = max(snapshot["segment"], 0), snapshot["segment_records"]
+        else:
+            self.init_position = init_position
+            self.resume_legacy(cutoff)
+            start_segment, skip = 0, 0
+
+            # 旧格式的检查点在完整恢复后保存为快照, 之后的 resume 不再读取这些文件
+            migrate = snapshot is None and cutoff is None and self.iteration > 0
+
+        for index in range(start_segment, len(self.manifest["segments"])):
+            records = skip if index == start_segment else 0
+            for record in self.read_segment(index, skip=records):
+                if record is None:
+                    self.truncate_segment(index, records)
+                    break
+
+                if cutoff and self.iteration + 1 > cutoff:
+                    return
+
+                self.replay_record(record["events"])
+                records += 1
+
+            # 上次运行可能在更新 manifest 之前退出, 以文件内容为准
+            self.manifest["segments"][index]["records"] = records
+
+        self.manifest["records"] = sum(segment["records"] for segment in self.manifest["segments"])
+
+        if migrate:
+            self.save_snapshot()
+
+    def replay_record(self, events):
+        self.iteration += 1
+        if not self.init_position:   # 按最老的事件初始化位置
+            self.init_position = [   # 与 record 以及快照中保存的格式一致
+                events[0][1]["status"]["position"]["x"],
+                events[0][1]["status"]["position"]["z"],
+            ]
+        self.apply_events(events)    # 恢复事件, 更新背包和相对位置
+
+    def legacy_records(self):
+        # 旧格式: 每次 record 一个 json 文件, 文件名为 task_20230705_140705
+        return f_listdir(
+            self.events_dir,
+            mask=lambda name: (not name.startswith((MANIFEST_NAME, "snapshot_"))
+                               and not SEGMENT_PATTERN.match(name))
+        )
+
+    def resume_legacy(self, cutoff=None):
         def get_timestamp(string):
             timestamp = "_".join(string.split("_")[-2:])   # 提取时间,  events 文件下的是 record 中的 task_20230705_140705
 
@@ -67,28 +296,39 @@ class EventRecorder:
             # mktime 获得 Epoch 秒数
             return time.mktime(time.strptime(timestamp, "%Y%m%d_%H%M%S"))
 
-        # 在self.ckpt_dir 路径下名为 "events"的目录, 列出该目录下的所有文件和子目录
-        # 对这些文件和子目录进行排序, 返回这些文件和子目录的名字 (而不是完整路径)
-        records = f_listdir(self.ckpt_dir, "events")
-        sorted_records = sorted(records, key=get_timestamp)   # 按转换后的时间排序
+        sorted_records = sorted(self.legacy_records(), key=get_timestamp)   # 按转换后的时间排序
 
         for record in sorted_records:
-            self.iteration += 1
-            if cutoff and self.iteration > cutoff:
+            if cutoff and self.iteration + 1 > cutoff:
                 break
 
             # 加载事件
-            events = json_load(f_join(self.ckpt_dir, "events", record))
-            if not self.init_position:   # 按最老的事件初始化位置
-                self.init_position = (
-                    events[0][1]["status"]["position"]["x"],
-                    events[0][1]["status"]["position"]["z"],
-                )
-            for event_type, event in events:
-                self.update_items(event)      # 恢复事件, 更新背包和相对位置
-                self.update_position(event)
-                if event_type == "observe":
-                    self.update_elapsed_time(event)
+            self.replay_record(json_load(f_join(self.events_dir, record)))
+
+    def close_segment(self):
+        segments = self.manifest["segments"]
+
+        if self.writer is not None and segments:
+            self.writer.close_file(f_join(self.events_dir, segments[-1]["name"]))
+
+        if self.segment_fp is not None:
+            self.segment_fp.close()
+            self.segment_fp = None
+
+    def flush(self):
+        """ 等待后台写入完成, 之后磁盘上的检查点与内存中的状态一致 """
+        if self.writer is not None:
+            self.writer.flush()
+
+    def close(self):
+        """ 写入剩余数据并关闭文件; 之后仍可 record, 但不再使用自己的写线程 """
+        self.close_segment()
+        self.flush()
+
+        if self.own_writer:
+            self.writer.close()
+            self.writer = None
+            self.own_writer = False
 
     def update_items(self, event):
         # 背包、背包中物品
@@ -0,0 +1,216 @@
+import json
+import hashlib
+import threading
+from collections import deque
+
+from .file_utils import f_mkdir_in_path, get_dir
+
+_session = None
+
+
+class ReplayMismatchError(LookupError):
+    pass
+
+
+class RecordedResponse:
+    __slots__ = ("status_code", "text")
+
+    def __init__(self, status_code, text):
+        """ 回放时代替 requests.Response, 只提供 bridge 用到的属性 """
+        self.status_code = status_code
+        self.text = text
+
+    @property
+    def content(self):
+        return self.text.encode("utf-8")
+
+    def json(self):
+        return json.loads(self.text)
+
+    @classmethod
+    def encode(cls, res):
+        return {"status_code": res.status_code, "text": res.text}
+
+    @classmethod
+    def decode(cls, data):
+        return cls(data["status_code"], data["text"])
+
+
+def request_digest(kind, channel, request):
+    """ 同一类请求 (kind, channel) 中按请求内容区分, 内容相同的请求按记录顺序依次回放 """
+    raw = json.dumps([kind, channel, request], sort_keys=True, ensure_ascii=False, default=str)
+
+    return hashlib.sha256(raw.encode("utf-8")).hexdigest()
+
+
+class Recorder:
+    def __init__(self, path):
+        """ 按发生顺序把每个 LLM 请求 / 响应与 bridge 请求 / 响应追加到 JSONL 文件
+
+        :param path: 记录文件路径
+        """
+        if get_dir(path):
+            f_mkdir_in_path(path)
+
+        self.path = path
+        self.replaying = False
+        self.records = 0
+
+        self.lock = threading.Lock()   # 多个 agent 线程可能同时请求
+        self.fp = open(path, "w", encoding="utf-8")
+
+    def record(self, kind, channel, request, response):
+        line = json.dumps({
+            "kind": kind,
+            "channel": channel,
+            "digest": request_digest(kind, channel, request),
+            "request": request,
+            "response": response,
+        }, ensure_ascii=False, default=str)
+
+        with self.lock:
+            self.records += 1
+            self.fp.write(line + "\n")
+            self.fp.flush()   # 程序崩溃时已记录的部分仍可回放
+
+    def stats(self):
+        return {"path": self.path, "records": self.records}
+
+    def close(self):
+        with self.lock:
+            self.fp.close()
+
+
+class Replayer:
+    def __init__(self, path, strict=True):
+        """ 从 Recorder 的记录文件回放响应, 不访问网络
+
+        :param path: 记录文件路径
+        :param strict: True 时请求内容必须与记录一致; False 时找不到相同请求就按同一 channel 的记录顺序返回
+        """
+        self.path = path
+        self.strict = strict
+        self.replaying = True
+
+        self.by_digest = {}    # digest -> deque[记录]
+        self.by_channel = {}   # (kind, channel) -> deque[记录], 非严格模式使用
+        self.served = 0
+        self.fallbacks = 0
+        self.lock = threading.Lock()
+
+        with open(path, "r", encoding="utf-8") as fp:
+            for line in fp:
+                if not line.strip():
+                    continue
+
+                entry = json.loads(line)
+                entry["used"] = False
+                self.by_digest.setdefault(entry["digest"], deque()).append(entry)
+                self.by_channel.setdefault((entry["kind"], entry["channel"]), deque()).append(entry)
+
+    @staticmethod
+    def _pop_unused(queue):
+        while queue and queue[0]["used"]:
+            queue.popleft()
+
+        return queue.popleft() if queue else None
+
+    def replay(self, kind, channel, request):
+        """ 返回与请求对应的下一条记录的响应
+
+        :raise ReplayMismatchError: 记录中没有该请求
+        """
+        with self.lock:
+            entry = self._pop_unused(self.by_digest.get(request_digest(kind, channel, request), deque()))
+
+            if entry is None and not self.strict:
+                entry = self._pop_unused(self.by_channel.get((kind, channel), deque()))
+                if entry is not None:
+                    self.fallbacks += 1
+
+            if entry is None:
+                raise ReplayMismatchError(f"No recorded {kind} response for {channel} in {self.path}")
+
+            entry["used"] = True
+            self.served += 1
+
+            return entry["response"]
+
+    def stats(self):
+        with self.lock:
+            remaining = sum(not entry["used"] for queue in self.by_digest.values() for entry in queue)
+
+        return {"path": self.path, "served": self.served, "fallbacks": self.fallbacks, "remaining": remaining}
+
+    def close(self):
+        pass
+
+
+def start_recording(path):
+    """ 开启全局记录, 之后所有 LLM 请求与 bridge 请求都写入 path
+
+    :return: Recorder
+    """
+    global _session
+
+    stop_session()
+    _session = Recorder(path)
+
+    return _session
+
+
+def start_replay(path, strict=True):
+    """ 开启全局回放, 之后所有 LLM 请求与 bridge 请求都从 path 返回
+
+    :return: Replayer
+    """
+    global _session
+
+    stop_session()
+    _session = Replayer(path, strict=strict)
+
+    return _session
+
+
+def stop_session():
+    """ 结束记录或回放, 返回之前的 Recorder / Replayer """
+    global _session
+
+    session, _session = _session, None
+    if session is not None:
+        session.close()
+
+    return session
+
+
+def get_session():
+    return _session
+
+
+def is_replaying():
+    session = _session
+    return session is not None and session.replaying
+
+
+def call_recorded(kind, channel, request, fn, encode=None, decode=None):
+    """ 没有记录或回放时直接调用 fn; 记录时调用 fn 并保存响应; 回放时不调用 fn, 返回记录的响应
+
+    :param kind: 请求类型, llm 或 env
+    :param channel: agent 名称或路由
+    :param request: 可 JSON 序列化的请求内容, 用于匹配
+    :param fn: 实际发出请求的函数
+    :param encode: 响应 -> 可 JSON 序列化的对象, 默认不转换
+    :param decode: encode 的逆操作
+    """
+    session = _session
+    if session is None:
+        return fn()
+
+    if session.replaying:
+        response = session.replay(kind, channel, request)
+        return decode(response) if decode else response
+
+    response = fn()
+    session.record(kind, channel, request, encode(response) if encode else response)
+
+    return response
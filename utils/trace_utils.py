@@ -0,0 +1,236 @@
+import os
+import json
+import time
+import threading
+import functools
+
+from .file_utils import f_mkdir_in_path, get_dir
+
+_tracer = None
+
+
+class _NullSpan:
+    """ 关闭追踪时 span() 返回的共享空对象, 进入 / 退出 / set 都不做任何事 """
+
+    __slots__ = ()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        return False
+
+    def set(self, **attrs):
+        pass
+
+
+_NULL_SPAN = _NullSpan()
+
+
+class Span:
+    __slots__ = ("tracer", "name", "attrs", "start", "parent", "span_id")
+
+    def __init__(self, tracer, name, attrs):
+        self.tracer = tracer
+        self.name = name
+        self.attrs = attrs
+        self.start = None
+        self.parent = None
+        self.span_id = None
+
+    def set(self, **attrs):
+        """ 补充属性, 例如请求返回后的响应大小 """
+        self.attrs.update(attrs)
+
+    def __enter__(self):
+        self.span_id, self.parent = self.tracer.push()
+        self.start = time.perf_counter()
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        end = time.perf_counter()
+        self.tracer.pop(self.span_id)
+
+        if exc_type is not None:
+            self.attrs["error"] = exc_type.__name__
+        self.tracer.record(self, end)
+
+        return False
+
+
+class Tracer:
+    def __init__(self):
+        """ 记录 span 的开始时间、耗时、线程与属性, 可导出为 JSONL 或 Chrome trace (chrome://tracing, Perfetto)
+
+        spans 只保存还没有被 take_spans 取走的 span, 按名称的汇总 (summary) 一直累计
+        """
+        self.origin = time.perf_counter()
+        self.pid = os.getpid()
+        self.spans = []
+        self.totals = {}   # span 名称 -> (次数, 总耗时毫秒)
+
+        self.lock = threading.Lock()
+        self.local = threading.local()
+        self.next_id = 0
+
+    def push(self):
+        stack = getattr(self.local, "stack", None)
+        if stack is None:
+            stack = self.local.stack = []
+
+        with self.lock:
+            self.next_id += 1
+            span_id = self.next_id
+
+        parent = stack[-1] if stack else None
+        stack.append(span_id)
+
+        return span_id, parent
+
+    def pop(self, span_id):
+        stack = self.local.stack
+        if stack and stack[-1] == span_id:
+            stack.pop()
+        elif span_id in stack:   # 同一线程中交错执行的协程, 按 id 移除
+            stack.remove(span_id)
+
+    def record(self, span, end):
+        record = {
+            "id": span.span_id,
+            "parent": span.parent,
+            "name": span.name,
+            "start_us": (span.start - self.origin) * 1e6,
+            "dur_us": (end - span.start) * 1e6,
+            "thread": threading.current_thread().name,
+            "tid": threading.get_ident(),
+            "attrs": span.attrs,
+        }
+        with self.lock:
+            self.spans.append(record)
+            count, total = self.totals.get(span.name, (0, 0.0))
+            self.totals[span.name] = (count + 1, total + record["dur_us"] / 1000)
+
+    def take_spans(self):
+        """ 取走目前记录的 span 并清空, 之后的导出只包含新的 span """
+        with self.lock:
+            spans, self.spans = self.spans, []
+
+        return spans
+
+    def summary(self):
+        """ 按 span 名称汇总: 次数, 总耗时, 平均耗时 (毫秒), 包括已被 take_spans 取走的 span """
+        with self.lock:
+            totals = dict(self.totals)
+
+        return {
+            name: {"count": count, "total_ms": total, "mean_ms": total / count}
+            for name, (count, total) in sorted(totals.items(), key=lambda item: -item[1][1])
+        }
+
+    def _spans(self, spans):
+        if spans is not None:
+            return spans
+
+        with self.lock:
+            return list(self.spans)
+
+    def export_jsonl(self, path, spans=None, append=False):
+        """ 导出为 JSONL, 每行一个 span
+
+        :param spans: 要导出的 span, 默认为目前记录的全部
+        :param append: 追加到已有文件末尾
+        """
+        if get_dir(path):
+            f_mkdir_in_path(path)
+
+        spans = self._spans(spans)
+
+        with open(path, "a" if append else "w", encoding="utf-8") as fp:
+            for record in spans:
+                fp.write(json.dumps(record, default=str) + "\n")
+
+    def export_chrome(self, path, spans=None, append=False):
+        """ 导出为 Chrome trace 的 JSON Array 格式, 数组可以不闭合, 因此能够直接在文件末尾追加
+
+        :param spans: 要导出的 span, 默认为目前记录的全部
+        :param append: 追加到已有文件末尾
+        """
+        if get_dir(path):
+            f_mkdir_in_path(path)
+
+        spans = self._spans(spans)
+        append = append and os.path.exists(path)
+
+        events = [
+            {
+                "name": record["name"],
+                "cat": record["name"].split(".")[0],
+                "ph": "X",
+                "ts": record["start_us"],
+                "dur": record["dur_us"],
+                "pid": self.pid,
+                "tid": record["tid"],
+                "args": record["attrs"],
+            }
+            for record in spans
+        ]
+        with open(path, "a" if append else "w", encoding="utf-8") as fp:
+            if not append:
+                fp.write("[\n")
+            for event in events:
+                fp.write(json.dumps(event, default=str) + ",\n")
+
+
+def enable_tracing():
+    """ 开启全局追踪
+
+    :return: Tracer
+    """
+    global _tracer
+
+    if _tracer is None:
+        _tracer = Tracer()
+
+    return _tracer
+
+
+def disable_tracing():
+    """ 关闭全局追踪, 返回之前的 Tracer (可继续导出) """
+    global _tracer
+
+    tracer, _tracer = _tracer, None
+
+    return tracer
+
+
+def get_tracer():
+    return _tracer
+
+
+def span(name, **attrs):
+    """ with span("env.step", code_chars=10) as s: ...; s.set(response_bytes=n)
+
+    关闭追踪时返回共享的空对象, 开销只有一次全局变量读取
+    """
+    tracer = _tracer
+    if tracer is None:
+        return _NULL_SPAN
+
+    return Span(tracer, name, attrs)
+
+
+def traced(name):
+    """ 装饰器版本的 span, 关闭追踪时直接调用原函数 """
+    def decorator(fn):
+        @functools.wraps(fn)
+        def wrapper(*args, **kwargs):
+            tracer = _tracer
+            if tracer is None:
+                return fn(*args, **kwargs)
+
+            with Span(tracer, name, {}):
+                return fn(*args, **kwargs)
+
+        return wrapper
+
+    return decorator
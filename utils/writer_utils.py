@@ -0,0 +1,139 @@
+import json
+import queue
+import atexit
+import weakref
+import threading
+
+from .json_utils import json_dump, open_compressed
+
+_STOP = object()
+_writers = weakref.WeakSet()   # 仍在运行的写线程, 解释器退出时写完
+
+
+@atexit.register
+def _close_writers():
+    """ 写线程是守护线程, 解释器退出时不会等待它; 在退出前写完队列中的任务并关闭文件 """
+    for writer in list(_writers):
+        try:
+            writer.close()
+        except Exception as e:
+            print(f"Failed to flush {writer.thread.name} at exit: {e}")
+
+
+class BackgroundWriter:
+    def __init__(self, max_queue=1024, name="background-writer"):
+        """ 在后台线程中按提交顺序执行写盘任务, 调用方线程不再等待磁盘 I/O
+
+        队列满时 submit 会阻塞 (背压), 保证内存占用有上限; 任务中的异常在下一次 flush / close 时抛出
+
+        :param max_queue: 队列中最多等待的任务数
+        :param name: 线程名称
+        """
+        self.queue = queue.Queue(maxsize=max_queue)
+        self.files = {}   # 路径 -> 追加写入的文件对象, 只在写线程中访问
+        self.error = None
+
+        self.submitted = 0
+        self.blocked = 0     # 提交时队列已满的次数
+        self.max_depth = 0
+
+        self.thread = threading.Thread(target=self._run, name=name, daemon=True)
+        self.thread.start()
+        _writers.add(self)
+
+    def _run(self):
+        while True:
+            task = self.queue.get()
+            try:
+                if task is _STOP:
+                    return
+
+                fn, args, kwargs = task
+                fn(*args, **kwargs)
+            except Exception as e:   # 保留第一个异常, 在调用方线程中抛出
+                if self.error is None:
+                    self.error = e
+            finally:
+                self.queue.task_done()
+
+    def submit(self, fn, *args, **kwargs):
+        """ 提交一个写盘任务, 参数在任务执行前不应再被修改 """
+        if not self.thread.is_alive():
+            raise RuntimeError("BackgroundWriter has been closed")
+
+        if self.queue.full():
+            self.blocked += 1
+        self.queue.put((fn, args, kwargs))
+
+        self.submitted += 1
+        self.max_depth = max(self.max_depth, self.queue.qsize())
+
+    def dump_json(self, data, *filepaths, **kwargs):
+        """ 后台执行 json_dump, 路径以 .gz / .zst 结尾时压缩保存 """
+        self.submit(json_dump, data, *filepaths, **kwargs)
+
+    def append_line(self, fpath, line, compression=None):
+        """ 向文件追加一行, 文件在写线程中保持打开, 直到 close_file / flush(close_files=True) / close """
+        self.submit(self._append_line, fpath, line, compression)
+
+    def append_json(self, fpath, data, compression=None):
+        """ 在写线程中序列化 data 并作为一行追加 (JSONL) """
+        self.submit(self._append_json, fpath, data, compression)
+
+    def close_file(self, fpath):
+        self.submit(self._close_file, fpath)
+
+    def _append_line(self, fpath, line, compression):
+        fp = self.files.get(fpath)
+        if fp is None:
+            fp = self.files[fpath] = open_compressed(fpath, "a", compression=compression)
+
+        fp.write(line + "\n")
+
+    def _append_json(self, fpath, data, compression):
+        self._append_line(fpath, json.dumps(data), compression)
+
+    def _close_file(self, fpath):
+        fp = self.files.pop(fpath, None)
+        if fp is not None:
+            fp.close()
+
+    def _flush_files(self):
+        for fp in self.files.values():
+            fp.flush()
+
+    def _close_files(self):
+        for fpath in list(self.files):
+            self._close_file(fpath)
+
+    def flush(self, close_files=False):
+        """ 等待已提交的任务全部完成, 并把追加写入的文件刷新到磁盘
+
+        :param close_files: 同时关闭追加写入的文件
+        """
+        self.submit(self._close_files if close_files else self._flush_files)
+        self.queue.join()
+
+        if self.error is not None:
+            error, self.error = self.error, None
+            raise error
+
+    def close(self):
+        if not self.thread.is_alive():
+            return
+
+        self.submit(self._close_files)
+        self.queue.put(_STOP)
+        self.thread.join()
+
+        if self.error is not None:
+            error, self.error = self.error, None
+            raise error
+
+    def stats(self):
+        return {
+            "submitted": self.submitted,
+            "pending": self.queue.qsize(),
+            "blocked": self.blocked,
+            "max_depth": self.max_depth,
+        }